@@ -0,0 +1,51 @@
+'''Prefix autocomplete over usernames and names'''
+from django.db.models.functions import Lower
+from .models import User, LISTED_ROLES
+from .caching import LRUCache
+
+RESULT_LIMIT = 10
+PREFIX_FIELDS = ('username', 'first_name', 'last_name')
+
+# Results per (viewer role, prefix), expiring so other processes' writes show up
+cache = LRUCache()
+
+"""
+Forgets this process's cached results. Needed after writes that skip
+post_save, such as the role transitions, when users change role.
+"""
+def invalidate():
+    cache.clear()
+
+def _upper_bound(prefix):
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+"""
+Users the viewer may list whose username, first or last name starts with
+prefix, ignoring case. Each (role, field) pair is one range scan of at
+most RESULT_LIMIT rows on a (user_type, lower(field)) index; results are
+cached per (viewer role, prefix).
+"""
+def complete(viewer, prefix):
+    prefix = prefix.strip().lower()
+    user_types = LISTED_ROLES.get(viewer.user_type, ())
+    if not prefix or not user_types:
+        return []
+    key = (viewer.user_type, prefix)
+    results = cache.get(key)
+    if results is not None:
+        return results
+
+    matches = {}
+    for user_type in user_types:
+        for field in PREFIX_FIELDS:
+            rows = (
+                User.objects.annotate(prefix_key=Lower(field))
+                .filter(user_type=user_type, prefix_key__gte=prefix, prefix_key__lt=_upper_bound(prefix))
+                .order_by('prefix_key')
+                .values_list('id', 'username', 'first_name', 'last_name')[:RESULT_LIMIT]
+            )
+            for user_id, username, first_name, last_name in rows:
+                matches[user_id] = {'id': user_id, 'username': username, 'name': f'{first_name} {last_name}'}
+    results = sorted(matches.values(), key=lambda match: match['username'].lower())[:RESULT_LIMIT]
+    cache.set(key, results)
+    return results
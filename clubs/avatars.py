@@ -0,0 +1,93 @@
+'''Avatar URLs and locally rendered identicons for users of the clubs application'''
+import hashlib
+import os
+import struct
+import tempfile
+import zlib
+from functools import lru_cache
+from pathlib import Path
+from django.conf import settings
+from django.urls import reverse
+
+GRAVATAR_URL = 'https://www.gravatar.com/avatar/{hash}?size={size}&default=mp'
+
+# Identicons are only rendered at these sizes, other sizes use the next one up
+AVATAR_SIZES = (60, 120, 240)
+
+"""The gravatar hash of an email address"""
+def email_hash(email):
+    return hashlib.md5(email.strip().lower().encode('utf-8')).hexdigest()
+
+"""
+The URL of an avatar of the given size.
+Points at gravatar.com, or at the local avatar view when AVATAR_PROVIDER is 'local'.
+"""
+def avatar_url(hash, size):
+    return _avatar_url(settings.AVATAR_PROVIDER, hash, size)
+
+# Every (provider, hash, size) URL is only built once per process
+@lru_cache(maxsize=4096)
+def _avatar_url(provider, hash, size):
+    if provider == 'local':
+        return reverse('avatar', kwargs={'email_hash': hash, 'size': size_bucket(size)})
+    return GRAVATAR_URL.format(hash=hash, size=size)
+
+"""The smallest rendered size that is at least as large as size"""
+def size_bucket(size):
+    for bucket in AVATAR_SIZES:
+        if size <= bucket:
+            return bucket
+    return AVATAR_SIZES[-1]
+
+"""
+The path of the identicon PNG for a hash, rendering it on first use.
+Files are cached on disk under AVATAR_CACHE_DIR/<size>/<hash>.png
+"""
+def identicon_path(hash, size):
+    size = size_bucket(size)
+    path = Path(settings.AVATAR_CACHE_DIR) / str(size) / f'{hash}.png'
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename so concurrent requests never see half a file
+        with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as png:
+            png.write(render_identicon(hash, size))
+        os.replace(png.name, path)
+    return path
+
+"""
+A deterministic, horizontally symmetric 5x5 identicon for a hash, as PNG bytes.
+"""
+def render_identicon(hash, size):
+    digest = bytes.fromhex(hash)
+    colour = bytes(0x30 + byte % 0xa0 for byte in digest[:3])
+    cells = [
+        [(digest[3 + row] >> column) & 1 for column in range(3)]
+        for row in range(5)
+    ]
+    cells = [row + row[1::-1] for row in cells]
+
+    cell_size = size // 6
+    margin = (size - 5 * cell_size) // 2
+    rows = []
+    for y in range(size):
+        cell_row = (y - margin) // cell_size
+        line = bytearray(size)
+        if 0 <= y - margin < 5 * cell_size:
+            for column, filled in enumerate(cells[cell_row]):
+                if filled:
+                    start = margin + column * cell_size
+                    line[start:start + cell_size] = b'\x01' * cell_size
+        rows.append(b'\x00' + bytes(line))
+    return _png(size, b'\xf0\xf0\xf0' + colour, b''.join(rows))
+
+def _png(size, palette, scanlines):
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+    header = struct.pack('>IIBBBBB', size, size, 8, 3, 0, 0, 0)
+    return (
+        b'\x89PNG\r\n\x1a\n'
+        + chunk(b'IHDR', header)
+        + chunk(b'PLTE', palette)
+        + chunk(b'IDAT', zlib.compress(scanlines, 9))
+        + chunk(b'IEND', b'')
+    )
@@ -0,0 +1,21 @@
+'''Authentication backends for the clubs application'''
+from django.contrib.auth.backends import ModelBackend
+from django.core.exceptions import PermissionDenied
+from . import caching
+
+"""
+The model backend, except that the logged in user is loaded from the
+user cache rather than with a SELECT on every request.
+ModelBackend is listed after it only so that sessions from before it
+still load, so failed logins stop here instead of checking the password
+a second time there.
+"""
+class CachedModelBackend(ModelBackend):
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        user = super().authenticate(request, username=username, password=password, **kwargs)
+        if user is None and password is not None:
+            raise PermissionDenied
+        return user
+
+    def get_user(self, user_id):
+        return caching.get_user(user_id, super().get_user)
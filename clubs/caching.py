@@ -0,0 +1,105 @@
+'''
+Caches shared by the clubs application.
+Logged in users are cached under a per-user version token kept in the
+default cache. Every write to a user replaces its token, so copies cached
+under an older token, in this process or in the shared cache, are never
+read again and simply age out.
+'''
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from django.core.cache import cache as shared_cache
+from django.db import transaction
+
+VERSION_KEY = 'clubs:user-version:{}'
+USER_KEY = 'clubs:user:{}:{}'
+'''
+Seconds a user is cached for. Hosts that do not share the default cache
+never see each other's new version tokens, so this is also how long a
+change to a user, such as a demotion, can take to reach them.
+'''
+USER_TIMEOUT = 60
+
+"""
+A small least recently used cache whose entries also expire after ttl
+seconds, so that other processes' writes become visible.
+"""
+class LRUCache:
+    def __init__(self, max_entries=1024, ttl=30):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+# Pickled users of this process, keyed by (user id, version)
+local_users = LRUCache(max_entries=4096, ttl=USER_TIMEOUT)
+
+"""Return the current version token of a user, creating one if there is none"""
+def user_version(user_id):
+    key = VERSION_KEY.format(user_id)
+    version = shared_cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not shared_cache.add(key, version, None):
+            version = shared_cache.get(key, version)
+    return version
+
+"""
+Return the user with the given id, from this process, the shared cache or
+load(user_id), in that order. Users load returns are cached under the
+version read before loading, so a write racing the load leaves them unused.
+"""
+def get_user(user_id, load):
+    version = user_version(user_id)
+    pickled = local_users.get((user_id, version))
+    if pickled is None:
+        pickled = shared_cache.get(USER_KEY.format(user_id, version))
+        if pickled is None:
+            user = load(user_id)
+            if user is None:
+                return None
+            pickled = pickle.dumps(user, pickle.HIGHEST_PROTOCOL)
+            shared_cache.set(USER_KEY.format(user_id, version), pickled, USER_TIMEOUT)
+        local_users.set((user_id, version), pickled)
+    # Every request gets its own copy, views are free to change it
+    return pickle.loads(pickled)
+
+def _replace_versions(keys):
+    shared_cache.set_many({key: uuid.uuid4().hex for key in keys}, None)
+
+"""
+Give users new version tokens so their cached copies are reloaded.
+This is done straight away and again once the current transaction commits,
+so a request that reloads a user before the write is visible cannot cache
+the old row under the new token.
+"""
+def invalidate_users(user_ids):
+    keys = [VERSION_KEY.format(user_id) for user_id in user_ids]
+    if keys:
+        _replace_versions(keys)
+        transaction.on_commit(lambda: _replace_versions(keys))
@@ -0,0 +1,14 @@
+'''Template context shared by every page of the clubs application'''
+from django.conf import settings
+from clubs import helpers
+
+"""
+Exposes what cached fragments must vary on beyond their own data.
+The fragment cache outlives deploys, so fragments rendered by another
+release's templates or for another avatar provider are not served.
+"""
+def fragment_versions(request):
+    return {
+        'deploy_version': helpers.deploy_version(),
+        'avatar_provider': settings.AVATAR_PROVIDER,
+    }
@@ -0,0 +1,70 @@
+'''
+Streaming exports of user lists as CSV or JSON lines.
+Users are read in chunks of consecutive primary keys and each chunk is
+encoded and handed on before the next is read, so memory stays flat
+however many users are exported.
+'''
+import csv
+import io
+import json
+from .models import User, UserType, ApplicationStatus
+
+'''Names used to pick roles on the command line and in the export url'''
+ROLE_NAMES = {
+    'applicants': UserType.APPLICANT,
+    'members': UserType.MEMBER,
+    'officers': UserType.OFFICER,
+    'owners': UserType.OWNER,
+}
+
+FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+EXPORT_FIELDS = (
+    'id', 'username', 'first_name', 'last_name', 'email', 'user_type',
+    'application_status', 'experience_level', 'bio', 'personal_statement',
+)
+
+CHUNK_SIZE = 2000
+
+"""
+Yields the EXPORT_FIELDS of every user of the given roles, ordered by id.
+Each chunk is a separate query starting after the last id seen, so no
+server side cursor or offset scan is needed.
+"""
+def iter_users(user_types, chunk_size=CHUNK_SIZE):
+    users = User.objects.filter(user_type__in=user_types).order_by('pk').values_list(*EXPORT_FIELDS)
+    last_id = 0
+    while True:
+        chunk = list(users.filter(pk__gt=last_id)[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last_id = chunk[-1][0]
+
+def _labelled(row):
+    row = dict(zip(EXPORT_FIELDS, row))
+    row['user_type'] = UserType(row['user_type']).label
+    row['application_status'] = ApplicationStatus(row['application_status']).label
+    return row
+
+"""
+Yields the export of the given roles as strings, a header (for CSV) first
+and then one string per chunk of users.
+"""
+def export_users(user_types, file_format, chunk_size=CHUNK_SIZE):
+    if file_format == 'csv':
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, EXPORT_FIELDS)
+        writer.writeheader()
+        yield buffer.getvalue()
+        for chunk in iter_users(user_types, chunk_size):
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(_labelled(row) for row in chunk)
+            yield buffer.getvalue()
+    else:
+        for chunk in iter_users(user_types, chunk_size):
+            yield ''.join(json.dumps(_labelled(row)) + '\n' for row in chunk)
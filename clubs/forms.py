@@ -1,3 +1,4 @@
+import re
 from django import forms
 from .models import User
 from django.core.validators import RegexValidator
@@ -105,3 +106,48 @@ class SignUpForm(forms.ModelForm):
         )
 
         return user
+
+"""
+A list of user ids posted from checkboxes.
+Any positive integer SQLite can store is accepted, the view decides what
+each id refers to.
+"""
+class UserIdsField(forms.MultipleChoiceField):
+    widget = forms.CheckboxSelectMultiple
+    MAX_ID = 2 ** 63 - 1
+
+    def valid_value(self, value):
+        # str.isdigit() would also let through digits such as '²' that int() rejects
+        if not re.fullmatch(r'[0-9]+', str(value)):
+            return False
+        try:
+            return 0 < int(value) <= self.MAX_ID
+        except ValueError:
+            return False
+
+    def clean(self, value):
+        value = super().clean(value)
+        return list(dict.fromkeys(int(user_id) for user_id in value))
+
+"""
+Lets an officer accept or reject several applicants in one request
+"""
+class ReviewApplicationsForm(forms.Form):
+    MAX_APPLICANTS = 500
+
+    action = forms.ChoiceField(choices=[('accept', 'Accept'), ('reject', 'Reject')])
+    user_ids = UserIdsField()
+
+    def clean_user_ids(self):
+        user_ids = self.cleaned_data.get('user_ids')
+        if len(user_ids) > self.MAX_APPLICANTS:
+            raise forms.ValidationError(f'At most {self.MAX_APPLICANTS} applicants can be reviewed at once.')
+        return user_ids
+
+"""
+Validates one imported member with the same validators as SignUpForm.
+Uniqueness is left to the import, which updates existing usernames.
+"""
+class ImportMemberForm(SignUpForm):
+    def validate_unique(self):
+        pass
@@ -1,6 +1,14 @@
-from django.shortcuts import redirect
+import hashlib
+import time
+from functools import lru_cache
+from django.shortcuts import redirect, render
 from django.conf import settings
+from django.contrib import messages
+from django.contrib.staticfiles.storage import staticfiles_storage
 from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from django.middleware.csrf import get_token
 
 def login_prohibited(view_function):
     def modified_view_function(request):
@@ -14,3 +22,47 @@ def reverse_with_next(url_name, next_url):
     url = reverse(url_name)
     url += f"?next={next_url}"
     return url
+
+"""
+The version of the templates and static files being served, mixed into
+every ETag so that pages cached before a deploy are rendered afresh.
+DEPLOY_VERSION names the release; the manifest collectstatic writes in
+production changes with every static file. Without either, the time the
+process started stands in.
+"""
+@lru_cache(maxsize=None)
+def deploy_version():
+    hashed_files = getattr(staticfiles_storage, 'hashed_files', None)
+    static_version = hashlib.md5(repr(sorted(hashed_files.items())).encode()).hexdigest() if hashed_files else ''
+    if not settings.DEPLOY_VERSION and not static_version:
+        return str(time.time())
+    return f'{settings.DEPLOY_VERSION}:{static_version}'
+
+"""
+Renders a template for a logged in user, or answers 304 Not Modified when
+the client's copy is still current, in which case get_context is never called.
+The ETag covers etag_parts, the url, the csrf cookie, the deployed version
+and the viewer, whose role shows in the menu. last_modified is when the
+page's data last changed. It is sent whole seconds only, so a change in
+the same second would look unmodified, and 304 is answered from the ETag alone.
+Pages showing messages are always rendered in full and never validated.
+"""
+def render_conditionally(request, template_name, get_context, last_modified, *etag_parts):
+    if len(messages.get_messages(request)):
+        return render(request, template_name, get_context())
+    viewer = request.user
+    last_modified = max(last_modified, viewer.updated_at)
+    # Pages may hold the csrf token, so make sure the cookie exists to hash
+    get_token(request)
+    etag = quote_etag(hashlib.md5(repr((
+        request.get_full_path(), request.META['CSRF_COOKIE'], deploy_version(),
+        viewer.pk, viewer.user_type, viewer.updated_at, last_modified, *etag_parts,
+    )).encode()).hexdigest())
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = render(request, template_name, get_context())
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified.timestamp())
+    # Browsers keep the page but check it is current before each use
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -0,0 +1,30 @@
+'''
+Static images that are also served as smaller, recompressed variants.
+The build_images command writes the variants next to their source, and the
+cover_picture tag lets the browser pick between them with srcset and sizes.
+'''
+import os
+
+'''Static path of each source image: ((width, height) of the source, widths of its variants), in pixels'''
+RESPONSIVE_IMAGES = {
+    'images/chess-bg.jpg': ((1200, 899), (480, 960, 1200)),
+}
+
+'''Variant formats, most preferred first: (extension, mime type, quality)'''
+VARIANT_FORMATS = (
+    ('webp', 'image/webp', 60),
+    ('jpg', 'image/jpeg', 70),
+)
+
+def variant_path(path, width, extension):
+    directory, name = os.path.split(path)
+    name = os.path.splitext(name)[0]
+    return f'{directory}/variants/{name}-{width}w.{extension}'
+
+"""
+The sizes attribute of an image covering the whole viewport.
+Viewports narrower than the image's aspect ratio crop its sides, so it is
+drawn as wide as the viewport height times that ratio rather than 100vw.
+"""
+def cover_sizes(width, height):
+    return f'(max-aspect-ratio: {width}/{height}) {100 * width / height:.2f}vh, 100vw'
@@ -0,0 +1,90 @@
+'''
+Per-request database instrumentation.
+Every query a request runs is counted and timed, and statements that only
+differ in their literals are grouped, so a view that runs the same query
+once per row (an N+1) stands out. Requests over the budget configured for
+their url name are logged as warnings on the clubs.queries logger.
+'''
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('clubs.queries')
+
+DEFAULT_QUERY_BUDGET = 10
+DEFAULT_QUERY_TIME_BUDGET = 0.5
+DEFAULT_QUERY_REPEAT_LIMIT = 3
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r'\bIN \((?:[^()]+)\)')
+
+"""Return the sql with its literals and IN lists replaced, so similar statements compare equal"""
+def normalize_sql(sql):
+    sql = _LITERALS.sub('?', sql)
+    return _IN_LISTS.sub('IN (...)', sql)
+
+"""
+An execute wrapper counting and timing the statements run while it is
+installed, and how often each normalized statement was run.
+"""
+class QueryRecorder:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.statements[normalize_sql(sql)] += 1
+
+    """Return the normalized statements run more than limit times, most repeated first"""
+    def repeated(self, limit):
+        return [(sql, count) for sql, count in self.statements.most_common() if count > limit]
+
+"""Return the (queries, seconds) budget of a url name"""
+def budget_for(url_name):
+    budgets = getattr(settings, 'QUERY_BUDGETS', {})
+    return (
+        budgets.get(url_name, getattr(settings, 'DEFAULT_QUERY_BUDGET', DEFAULT_QUERY_BUDGET)),
+        getattr(settings, 'QUERY_TIME_BUDGET', DEFAULT_QUERY_TIME_BUDGET),
+    )
+
+"""
+Records the queries of every request on request.query_stats and warns when
+a request goes over its budget or repeats a statement. Queries run while a
+streaming response is consumed happen after the view returns and are not
+counted.
+"""
+class QueryBudgetMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.query_stats = recorder = QueryRecorder()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        match = request.resolver_match
+        url_name = match.url_name if match else None
+        max_queries, max_duration = budget_for(url_name)
+        if recorder.count > max_queries or recorder.duration > max_duration:
+            logger.warning(
+                '%s %s (%s) ran %d queries in %.1fms, over its budget of %d queries in %.1fms',
+                request.method, request.path, url_name, recorder.count, recorder.duration * 1000,
+                max_queries, max_duration * 1000,
+            )
+        limit = getattr(settings, 'QUERY_REPEAT_LIMIT', DEFAULT_QUERY_REPEAT_LIMIT)
+        for sql, count in recorder.repeated(limit):
+            logger.warning('%s %s (%s) ran a similar query %d times, a likely N+1: %s',
+                           request.method, request.path, url_name, count, sql)
+        return response
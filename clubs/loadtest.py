@@ -0,0 +1,105 @@
+'''
+HTTP clients for the loadtest command.
+Only the standard library is used here, so clients run the same in
+threads of the server's process or in processes of their own. Each
+client keeps its own cookies, like a browser, and records every request
+as a (step, status, seconds) tuple. Redirects are recorded, not followed.
+'''
+import random
+import time
+from http.cookiejar import CookieJar
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode
+from urllib.request import HTTPCookieProcessor, HTTPRedirectHandler, build_opener
+
+DEFAULT_PASSWORD = 'Password123'
+'''Status recorded for requests that got no response at all'''
+NO_RESPONSE = 0
+
+class _NoRedirects(HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+"""A browser-like session against the live server"""
+class Session:
+    def __init__(self, base_url, records):
+        self.base_url = base_url
+        self.records = records
+        self.cookies = CookieJar()
+        self.opener = build_opener(HTTPCookieProcessor(self.cookies), _NoRedirects)
+
+    def request(self, step, path, data=None):
+        if data is not None:
+            data = urlencode({**data, 'csrfmiddlewaretoken': self.cookie('csrftoken')}).encode()
+        start = time.perf_counter()
+        try:
+            with self.opener.open(self.base_url + path, data, timeout=30) as response:
+                response.read()
+                status = response.status
+        except HTTPError as error:
+            status = error.code
+        except (URLError, OSError):
+            status = NO_RESPONSE
+        self.records.append((step, status, time.perf_counter() - start))
+        return status
+
+    def cookie(self, name):
+        return next((cookie.value for cookie in self.cookies if cookie.name == name), '')
+
+    def log_in(self, username):
+        self.request('log_in_form', '/log_in/')
+        return self.request('log_in', '/log_in/', {'username': username, 'password': DEFAULT_PASSWORD})
+
+    def log_out(self):
+        return self.request('log_out', '/log_out/')
+
+"""
+Members log in, look at their profile and log out again, over and over.
+Every log in hashes a password and writes a session and last_login.
+"""
+def login_storm(session, index, plan, rng):
+    session.log_in(rng.choice(plan['members']))
+    session.request('profile', '/profile/')
+    session.log_out()
+
+"""
+A club's intake day. Most clients sign up as new applicants, some are
+officers accepting and rejecting the pending applicants all at once, and
+one in ten keeps logging in as the owner or one of the officers next in
+line, handing ownership on whenever the user it logged in as holds it.
+"""
+def intake_day(session, index, plan, rng):
+    role = index % 10
+    if role == 0:
+        session.log_in(rng.choice(plan['owners']))
+        session.request('transfer_ownership', f'/transfer_ownership/{rng.choice(plan["owner_ids"])}')
+        session.log_out()
+    elif role < 4:
+        if not session.cookie('sessionid'):
+            session.log_in(rng.choice(plan['officers']))
+        transition = rng.choice(('accept_application', 'accept_application', 'reject_application'))
+        session.request(transition, f'/{transition}/{rng.choice(plan["applicant_ids"])}')
+    else:
+        username = f'{plan["run"]}_{index}_{len(session.records)}'
+        session.request('sign_up_form', '/sign_up/')
+        session.request('sign_up', '/sign_up/', {
+            'username': username, 'first_name': 'Load', 'last_name': 'Tester',
+            'email': f'{username}@example.org', 'experience_level': 'BEGINNER',
+            'bio': 'Load test', 'personal_statement': 'Load test',
+            'password': DEFAULT_PASSWORD, 'password_confirm': DEFAULT_PASSWORD,
+        })
+        session.log_out()
+
+SCENARIOS = {
+    'intake_day': intake_day,
+    'login_storm': login_storm,
+}
+
+"""Run one client of a scenario against base_url until deadline and return what it recorded"""
+def run_client(scenario, index, base_url, plan, deadline):
+    records = []
+    session = Session(base_url, records)
+    rng = random.Random(f'{plan["run"]}-{index}')
+    while time.time() < deadline:
+        SCENARIOS[scenario](session, index, plan, rng)
+    return records
@@ -0,0 +1,308 @@
+import json
+import math
+import os
+import random
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from clubs import autocomplete, caching, metrics
+from clubs.models import User, UserType, ApplicationStatus
+
+DEFAULT_PASSWORD = 'Password123'
+
+'''Relative frequency of each request in the replayed mix'''
+MIX = {
+    'view_members': 20,
+    'show_user': 20,
+    'profile': 15,
+    'search_users': 8,
+    'autocomplete_users': 8,
+    'view_applications': 6,
+    'view_officers': 4,
+    'home': 4,
+    'log_in': 3,
+    'accept_application': 3,
+    'reject_application': 2,
+    'promote_member': 2,
+    'demote_officer': 2,
+    'transfer_ownership': 1,
+}
+
+PERCENTILES = (50, 95, 99)
+MEMORY_REQUESTS = 3
+'''Slowdowns smaller than this are noise, whatever the tolerance'''
+MIN_SLOWDOWN_MS = 1.0
+MIN_MEMORY_GROWTH_KIB = 64
+
+"""Return the nearest rank percentile of samples"""
+def percentile(samples, rank):
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(rank / 100 * len(ordered)) - 1)]
+
+"""
+Return the names of about requests views to call, in proportion to their
+weight in MIX but at least once each, in a shuffled order.
+"""
+def request_mix(requests, rng):
+    total = sum(MIX.values())
+    names = [name for name, weight in MIX.items() for _ in range(max(1, round(requests * weight / total)))]
+    rng.shuffle(names)
+    return names
+
+"""
+Return the regressions of results against a baseline, as messages. A view
+regresses when it runs more queries, or when its p95 latency or peak
+memory grew by more than the tolerance.
+"""
+def compare(results, baseline, tolerance):
+    regressions = []
+    for size, dataset in results['datasets'].items():
+        base_views = baseline.get('datasets', {}).get(size, {}).get('views', {})
+        for name, view in dataset['views'].items():
+            base = base_views.get(name)
+            if base is None:
+                continue
+            if view['queries'] > base['queries']:
+                regressions.append(f'{size} users, {name}: {view["queries"]} queries, baseline {base["queries"]}')
+            if (view['p95_ms'] > base['p95_ms'] * (1 + tolerance)
+                    and view['p95_ms'] - base['p95_ms'] > MIN_SLOWDOWN_MS):
+                regressions.append(f'{size} users, {name}: p95 {view["p95_ms"]:.1f}ms, baseline {base["p95_ms"]:.1f}ms')
+            if (view['peak_memory_kib'] > base['peak_memory_kib'] * (1 + tolerance)
+                    and view['peak_memory_kib'] - base['peak_memory_kib'] > MIN_MEMORY_GROWTH_KIB):
+                regressions.append(
+                    f'{size} users, {name}: peak memory {view["peak_memory_kib"]}KiB, '
+                    f'baseline {base["peak_memory_kib"]}KiB'
+                )
+    return regressions
+
+"""
+Points the default connection at the sqlite database at path, and back
+at the configured one afterwards.
+"""
+@contextmanager
+def sqlite_database(path):
+    connection = connections[DEFAULT_DB_ALIAS]
+    if connection.vendor != 'sqlite':
+        raise CommandError('Seeded databases need the sqlite backend')
+    original = connection.settings_dict['NAME']
+    connection.close()
+    connection.settings_dict['NAME'] = path
+    try:
+        yield
+    finally:
+        connection.close()
+        connection.settings_dict['NAME'] = original
+
+"""
+Migrates the current database and seeds it up to size users, a tenth of
+them applicants and a hundredth officers. Users seeded by an earlier run
+are kept.
+"""
+def seed_database(size):
+    if size < 10:
+        raise CommandError('--users must be at least 10')
+    call_command('migrate', interactive=False, verbosity=0)
+    applicants = size // 10
+    officers = max(1, size // 100)
+    call_command('seed', applicants=applicants, officers=officers,
+                 members=size - applicants - officers - 3, batch_size=5000, stdout=StringIO())
+
+"""Runs requests with caches of their own, so they neither read nor clear the site's"""
+@contextmanager
+def isolated_caches():
+    isolated = override_settings(
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                            'LOCATION': 'benchmark'},
+                'fragments': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                              'LOCATION': 'benchmark-fragments'}},
+        SESSION_ENGINE='django.contrib.sessions.backends.db',
+        ALLOWED_HOSTS=['testserver', 'localhost'],
+        METRICS_DIR=None,
+    )
+    with isolated:
+        caching.local_users.clear()
+        autocomplete.cache.clear()
+        try:
+            yield
+        finally:
+            caching.local_users.clear()
+            autocomplete.cache.clear()
+            metrics.histograms.clear()
+
+class Command(BaseCommand):
+    help = ('Seeds databases of the given sizes, replays a mix of requests to every clubs view '
+            'and reports latency percentiles, queries and peak memory per view')
+
+    SIZES = [1000]
+    REQUESTS = 500
+    TOLERANCE = 0.25
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, action='append',
+                            help='Users in a benchmark database, may be repeated. Defaults to 1000')
+        parser.add_argument('--requests', type=int, default=self.REQUESTS,
+                            help='Requests replayed against each database')
+        parser.add_argument('--data-dir', default=os.path.join(settings.BASE_DIR, 'benchmark'),
+                            help='Where the seeded databases are kept between runs')
+        parser.add_argument('--use-current-database', action='store_true',
+                            help='Benchmark the configured database as it is instead of seeding one')
+        parser.add_argument('--output', help='JSON file to write the results to')
+        parser.add_argument('--baseline', help='JSON results of an earlier run to compare against')
+        parser.add_argument('--tolerance', type=float, default=self.TOLERANCE,
+                            help='Fraction by which latency and memory may grow before it is a regression')
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the request mix')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['tolerance'] < 0:
+            raise CommandError('--requests must be at least 1 and --tolerance not negative')
+        results = {'created': timezone.now().isoformat(), 'requests': options['requests'], 'datasets': {}}
+        if options['use_current_database']:
+            datasets = [('current', nullcontext())]
+        else:
+            datasets = [(str(size), self.seeded_database(size, options['data_dir']))
+                        for size in options['users'] or self.SIZES]
+        for size, database in datasets:
+            with database, isolated_caches():
+                self.stdout.write(f'Benchmarking {size} users.')
+                results['datasets'][size] = self.run(options['requests'], random.Random(options['seed']))
+        self.report(results)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(results, output, indent=2)
+        if options['baseline']:
+            with open(options['baseline']) as baseline_file:
+                regressions = compare(results, json.load(baseline_file), options['tolerance'])
+            for regression in regressions:
+                self.stderr.write(regression)
+            if regressions:
+                raise CommandError(f'{len(regressions)} regressions against {options["baseline"]}')
+
+    """Seeds, or reuses, the database of size users in data_dir and benchmarks against it"""
+    @contextmanager
+    def seeded_database(self, size, data_dir):
+        os.makedirs(data_dir, exist_ok=True)
+        with sqlite_database(os.path.join(data_dir, f'benchmark-{size}.sqlite3')):
+            seed_database(size)
+            yield
+
+    def run(self, requests, rng):
+        scenarios = self.scenarios(rng)
+        for request in scenarios.values():
+            request()
+        names = request_mix(requests, rng)
+        latencies = {name: [] for name in MIX}
+        queries = {name: 0 for name in MIX}
+        for name in names:
+            start = time.perf_counter()
+            response = scenarios[name]()
+            latencies[name].append((time.perf_counter() - start) * 1000)
+            queries[name] = max(queries[name], response.wsgi_request.query_stats.count)
+        views = {}
+        for name in MIX:
+            views[name] = {
+                'requests': len(latencies[name]),
+                **{f'p{rank}_ms': round(percentile(latencies[name], rank), 2) for rank in PERCENTILES},
+                'queries': queries[name],
+                'peak_memory_kib': self.peak_memory(scenarios[name]),
+            }
+        return {'users': User.objects.count(), 'views': views}
+
+    """Return the most memory, in KiB, allocated at once while answering a request"""
+    def peak_memory(self, request):
+        peak = 0
+        # Tracing restarts for every request, tracemalloc.reset_peak() needs Python 3.9
+        for _ in range(MEMORY_REQUESTS):
+            tracemalloc.start()
+            try:
+                request()
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+            finally:
+                tracemalloc.stop()
+        return peak // 1024
+
+    """
+    Return a function per view of the mix making one request to it as a
+    user allowed to. Requests that change users are rolled back, so every
+    run sees the same database.
+    """
+    def scenarios(self, rng):
+        users = User.objects.order_by('pk')
+        owner = users.filter(user_type=UserType.OWNER).first()
+        officers = list(users.filter(user_type=UserType.OFFICER)[:2])
+        members = list(users.filter(user_type=UserType.MEMBER)[:2])
+        applicants = list(users.filter(user_type=UserType.APPLICANT, application_status=ApplicationStatus.PENDING)[:1])
+        if owner is None or not officers or not members or not applicants:
+            raise CommandError('The database needs an owner, an officer, a member and a pending applicant')
+        first_id = users.values_list('pk', flat=True).first()
+        last_id = users.reverse().values_list('pk', flat=True).first()
+        targets = [user for user in (
+            users.filter(pk__gte=rng.randint(first_id, last_id)).only('pk', 'last_name').first()
+            for _ in range(50)
+        ) if user is not None]
+        pages = max(1, users.filter(user_type=UserType.MEMBER).count() // settings.USERS_PER_PAGE)
+
+        as_owner, as_officer, as_member, anonymous = Client(), Client(), Client(), Client()
+        as_owner.force_login(owner)
+        as_officer.force_login(officers[0])
+        as_member.force_login(members[0])
+
+        def get(client, url_name, query='', **kwargs):
+            return lambda: client.get(reverse(url_name, kwargs=kwargs) + query)
+
+        def rolled_back(client, url_name, user):
+            def request():
+                with transaction.atomic():
+                    response = client.get(reverse(url_name, kwargs={'user_id': user.pk}))
+                    transaction.set_rollback(True)
+                return response
+            return request
+
+        def show_user():
+            return as_officer.get(reverse('show_user', kwargs={'user_id': rng.choice(targets).pk}))
+
+        def search(url_name):
+            return lambda: as_officer.get(reverse(url_name), {'q': rng.choice(targets).last_name[:3]})
+
+        def log_in():
+            response = anonymous.post(reverse('log_in'), {'username': members[0].username, 'password': DEFAULT_PASSWORD})
+            anonymous.logout()
+            return response
+
+        def view_members():
+            page = 1 if rng.random() < 0.8 else rng.randint(1, min(pages, 50))
+            return as_officer.get(reverse('view_members'), {'page': page})
+
+        return {
+            'view_members': view_members,
+            'show_user': show_user,
+            'profile': get(as_member, 'profile'),
+            'search_users': search('search_users'),
+            'autocomplete_users': search('autocomplete_users'),
+            'view_applications': get(as_officer, 'view_applications'),
+            'view_officers': get(as_owner, 'view_officers'),
+            'home': get(anonymous, 'home'),
+            'log_in': log_in,
+            'accept_application': rolled_back(as_officer, 'accept_application', applicants[0]),
+            'reject_application': rolled_back(as_officer, 'reject_application', applicants[0]),
+            'promote_member': rolled_back(as_owner, 'promote_member', members[-1]),
+            'demote_officer': rolled_back(as_owner, 'demote_officer', officers[-1]),
+            'transfer_ownership': rolled_back(as_owner, 'transfer_ownership', officers[-1]),
+        }
+
+    def report(self, results):
+        columns = ('requests', 'p50_ms', 'p95_ms', 'p99_ms', 'queries', 'peak_memory_kib')
+        for size, dataset in results['datasets'].items():
+            self.stdout.write(f'\n{dataset["users"]} users ({size})')
+            self.stdout.write(f'{"view":<20}' + ''.join(f'{column:>16}' for column in columns))
+            for name, view in dataset['views'].items():
+                self.stdout.write(f'{name:<20}' + ''.join(f'{view[column]:>16}' for column in columns))
@@ -0,0 +1,155 @@
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from clubs import workers
+from clubs.loadtest import SCENARIOS
+from clubs.sqlite import pragma_statements
+from .benchmark import seed_database, sqlite_database
+
+'''
+SQLite's own defaults. WAL journaling is stored in the database file, so
+the defaults turn it back off rather than leave it as the last run set it.
+'''
+DEFAULT_PRAGMAS = {'journal_mode': 'delete'}
+'''Seconds a connection waits for a lock, the sqlite3 module's default and so Django's'''
+CONNECT_TIMEOUT = 5
+
+"""
+Hammer the database at path until deadline, as one gunicorn worker would:
+writers update a user in a transaction of its own, readers read a page
+of the member list. Return (writer, operations, locked errors).
+"""
+def contend(path, pragmas, worker, deadline):
+    connection = sqlite3.connect(path, timeout=CONNECT_TIMEOUT, isolation_level=None)
+    for statement in pragma_statements(pragmas):
+        connection.execute(statement)
+    rng = random.Random(worker)
+    user_ids = [row[0] for row in connection.execute('SELECT id FROM clubs_user LIMIT 1000')]
+    members = connection.execute('SELECT COUNT(*) FROM clubs_user WHERE user_type = 1').fetchone()[0]
+    writer = worker % 2 == 0
+    operations = locked = 0
+    while time.time() < deadline:
+        try:
+            if writer:
+                connection.execute('BEGIN')
+                connection.execute("UPDATE clubs_user SET updated_at = datetime('now') WHERE id = ?",
+                                   (rng.choice(user_ids),))
+                connection.execute('COMMIT')
+            else:
+                connection.execute(
+                    'SELECT id, username, first_name, last_name, email_hash FROM clubs_user '
+                    'WHERE user_type = 1 ORDER BY username LIMIT 10 OFFSET ?',
+                    (rng.randrange(max(members, 1)),),
+                ).fetchall()
+            operations += 1
+        except sqlite3.OperationalError as error:
+            if connection.in_transaction:
+                connection.execute('ROLLBACK')
+            if 'locked' not in str(error):
+                raise
+            locked += 1
+    connection.close()
+    return writer, operations, locked
+
+"""Wait for every worker to have started, then contend for the given number of seconds"""
+def _contend(args):
+    path, pragmas, worker, duration, start = args
+    start.wait()
+    return contend(path, pragmas, worker, time.time() + duration)
+
+class Command(BaseCommand):
+    help = ('Compares SQLite with its default pragmas against TUNED_SQLITE_PRAGMAS: worker processes '
+            'write and read a seeded database at once, and optionally the load test is run under both')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=6,
+                            help='Processes using the database at once, half writing and half reading')
+        parser.add_argument('--start-method', choices=workers.START_METHODS,
+                            help="How worker processes are started, defaults to the platform's")
+        parser.add_argument('--duration', type=float, default=5.0, help='Seconds each run lasts')
+        parser.add_argument('--users', type=int, default=1000, help='Users in the seeded database')
+        parser.add_argument('--data-dir', default=os.path.join(settings.BASE_DIR, 'benchmark'),
+                            help='Where the seeded database is kept between runs')
+        parser.add_argument('--load-test', action='store_true',
+                            help='Also run the load test against the live server under both')
+        parser.add_argument('--scenario', choices=list(SCENARIOS), default='intake_day')
+        parser.add_argument('--clients', type=int, default=10, help='Load test clients')
+
+    def handle(self, *args, **options):
+        if options['workers'] < 2 or options['duration'] <= 0:
+            raise CommandError('--workers must be at least 2 and --duration positive')
+        os.makedirs(options['data_dir'], exist_ok=True)
+        seeded = os.path.join(options['data_dir'], f'benchmark-{options["users"]}.sqlite3')
+        with sqlite_database(seeded):
+            seed_database(options['users'])
+        profiles = {'defaults': DEFAULT_PRAGMAS, 'tuned': settings.TUNED_SQLITE_PRAGMAS}
+        results = {name: self.contention(seeded, pragmas, options) for name, pragmas in profiles.items()}
+        self.report(results)
+        if options['load_test']:
+            self.load_test(profiles, options)
+
+    """Return the operations per second and locked errors of workers sharing a copy of the database"""
+    def contention(self, seeded, pragmas, options):
+        with tempfile.TemporaryDirectory(dir=options['data_dir']) as directory:
+            path = os.path.join(directory, 'contention.sqlite3')
+            shutil.copyfile(seeded, path)
+            # Switching journal mode needs the database to itself, so it is done before the workers start
+            connection = sqlite3.connect(path)
+            for statement in pragma_statements(pragmas):
+                connection.execute(statement)
+            connection.close()
+            context = multiprocessing.get_context(options['start_method'])
+            # Spawned workers take a while to set Django up, so the run starts once they all have
+            with context.Manager() as manager, \
+                    context.Pool(options['workers'], initializer=workers.init_worker, initargs=(__name__,)) as pool:
+                start = manager.Barrier(options['workers'])
+                outcomes = pool.map(_contend, [
+                    (path, pragmas, worker, options['duration'], start) for worker in range(options['workers'])
+                ], chunksize=1)
+        seconds = options['duration']
+        return {
+            'writes_per_second': round(sum(ops for writer, ops, _ in outcomes if writer) / seconds, 1),
+            'reads_per_second': round(sum(ops for writer, ops, _ in outcomes if not writer) / seconds, 1),
+            'database_locked': sum(locked for _, _, locked in outcomes),
+        }
+
+    def report(self, results):
+        columns = ('writes_per_second', 'reads_per_second', 'database_locked')
+        self.stdout.write(f'{"pragmas":<10}' + ''.join(f'{column:>20}' for column in columns))
+        for name, result in results.items():
+            self.stdout.write(f'{name:<10}' + ''.join(f'{result[column]:>20}' for column in columns))
+        defaults, tuned = results['defaults'], results['tuned']
+        if defaults['writes_per_second'] and defaults['reads_per_second']:
+            self.stdout.write(
+                f'Tuned pragmas: {tuned["writes_per_second"] / defaults["writes_per_second"]:.2f} times the writes '
+                f'and {tuned["reads_per_second"] / defaults["reads_per_second"]:.2f} times the reads per second.'
+            )
+
+    def load_test(self, profiles, options):
+        throughput = {}
+        with tempfile.TemporaryDirectory() as directory:
+            for name, pragmas in profiles.items():
+                self.stdout.write(f'\nLoad test with SQLite {name}: {pragmas}')
+                output = os.path.join(directory, f'{name}.json')
+                with override_settings(SQLITE_PRAGMAS=pragmas):
+                    call_command(
+                        'loadtest', scenario=options['scenario'], clients=options['clients'],
+                        duration=options['duration'], users=options['users'], data_dir=options['data_dir'],
+                        output=output, stdout=self.stdout, stderr=self.stderr,
+                    )
+                with open(output) as result:
+                    throughput[name] = json.load(result)['requests_per_second']
+        self.stdout.write(
+            f'\nLoad test: {throughput["defaults"]} requests/s with the defaults, {throughput["tuned"]} tuned.'
+        )
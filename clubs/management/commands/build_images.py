@@ -0,0 +1,49 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from clubs.images import RESPONSIVE_IMAGES, VARIANT_FORMATS, variant_path
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+class Command(BaseCommand):
+    help = 'Writes the resized WebP and JPEG variants of the responsive static images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Rebuild variants that are up to date')
+
+    def handle(self, *args, **options):
+        if Image is None:
+            raise CommandError('Pillow is needed to build image variants, install the requirements first')
+
+        static_dir = settings.STATICFILES_DIRS[0]
+        for path, (size, widths) in RESPONSIVE_IMAGES.items():
+            source = os.path.join(static_dir, path)
+            with Image.open(source) as image:
+                # The sizes attribute of the picture is worked out from the declared size
+                if image.size != size:
+                    raise CommandError(f'{path} is {image.width}x{image.height}, update its size in RESPONSIVE_IMAGES')
+                image = image.convert('RGB')
+                for width in widths:
+                    self.build_variants(image, path, source, width, static_dir, options['force'])
+
+    def build_variants(self, image, path, source, width, static_dir, force):
+        resized = None
+        for extension, _, quality in VARIANT_FORMATS:
+            destination = os.path.join(static_dir, variant_path(path, width, extension))
+            if not force and os.path.exists(destination) and os.path.getmtime(destination) >= os.path.getmtime(source):
+                continue
+            if resized is None:
+                # Never scale up, the largest variant is at most the source size
+                scale = min(width, image.width) / image.width
+                resized = image.resize((round(image.width * scale), round(image.height * scale)), Image.LANCZOS)
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            if extension == 'webp':
+                resized.save(destination, 'WEBP', quality=quality, method=6)
+            else:
+                resized.save(destination, 'JPEG', quality=quality, optimize=True, progressive=True)
+            self.stdout.write(f'Wrote {destination} ({os.path.getsize(destination)} bytes)')
@@ -0,0 +1,46 @@
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+class Command(BaseCommand):
+    help = ('Deletes expired database sessions a small batch at a time, '
+            'so requests are never locked out for long')
+
+    BATCH_SIZE = 500
+    SLEEP = 0.1
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=self.BATCH_SIZE,
+                            help='Sessions deleted per transaction')
+        parser.add_argument('--sleep', type=float, default=self.SLEEP,
+                            help='Seconds to wait between batches')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1 or options['sleep'] < 0:
+            raise CommandError('--batch-size must be at least 1 and --sleep not negative')
+        store = import_module(settings.SESSION_ENGINE).SessionStore
+        if not hasattr(store, 'get_model_class'):
+            raise CommandError(f'{settings.SESSION_ENGINE} does not keep sessions in the database, use clearsessions')
+        sessions = store.get_model_class().objects
+
+        # Sessions expiring while this runs are left for the next run
+        now = timezone.now()
+        deleted = 0
+        while True:
+            with transaction.atomic():
+                keys = list(
+                    sessions.filter(expire_date__lt=now)
+                    .values_list('session_key', flat=True)[:options['batch_size']]
+                )
+                if keys:
+                    sessions.filter(session_key__in=keys).delete()
+            deleted += len(keys)
+            if len(keys) < options['batch_size']:
+                break
+            self.stdout.write(f'Deleted {deleted} expired sessions.', ending='\r')
+            time.sleep(options['sleep'])
+        self.stdout.write(f'Deleted {deleted} expired sessions.')
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from clubs import exports
+
+class Command(BaseCommand):
+    help = 'Streams users of the chosen roles to stdout or a file as CSV or JSON lines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--role', action='append', choices=list(exports.ROLE_NAMES),
+                            help='Role to export, may be repeated. Defaults to every role')
+        parser.add_argument('--format', choices=list(exports.FORMATS), default='csv')
+        parser.add_argument('--output', help='File to write to, defaults to stdout')
+        parser.add_argument('--chunk-size', type=int, default=exports.CHUNK_SIZE,
+                            help='Users read per query')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1')
+        roles = options['role'] or list(exports.ROLE_NAMES)
+        user_types = [exports.ROLE_NAMES[role] for role in roles]
+        chunks = exports.export_users(user_types, options['format'], options['chunk_size'])
+        if options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as output:
+                output.writelines(chunks)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
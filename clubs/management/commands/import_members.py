@@ -0,0 +1,169 @@
+import csv
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from clubs.forms import ImportMemberForm
+from clubs.models import User, UserType, ApplicationStatus, UserListWatermark
+from clubs import avatars, caching, search, workers
+
+IMPORTED_FIELDS = ImportMemberForm.Meta.fields
+'''Roles an import never changes, as it would reset their passwords'''
+PROTECTED_ROLES = (UserType.OFFICER, UserType.OWNER)
+
+"""
+Streams rows from a CSV file with a header line, or from a JSON lines file.
+Yields (row, error) pairs one line at a time, error being None for rows
+that could be parsed.
+"""
+def read_rows(path, file_format):
+    with open(path, newline='', encoding='utf-8') as source:
+        if file_format == 'csv':
+            for row in csv.DictReader(source):
+                # DictReader keeps the fields past the header under None
+                if None in row:
+                    yield row, 'Row has more fields than the header'
+                    continue
+                yield row, None
+        else:
+            for line in source:
+                if not line.strip():
+                    yield None, 'Blank line'
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as error:
+                    yield None, f'Invalid JSON: {error}'
+                    continue
+                if not isinstance(row, dict):
+                    yield None, 'Each line must be a JSON object'
+                    continue
+                yield row, None
+
+class Command(BaseCommand):
+    help = 'Imports members from a CSV or JSON lines file, optionally updating existing applicants and members'
+
+    BATCH_SIZE = 500
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['csv', 'jsonl'],
+                            help='Defaults to the file extension')
+        parser.add_argument('--batch-size', type=int, default=self.BATCH_SIZE,
+                            help='Rows written per transaction')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Processes hashing passwords')
+        parser.add_argument('--start-method', choices=workers.START_METHODS,
+                            help="How worker processes are started, defaults to the platform's")
+        parser.add_argument('--rejects', help='Where rejected rows are written, defaults to <path>.rejects.jsonl')
+        parser.add_argument('--update-existing', action='store_true',
+                            help='Update applicants and members whose username is already taken, '
+                                 'instead of rejecting their rows')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f'{path} does not exist')
+        file_format = options['format'] or ('csv' if path.endswith('.csv') else 'jsonl')
+        if options['batch_size'] < 1 or options['workers'] < 1:
+            raise CommandError('--batch-size and --workers must be at least 1')
+        rejects_path = options['rejects'] or f'{path}.rejects.jsonl'
+
+        self.update_existing = options['update_existing']
+        self.created = self.updated = self.rejected = 0
+        rows = enumerate(read_rows(path, file_format), start=2 if file_format == 'csv' else 1)
+        with open(rejects_path, 'w', encoding='utf-8') as rejects:
+            self.rejects = rejects
+            if options['workers'] > 1:
+                context = multiprocessing.get_context(options['start_method'])
+                with ProcessPoolExecutor(options['workers'], mp_context=context, initializer=workers.init_worker) as pool:
+                    self.import_rows(rows, options['batch_size'], lambda passwords: pool.map(make_password, passwords, chunksize=32))
+            else:
+                self.import_rows(rows, options['batch_size'], lambda passwords: map(make_password, passwords))
+
+        self.stdout.write('')
+        self.stdout.write(f'Created {self.created}, updated {self.updated}, rejected {self.rejected}.')
+        if self.rejected:
+            self.stdout.write(f'Rejected rows were written to {rejects_path}')
+
+    def import_rows(self, rows, batch_size, hash_passwords):
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            self.import_batch(batch, hash_passwords)
+            self.stdout.write(f'Imported {self.created + self.updated} members, rejected {self.rejected}.', ending='\r')
+
+    """
+    Validates a batch of rows, hashes their passwords (in the process pool
+    when there is one) and upserts them on username in a single transaction.
+    Existing users are only updated with --update-existing, and officers and
+    the owner never are.
+    """
+    def import_batch(self, batch, hash_passwords):
+        valid = {}
+        for line, (row, error) in batch:
+            if error:
+                self.reject(line, row, {'__all__': [error]})
+                continue
+            data = {key: (value if value is not None else '') for key, value in row.items()}
+            data.setdefault('password_confirm', data.get('password'))
+            form = ImportMemberForm(data)
+            if not form.is_valid():
+                self.reject(line, row, form.errors.get_json_data())
+                continue
+            # A username repeated within a batch keeps its last row
+            valid[form.cleaned_data['username']] = (line, row, form.cleaned_data)
+        if not valid:
+            return
+
+        passwords = list(hash_passwords([data['password'] for _, _, data in valid.values()]))
+        with transaction.atomic():
+            existing = User.objects.filter(username__in=valid).in_bulk(field_name='username')
+            taken_emails = dict(
+                User.objects.filter(email__in=[data['email'] for _, _, data in valid.values()])
+                .values_list('email', 'username')
+            )
+            new_users, updated_users, batch_emails = [], [], set()
+            for (username, (line, row, data)), password in zip(list(valid.items()), passwords):
+                user = existing.get(username)
+                if user is not None and (not self.update_existing or user.user_type in PROTECTED_ROLES):
+                    reason = ('Officers and the owner cannot be updated by an import.'
+                              if user.user_type in PROTECTED_ROLES else
+                              'This username is already taken, use --update-existing to update it.')
+                    self.reject(line, row, {'username': [reason]})
+                    del valid[username]
+                    continue
+                owner = taken_emails.get(data['email'], username)
+                if owner != username or data['email'] in batch_emails:
+                    self.reject(line, row, {'email': ['Another member already uses this email.']})
+                    del valid[username]
+                    continue
+                batch_emails.add(data['email'])
+                user = user or User(user_type=UserType.MEMBER, application_status=ApplicationStatus.ACCEPTED)
+                for field in IMPORTED_FIELDS:
+                    setattr(user, field, data[field])
+                user.password = password
+                user.email_hash = avatars.email_hash(user.email)
+                user.updated_at = timezone.now()
+                (updated_users if user.pk else new_users).append(user)
+
+            User.objects.bulk_update(updated_users, IMPORTED_FIELDS + ['password', 'email_hash', 'updated_at'])
+            caching.invalidate_users(user.pk for user in updated_users)
+            User.objects.bulk_create(new_users)
+            search.index_users(list(User.objects.filter(username__in=valid)))
+            UserListWatermark.touch({UserType.MEMBER} | {user.user_type for user in updated_users})
+        self.created += len(new_users)
+        self.updated += len(updated_users)
+
+    def reject(self, line, row, errors):
+        self.rejected += 1
+        row = {key: value for key, value in (row or {}).items() if key is not None and 'password' not in key}
+        self.rejects.write(json.dumps({'line': line, 'row': row, 'errors': errors}) + '\n')
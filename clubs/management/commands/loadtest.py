@@ -0,0 +1,254 @@
+import json
+import logging
+import os
+import shutil
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+
+from django.conf import settings
+from django.contrib.staticfiles.handlers import StaticFilesHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.core.signals import got_request_exception
+from django.db import OperationalError, connections
+from django.test.testcases import LiveServerThread
+
+from clubs.loadtest import NO_RESPONSE, SCENARIOS, run_client
+from clubs.models import User, UserType, ApplicationStatus
+from .benchmark import isolated_caches, percentile, seed_database, sqlite_database
+
+'''Loggers silenced while the load runs, they would log every failed request'''
+QUIET_LOGGERS = ('django.request', 'django.server', 'clubs.queries')
+
+"""
+Return the invariants the current database breaks, by name, with how
+many users break each.
+"""
+def invariant_violations():
+    users = User.objects.all()
+    checks = {
+        'owners other than exactly one': abs(users.filter(user_type=UserType.OWNER).count() - 1),
+        'accepted users still applicants': users.filter(
+            user_type=UserType.APPLICANT, application_status=ApplicationStatus.ACCEPTED).count(),
+        'rejected users no longer applicants': users.exclude(
+            user_type=UserType.APPLICANT).filter(application_status=ApplicationStatus.REJECTED).count(),
+    }
+    return {name: count for name, count in checks.items() if count}
+
+"""Checks the invariants every interval seconds in a thread of its own until stopped"""
+class InvariantMonitor(threading.Thread):
+    def __init__(self, interval):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.checks = 0
+        self.violations = Counter()
+        self.locked = 0
+
+    def run(self):
+        try:
+            while not self.stopped.wait(self.interval):
+                self.check()
+        finally:
+            connections.close_all()
+
+    def check(self):
+        try:
+            violations = invariant_violations()
+        except OperationalError:
+            self.locked += 1
+            return
+        self.checks += 1
+        self.violations.update(violations.keys())
+
+"""Counts the requests the server failed, and how many of those found the database locked"""
+class ServerErrors:
+    def __init__(self):
+        self.errors = 0
+        self.locked = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, sender, **kwargs):
+        error = sys.exc_info()[1]
+        with self._lock:
+            self.errors += 1
+            if isinstance(error, OperationalError) and 'locked' in str(error):
+                self.locked += 1
+
+@contextmanager
+def _quiet_loggers():
+    loggers = [logging.getLogger(name) for name in QUIET_LOGGERS]
+    states = [logger.disabled for logger in loggers]
+    for logger in loggers:
+        logger.disabled = True
+    try:
+        yield
+    finally:
+        for logger, state in zip(loggers, states):
+            logger.disabled = state
+
+class Command(BaseCommand):
+    help = ('Serves the site on a local live server and drives it from many concurrent clients, '
+            'reporting throughput, errors, locked database errors and broken invariants')
+
+    CLIENTS = 10
+    DURATION = 10.0
+    USERS = 1000
+    CHECK_INTERVAL = 0.05
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenario', choices=list(SCENARIOS), default='intake_day')
+        parser.add_argument('--clients', type=int, default=self.CLIENTS, help='Concurrent clients')
+        parser.add_argument('--processes', action='store_true',
+                            help='Run clients in processes of their own rather than threads of the server')
+        parser.add_argument('--duration', type=float, default=self.DURATION, help='Seconds to run for')
+        parser.add_argument('--users', type=int, default=self.USERS,
+                            help='Users seeded before the run, in a copy that is thrown away after it')
+        parser.add_argument('--data-dir', default=os.path.join(settings.BASE_DIR, 'benchmark'),
+                            help='Where the seeded database is kept between runs')
+        parser.add_argument('--use-current-database', action='store_true',
+                            help='Run against the configured database, which the run changes')
+        parser.add_argument('--check-interval', type=float, default=self.CHECK_INTERVAL,
+                            help='Seconds between invariant checks during the run')
+        parser.add_argument('--output', help='JSON file to write the results to')
+
+    def handle(self, *args, **options):
+        if options['clients'] < 1 or options['duration'] <= 0 or options['check_interval'] <= 0:
+            raise CommandError('--clients, --duration and --check-interval must be positive')
+        if options['use_current_database']:
+            database = nullcontext()
+        else:
+            database = self.scratch_database(options['users'], options['data_dir'])
+        with database, isolated_caches(), _quiet_loggers():
+            results = self.run(options)
+        self.report(results)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(results, output, indent=2)
+        if results['invariant_violations']:
+            raise CommandError(f'{sum(results["invariant_violations"].values())} invariant violations')
+
+    """Seeds, or reuses, the database of size users and runs against a throwaway copy of it"""
+    @contextmanager
+    def scratch_database(self, size, data_dir):
+        os.makedirs(data_dir, exist_ok=True)
+        seeded = os.path.join(data_dir, f'benchmark-{size}.sqlite3')
+        with sqlite_database(seeded):
+            seed_database(size)
+        scratch = os.path.join(data_dir, f'loadtest-{os.getpid()}.sqlite3')
+        shutil.copyfile(seeded, scratch)
+        try:
+            with sqlite_database(scratch):
+                yield
+        finally:
+            os.remove(scratch)
+
+    """Return who the clients log in as and which users they act on"""
+    def plan(self):
+        users = User.objects.order_by('pk')
+        owner = users.filter(user_type=UserType.OWNER).values_list('pk', 'username').first()
+        officers = list(users.filter(user_type=UserType.OFFICER).values_list('pk', 'username')[:20])
+        members = list(users.filter(user_type=UserType.MEMBER).values_list('username', flat=True)[:200])
+        applicant_ids = list(users.filter(
+            user_type=UserType.APPLICANT, application_status=ApplicationStatus.PENDING
+        ).values_list('pk', flat=True)[:500])
+        if owner is None or len(officers) < 2 or not members or not applicant_ids:
+            raise CommandError('The database needs an owner, two officers, a member and a pending applicant')
+        next_in_line = [owner, *officers[:2]]
+        return {
+            'run': f'lt{int(time.time()) % 100000}',
+            'owners': [username for _, username in next_in_line],
+            'owner_ids': [pk for pk, _ in next_in_line],
+            'officers': [username for _, username in officers[2:] or officers],
+            'members': members,
+            'applicant_ids': applicant_ids,
+        }
+
+    def run(self, options):
+        plan = self.plan()
+        users_before = User.objects.count()
+        server = LiveServerThread('localhost', StaticFilesHandler)
+        server.daemon = True
+        server.start()
+        server.is_ready.wait()
+        if server.error:
+            raise CommandError(f'The live server did not start: {server.error}')
+        base_url = f'http://localhost:{server.port}'
+        errors = ServerErrors()
+        got_request_exception.connect(errors)
+        monitor = InvariantMonitor(options['check_interval'])
+        monitor.start()
+        clients = options['clients']
+        executor = ProcessPoolExecutor if options['processes'] else ThreadPoolExecutor
+        self.stdout.write(f'Running {options["scenario"]} with {clients} clients for {options["duration"]}s.')
+        try:
+            start = time.time()
+            deadline = start + options['duration']
+            with executor(max_workers=clients) as pool:
+                futures = [pool.submit(run_client, options['scenario'], index, base_url, plan, deadline)
+                           for index in range(clients)]
+                records = [record for future in futures for record in future.result()]
+            elapsed = time.time() - start
+        finally:
+            monitor.stopped.set()
+            monitor.join()
+            got_request_exception.disconnect(errors)
+            server.terminate()
+            server.join()
+        monitor.check()
+        return self.summary(options, records, elapsed, errors, monitor, users_before)
+
+    def summary(self, options, records, elapsed, errors, monitor, users_before):
+        by_step = defaultdict(list)
+        for step, status, seconds in records:
+            by_step[step].append((status, seconds))
+        steps = {}
+        for step, results in sorted(by_step.items()):
+            latencies = [seconds * 1000 for _, seconds in results]
+            steps[step] = {
+                'requests': len(results),
+                'errors': sum(1 for status, _ in results if status >= 500 or status == NO_RESPONSE),
+                'statuses': dict(Counter(str(status) for status, _ in results)),
+                'p50_ms': round(percentile(latencies, 50), 2),
+                'p95_ms': round(percentile(latencies, 95), 2),
+            }
+        return {
+            'scenario': options['scenario'],
+            'clients': options['clients'],
+            'processes': options['processes'],
+            'seconds': round(elapsed, 2),
+            'users_before': users_before,
+            'users_after': User.objects.count(),
+            'requests': len(records),
+            'requests_per_second': round(len(records) / elapsed, 2),
+            'errors': sum(step['errors'] for step in steps.values()),
+            'server_errors': errors.errors,
+            'database_locked': errors.locked,
+            'invariant_checks': monitor.checks,
+            'invariant_checks_locked': monitor.locked,
+            'invariant_violations': dict(monitor.violations),
+            'steps': steps,
+        }
+
+    def report(self, results):
+        self.stdout.write(
+            f'\n{results["requests"]} requests in {results["seconds"]}s, '
+            f'{results["requests_per_second"]} requests/s, '
+            f'{results["users_before"]} users before and {results["users_after"]} after'
+        )
+        columns = ('requests', 'errors', 'p50_ms', 'p95_ms')
+        self.stdout.write(f'{"step":<20}' + ''.join(f'{column:>12}' for column in columns) + '  statuses')
+        for step, summary in results['steps'].items():
+            statuses = ' '.join(f'{status}:{count}' for status, count in sorted(summary['statuses'].items()))
+            self.stdout.write(f'{step:<20}' + ''.join(f'{summary[column]:>12}' for column in columns) + f'  {statuses}')
+        self.stdout.write(
+            f'Errors: {results["errors"]} ({results["server_errors"]} raised by the server, '
+            f'{results["database_locked"]} with the database locked)'
+        )
+        self.stdout.write(f'Invariants checked {results["invariant_checks"]} times, '
+                          f'{results["invariant_checks_locked"]} checks found the database locked')
+        for name, count in results['invariant_violations'].items():
+            self.stderr.write(f'Violated: {name}, in {count} checks')
@@ -0,0 +1,84 @@
+import copy
+import io
+import pstats
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client, override_settings
+from django.urls import Resolver404, resolve
+
+from clubs import profiling
+from clubs.models import User
+
+class Command(BaseCommand):
+    help = ('Requests a url under cProfile and writes a .prof file and collapsed stacks for '
+            'flamegraph tools. Changes made by the request are rolled back')
+
+    LIMIT = 25
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', help='Path to request, with its query string, e.g. /view_members/?page=2')
+        parser.add_argument('--user', help='Username to log in as')
+        parser.add_argument('--method', choices=['get', 'post'], default='get')
+        parser.add_argument('--data', action='append', default=[], metavar='FIELD=VALUE',
+                            help='Form field to post, may be repeated')
+        parser.add_argument('--warmup', type=int, default=1,
+                            help='Requests made before profiling, to fill caches')
+        parser.add_argument('--repeat', type=int, default=1, help='Requests profiled together')
+        parser.add_argument('--output', help='Path, without extension, to write the profile to. '
+                                             'Defaults to a timestamped name in PROFILING_DIR')
+        parser.add_argument('--sort', default='cumulative', help='pstats sort key of the summary')
+        parser.add_argument('--limit', type=int, default=self.LIMIT, help='Functions listed in the summary')
+
+    def handle(self, *args, **options):
+        if options['warmup'] < 0 or options['repeat'] < 1:
+            raise CommandError('--warmup must not be negative and --repeat must be at least 1')
+        path = urlsplit(options['url']).path
+        try:
+            url_name = resolve(path).url_name
+        except Resolver404:
+            raise CommandError(f'{path} is not a url of this site')
+        data = dict(self.field(pair) for pair in options['data'])
+
+        client = Client()
+        if options['user']:
+            try:
+                client.force_login(User.objects.get(username=options['user']))
+            except User.DoesNotExist:
+                raise CommandError(f'There is no user {options["user"]}')
+        request = getattr(client, options['method'])
+
+        # Every request is rolled back and its cookies forgotten, so each one
+        # starts from the same database and session
+        def requests(count):
+            for _ in range(count):
+                cookies = copy.deepcopy(client.cookies)
+                with transaction.atomic():
+                    response = request(options['url'], data) if data else request(options['url'])
+                    transaction.set_rollback(True)
+                client.cookies = cookies
+                if response.status_code >= 400:
+                    raise CommandError(f'{options["url"]} answered {response.status_code}')
+            return response
+
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            requests(options['warmup'])
+            profiler, response = profiling.profile_call(requests, options['repeat'])
+
+        prof_path, collapsed_path = profiling.write_profile(
+            profiler, options['output'] or profiling.profile_base(url_name)
+        )
+        summary = io.StringIO()
+        pstats.Stats(profiler, stream=summary).sort_stats(options['sort']).print_stats(options['limit'])
+        self.stdout.write(summary.getvalue())
+        self.stdout.write(f'{options["url"]} answered {response.status_code}.')
+        self.stdout.write(f'Profile written to {prof_path}')
+        self.stdout.write(f'Collapsed stacks written to {collapsed_path}')
+
+    def field(self, pair):
+        name, separator, value = pair.partition('=')
+        if not separator:
+            raise CommandError(f'--data {pair} is not FIELD=VALUE')
+        return name, value
@@ -1,147 +1,170 @@
+import multiprocessing
+import os
+import re
+
+from django.contrib.auth.hashers import make_password
 from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 
 from faker import Faker
 
-from clubs.models import User
+from clubs.models import User, UserType, ApplicationStatus, UserListWatermark
+from clubs import avatars, search, workers
+
+# List of potential experience levels
+EXPERIENCE_LEVELS = [
+    'BEGINNER',
+    'INTERMEDIATE',
+    'ADVANCED'
+]
+
+# Seeded usernames start with _<letter><index>_ so a run can tell how far it got
+ROLE_LETTERS = {
+    UserType.APPLICANT: 'a',
+    UserType.MEMBER: 'm',
+    UserType.OFFICER: 'o',
+}
+
+_faker = None
+
+def _init_faker():
+    global _faker
+    _faker = Faker('en_GB')
+
+"""
+Generates the fields of users start..stop of a role.
+Faker is seeded per batch, so the same batch always produces the same
+users whichever process generates it.
+"""
+def generate_batch(user_type, start, stop):
+    if _faker is None:
+        _init_faker()
+    _faker.seed_instance(f'{user_type}-{start}')
+    prefix = seeded_prefix(user_type)
+    users = []
+    for index in range(start, stop):
+        base = re.sub(r'\W', '', _faker.user_name())
+        username = f'{prefix}{index}_{base}'[:30]
+        users.append({
+            'username': username,
+            'first_name': _faker.first_name(),
+            'last_name': _faker.last_name(),
+            'email': f'{username.lower()}@example.org',
+            'bio': _faker.word(),
+            'personal_statement': _faker.word(),
+            'experience_level': _faker.word(ext_word_list=EXPERIENCE_LEVELS),
+            'user_type': user_type,
+        })
+    return users
+
+def _generate_batch(args):
+    return generate_batch(*args)
+
+def seeded_prefix(user_type):
+    return f'_{ROLE_LETTERS[user_type]}'
 
 class Command(BaseCommand):
+    help = 'Seeds the database with applicants, members and officers'
+
     APPLICANT_COUNT = 20
     MEMBER_COUNT = 80
     OFFICER_COUNT = 20
     DEFAULT_PASSWORD = 'Password123'
-
-    def __init__(self):
-        super().__init__()
-        self.faker = Faker('en_GB')
-
-        # List of existing user types: APPLICANT, MEMBER, OFFICER, OWNER
-
-        # List of potential experience levels
-        self.experience_levels = [
-            'BEGINNER',
-            'INTERMEDIATE',
-            'ADVANCED'
-        ]
+    BATCH_SIZE = 1000
+
+    def add_arguments(self, parser):
+        parser.add_argument('--applicants', type=int, default=self.APPLICANT_COUNT)
+        parser.add_argument('--members', type=int, default=self.MEMBER_COUNT)
+        parser.add_argument('--officers', type=int, default=self.OFFICER_COUNT)
+        parser.add_argument('--batch-size', type=int, default=self.BATCH_SIZE,
+                            help='Users inserted per transaction')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Processes generating fake user data')
+        parser.add_argument('--start-method', choices=workers.START_METHODS,
+                            help="How worker processes are started, defaults to the platform's")
 
     def handle(self, *args, **options):
-        self.create_specific_users()
-        self.create_applicants()
-        self.create_members()
-        self.create_officers()
-
-    # creates multiple applicants based on APPLICANT_COUNT
-    def create_applicants(self):
-        applicant_count = 0
-
-        while applicant_count < self.APPLICANT_COUNT:
-            print(f'Seeding applicant {applicant_count+1}/{self.APPLICANT_COUNT}.', end = '\r')
-            self.create_applicant()
-            applicant_count += 1
-
-        print('Applicants successfully seeded.')
-
-    # creates a single applicant
-    def create_applicant(self):
-        User.objects.create_user(
-            username = self.faker.unique.user_name(),
-            first_name = self.faker.first_name(),
-            last_name = self.faker.last_name(),
-            email = self.faker.unique.safe_email(),
-            bio = self.faker.word(),
-            personal_statement = self.faker.word(),
-            experience_level = self.faker.word(ext_word_list=self.experience_levels),
-            user_type = 'APPLICANT',
-            password = Command.DEFAULT_PASSWORD,
-            application_status = 'PENDING'
-        )
-
-    # creates multiple members based on MEMBER_COUNT
-    def create_members(self):
-        member_count = 0
-
-        while member_count < self.MEMBER_COUNT:
-            print(f'Seeding member {member_count+1}/{self.MEMBER_COUNT}.', end = '\r')
-            self.create_member()
-            member_count += 1
-
-        print('Members successfully seeded.')
-
-    # creates a single member
-    def create_member(self):
-        User.objects.create_user(
-            username = self.faker.unique.user_name(),
-            first_name = self.faker.first_name(),
-            last_name = self.faker.last_name(),
-            email = self.faker.unique.safe_email(),
-            bio = self.faker.word(),
-            personal_statement = self.faker.word(),
-            experience_level = self.faker.word(ext_word_list=self.experience_levels),
-            user_type = 'MEMBER',
-            password = Command.DEFAULT_PASSWORD
-        )
+        if options['batch_size'] < 1 or options['workers'] < 1:
+            raise CommandError('--batch-size and --workers must be at least 1')
+        self.batch_size = options['batch_size']
+        self.workers = options['workers']
+        self.start_method = options['start_method']
+        # PBKDF2 is run once, every seeded user shares the resulting hash
+        self.password = make_password(self.DEFAULT_PASSWORD)
 
-    # creates multiple officers based on OFFICER_COUNT
-    def create_officers(self):
-        officer_count = 0
-
-        while officer_count < self.OFFICER_COUNT:
-            print(f'Seeding officer {officer_count+1}/{self.OFFICER_COUNT}.', end = '\r')
-            self.create_officer()
-            officer_count += 1
-
-        print('Officers successfully seeded.')
-
-    # creates a single officer
-    def create_officer(self):
-        User.objects.create_user(
-            username = self.faker.unique.user_name(),
-            first_name = self.faker.first_name(),
-            last_name = self.faker.last_name(),
-            email = self.faker.unique.safe_email(),
-            bio = self.faker.word(),
-            personal_statement = self.faker.word(),
-            experience_level = self.faker.word(ext_word_list=self.experience_levels),
-            user_type = 'OFFICER',
-            password = Command.DEFAULT_PASSWORD
+        self.create_specific_users()
+        self.create_users(UserType.APPLICANT, options['applicants'])
+        self.create_users(UserType.MEMBER, options['members'])
+        self.create_users(UserType.OFFICER, options['officers'])
+
+        self.stdout.write('Rebuilding the search index.')
+        search.rebuild_index()
+        UserListWatermark.touch(UserType)
+
+    """
+    Creates count users of a role in batches, each in its own transaction.
+    Users seeded by an earlier, interrupted run are counted and skipped.
+    """
+    def create_users(self, user_type, count):
+        label = user_type.label.lower()
+        start = self.seeded_count(user_type)
+        if start >= count:
+            self.stdout.write(f'{count} {label}s already seeded.')
+            return
+        batches = [
+            (user_type, batch_start, min(batch_start + self.batch_size, count))
+            for batch_start in range(start, count, self.batch_size)
+        ]
+        if self.workers > 1:
+            context = multiprocessing.get_context(self.start_method)
+            with context.Pool(self.workers, initializer=workers.init_worker, initargs=(__name__,)) as pool:
+                self.insert_batches(pool.imap(_generate_batch, batches), label, start, count)
+        else:
+            self.insert_batches(map(_generate_batch, batches), label, start, count)
+        self.stdout.write(f'{label.capitalize()}s successfully seeded.')
+
+    def insert_batches(self, batches, label, seeded, count):
+        for fields in batches:
+            users = [self.build_user(**user_fields) for user_fields in fields]
+            with transaction.atomic():
+                User.objects.bulk_create(users, ignore_conflicts=True)
+            seeded += len(users)
+            self.stdout.write(f'Seeding {label} {seeded}/{count}.', ending='\r')
+        self.stdout.write('')
+
+    # A range on the (user_type, username) index, rather than a scan of every username
+    def seeded_count(self, user_type):
+        prefix = seeded_prefix(user_type)
+        after = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        return User.objects.filter(user_type=user_type, username__gte=prefix, username__lt=after).count()
+
+    def build_user(self, **fields):
+        return User(
+            password=self.password,
+            email_hash=avatars.email_hash(fields['email']),
+            application_status=ApplicationStatus.PENDING,
+            **fields
         )
 
     # creates the users specified in the requirements
     def create_specific_users(self):
-        print('Jebediah Kerman successfully seeded.')
-        User.objects.create_user(
-            username = 'jebKerman',
-            first_name = 'Jebediah',
-            last_name = 'Kerman',
-            email = 'jeb@example.org',
-            bio = self.faker.word(),
-            personal_statement = self.faker.word(),
-            experience_level = 'ADVANCED',
-            user_type = 'MEMBER',
-            password = self.DEFAULT_PASSWORD
-        )
-
-        print('Valentina Kerman successfully seeded.')
-        User.objects.create_user(
-            username = 'valKerman',
-            first_name = 'Valentina',
-            last_name = 'Kerman',
-            email = 'val@example.org',
-            bio = self.faker.word(),
-            personal_statement = self.faker.word(),
-            experience_level = 'ADVANCED',
-            user_type = 'OFFICER',
-            password = self.DEFAULT_PASSWORD
-        )
-
-        print('Billie Kerman successfully seeded.')
-        User.objects.create_user(
-            username = 'bilKerman',
-            first_name = 'Billie',
-            last_name = 'Kerman',
-            email = 'billie@example.org',
-            bio = self.faker.word(),
-            personal_statement = self.faker.word(),
-            experience_level = 'ADVANCED',
-            user_type = 'OWNER',
-            password = self.DEFAULT_PASSWORD
-        )
+        faker = Faker('en_GB')
+        specific_users = [
+            ('jebKerman', 'Jebediah', 'jeb@example.org', UserType.MEMBER),
+            ('valKerman', 'Valentina', 'val@example.org', UserType.OFFICER),
+            ('bilKerman', 'Billie', 'billie@example.org', UserType.OWNER),
+        ]
+        for username, first_name, email, user_type in specific_users:
+            if User.objects.filter(username=username).exists():
+                continue
+            self.build_user(
+                username = username,
+                first_name = first_name,
+                last_name = 'Kerman',
+                email = email,
+                bio = faker.word(),
+                personal_statement = faker.word(),
+                experience_level = 'ADVANCED',
+                user_type = user_type,
+            ).save()
+            self.stdout.write(f'{first_name} Kerman successfully seeded.')
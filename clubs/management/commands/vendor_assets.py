@@ -0,0 +1,65 @@
+import json
+import os
+from urllib.request import urlopen
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from clubs.vendor import MANIFEST, VENDOR_ASSETS, integrity_of
+
+class Command(BaseCommand):
+    help = ('Downloads the pinned third party assets into static/clubs/vendor so no page loads them from a CDN, '
+            'and records their integrity hashes in the vendor manifest')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Download assets that are already vendored')
+        parser.add_argument('--check', action='store_true',
+                            help='Download nothing, fail unless every asset is vendored and matches the manifest')
+
+    def handle(self, *args, **options):
+        static_dir = settings.STATICFILES_DIRS[0]
+        if options['check']:
+            self.check_vendored(static_dir)
+            return
+        manifest = {}
+        for path, (url, integrity) in VENDOR_ASSETS.items():
+            destination = os.path.join(static_dir, path)
+            if os.path.exists(destination) and not options['force']:
+                with open(destination, 'rb') as asset:
+                    content = asset.read()
+                self.stdout.write(f'{path} is already vendored.')
+            else:
+                with urlopen(url, timeout=30) as response:
+                    content = response.read()
+                os.makedirs(os.path.dirname(destination), exist_ok=True)
+                with open(destination, 'wb') as asset:
+                    asset.write(content)
+                self.stdout.write(f'Vendored {path} from {url}')
+            if integrity and integrity_of(content, integrity.split('-', 1)[0]) != integrity:
+                raise CommandError(f'{path} does not match the integrity hash of {url}')
+            manifest[path] = integrity_of(content)
+        with open(os.path.join(static_dir, MANIFEST), 'w') as output:
+            json.dump(manifest, output, indent=2, sort_keys=True)
+            output.write('\n')
+        self.stdout.write(f'Integrity hashes written to {MANIFEST}')
+
+    """Raise a CommandError naming every asset that is missing or differs from the manifest"""
+    def check_vendored(self, static_dir):
+        try:
+            with open(os.path.join(static_dir, MANIFEST)) as manifest_file:
+                manifest = json.load(manifest_file)
+        except FileNotFoundError:
+            raise CommandError(f'{MANIFEST} is missing, run vendor_assets')
+        problems = []
+        for path in VENDOR_ASSETS:
+            try:
+                with open(os.path.join(static_dir, path), 'rb') as asset:
+                    content = asset.read()
+            except FileNotFoundError:
+                problems.append(f'{path} is not vendored')
+                continue
+            if manifest.get(path) != integrity_of(content):
+                problems.append(f'{path} does not match {MANIFEST}')
+        if problems:
+            raise CommandError('\n'.join(problems))
+        self.stdout.write(f'All {len(VENDOR_ASSETS)} vendored assets match {MANIFEST}.')
@@ -0,0 +1,321 @@
+'''
+Request latency metrics.
+Each request is timed and its time split into database, template and
+view code, which is sent back in a Server-Timing header and added to a
+histogram for its url name. Histograms are kept per thread, each written
+only by its own thread, so recording a request takes no lock. Workers
+write their totals to a file of their own in METRICS_DIR every few
+seconds, named by its pid and start time so that a reused pid starts a
+file of its own. The metrics view adds up every worker's file in
+Prometheus text format, after folding the files of workers that have
+exited into a single file of their totals.
+'''
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from django.conf import settings
+from django.template.backends.django import DjangoTemplates, Template
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+'''Upper bounds, in seconds, of the latency histogram buckets'''
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COMPONENTS = ('db', 'template', 'view')
+FLUSH_INTERVAL = 5
+UNRESOLVED = 'unresolved'
+EXITED_FILE = 'exited.json'
+WORKER_FILE = re.compile(r'worker-(\d+)-(\d+)\.json')
+
+"""The template time of one request, added to by every template it renders"""
+class RequestTimer:
+    def __init__(self):
+        self.template = 0.0
+
+"""
+A template that adds its render time, less the database time spent in it,
+to the timer of the request it is rendered for.
+"""
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        timer = getattr(request, 'timer', None)
+        if timer is None:
+            return super().render(context, request)
+        stats = getattr(request, 'query_stats', None)
+        db_before = stats.duration if stats else 0.0
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            db = (stats.duration if stats else 0.0) - db_before
+            timer.template += time.perf_counter() - start - db
+
+"""The Django template backend, timing every template it renders"""
+class TimedDjangoTemplates(DjangoTemplates):
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
+
+def _new_series():
+    return {'buckets': [0] * (len(BUCKETS) + 1), 'count': 0, 'sum': 0.0,
+            **{component: 0.0 for component in COMPONENTS}}
+
+"""
+The histograms of one process. Every thread records into a dict of its
+own, which takes no lock. Readers add up the dicts of live threads and
+the retired totals, into which the dicts of finished threads are folded,
+so a server starting a thread per connection keeps one dict per live
+thread rather than one per thread it ever started.
+"""
+class Histograms:
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards = {}
+        self._retired = {}
+        self._last_flush = time.monotonic()
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._retire_finished()
+                self._shards[threading.current_thread()] = shard
+        return shard
+
+    """Fold the dicts of threads that have finished, and so write to them no more, into the retired totals"""
+    def _retire_finished(self):
+        for thread in [thread for thread in self._shards if not thread.is_alive()]:
+            for url_name, series in self._shards.pop(thread).items():
+                _add(self._retired.setdefault(url_name, _new_series()), series)
+
+    def observe(self, url_name, total, components):
+        shard = self._shard()
+        series = shard.get(url_name)
+        if series is None:
+            series = shard[url_name] = _new_series()
+        bucket = next((index for index, bound in enumerate(BUCKETS) if total <= bound), len(BUCKETS))
+        series['buckets'][bucket] += 1
+        series['count'] += 1
+        series['sum'] += total
+        for component, seconds in components.items():
+            series[component] += seconds
+
+    """Return the totals of every thread of this process by url name"""
+    def snapshot(self):
+        totals = {}
+        with self._lock:
+            self._retire_finished()
+            for shard in (self._retired, *self._shards.values()):
+                for url_name, series in list(shard.items()):
+                    _add(totals.setdefault(url_name, _new_series()), series)
+        return totals
+
+    """Write this process's totals to its file in METRICS_DIR, at most every FLUSH_INTERVAL seconds"""
+    def flush(self, force=False):
+        directory = getattr(settings, 'METRICS_DIR', None)
+        if not directory:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_flush < FLUSH_INTERVAL:
+            return
+        self._last_flush = now
+        os.makedirs(directory, exist_ok=True)
+        descriptor, temporary = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(descriptor, 'w') as output:
+            json.dump(self.snapshot(), output)
+        os.replace(temporary, _worker_file(directory, *_identity()))
+
+    def clear(self):
+        with self._lock:
+            self._retired.clear()
+            for shard in self._shards.values():
+                shard.clear()
+
+def _add(totals, series):
+    totals['buckets'] = [mine + theirs for mine, theirs in zip(totals['buckets'], series['buckets'])]
+    for key in ('count', 'sum', *COMPONENTS):
+        totals[key] += series[key]
+
+"""
+Return when a process started, in clock ticks since boot, or None when
+that is not known: the process has exited or there is no /proc.
+"""
+def _start_time(pid):
+    try:
+        with open(f'/proc/{pid}/stat') as stat:
+            # The command name in parentheses may contain spaces
+            return int(stat.read().rsplit(')', 1)[1].split()[19])
+    except (OSError, ValueError, IndexError):
+        return None
+
+_process = None
+
+"""Return the pid and start time of this process, worked out again after a fork"""
+def _identity():
+    global _process
+    pid = os.getpid()
+    if _process is None or _process[0] != pid:
+        _process = (pid, _start_time(pid) or 0)
+    return _process
+
+def _is_running(pid, start):
+    if os.name != 'posix':
+        # os.kill(pid, 0) would send Ctrl+C there, so the files of exited workers are kept
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    # A process with a different start time has been given the pid of an exited one
+    return _start_time(pid) in (start, None)
+
+def _worker_file(directory, pid, start):
+    return os.path.join(directory, f'worker-{pid}-{start}.json')
+
+def _read(path):
+    try:
+        with open(path) as input:
+            return json.load(input)
+    except (OSError, ValueError):
+        return None
+
+def _add_all(totals, worker):
+    for url_name, series in worker.items():
+        _add(totals.setdefault(url_name, _new_series()), series)
+
+"""
+Add the files of workers that have exited to the totals in EXITED_FILE
+and delete them, so that their counts are kept without the directory
+growing with every worker ever started.
+"""
+def _fold_exited(directory, names):
+    exited = [
+        name for name in names
+        if (match := WORKER_FILE.fullmatch(name)) and not _is_running(int(match[1]), int(match[2]))
+    ]
+    if not exited:
+        return
+    exited_path = os.path.join(directory, EXITED_FILE)
+    totals = _read(exited_path) or {}
+    for name in exited:
+        _add_all(totals, _read(os.path.join(directory, name)) or {})
+    descriptor, temporary = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(descriptor, 'w') as output:
+        json.dump(totals, output)
+    os.replace(temporary, exited_path)
+    for name in exited:
+        os.remove(os.path.join(directory, name))
+
+"""Hold an exclusive lock on the lock file of directory for the length of the block"""
+@contextmanager
+def _locked(directory):
+    with open(os.path.join(directory, 'metrics.lock'), 'a+b') as lock:
+        if fcntl:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+            return
+        # Windows locks a byte range, which need not exist yet
+        lock.seek(0)
+        msvcrt.locking(lock.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            lock.seek(0)
+            msvcrt.locking(lock.fileno(), msvcrt.LK_UNLCK, 1)
+
+histograms = Histograms()
+
+"""
+Return the totals of every worker by url name: this process's live
+histograms, the last file written by every other running worker and the
+totals of the workers that have exited, so that counts never go down.
+Workers reading at once take turns on a lock file, so that none of them
+reads an exited worker's file as well as the totals it was folded into.
+"""
+def merged_snapshot():
+    totals = histograms.snapshot()
+    directory = getattr(settings, 'METRICS_DIR', None)
+    if not directory or not os.path.isdir(directory):
+        return totals
+    own_file = _worker_file(directory, *_identity())
+    with _locked(directory):
+        _fold_exited(directory, os.listdir(directory))
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if (WORKER_FILE.fullmatch(name) or name == EXITED_FILE) and path != own_file:
+                _add_all(totals, _read(path) or {})
+    return totals
+
+def _label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"')
+
+"""Return the merged histograms in the Prometheus text exposition format"""
+def render_prometheus():
+    lines = [
+        '# HELP clubs_request_duration_seconds Time taken to answer a request, by url name.',
+        '# TYPE clubs_request_duration_seconds histogram',
+    ]
+    totals = merged_snapshot()
+    for url_name in sorted(totals):
+        series = totals[url_name]
+        view = _label(url_name)
+        cumulative = 0
+        for bound, count in zip((*BUCKETS, '+Inf'), series['buckets']):
+            cumulative += count
+            lines.append(f'clubs_request_duration_seconds_bucket{{view="{view}",le="{bound}"}} {cumulative}')
+        lines.append(f'clubs_request_duration_seconds_sum{{view="{view}"}} {series["sum"]}')
+        lines.append(f'clubs_request_duration_seconds_count{{view="{view}"}} {series["count"]}')
+    lines += [
+        '# HELP clubs_request_component_seconds_total Time spent in the database, templates and view code, by url name.',
+        '# TYPE clubs_request_component_seconds_total counter',
+    ]
+    for url_name in sorted(totals):
+        for component in COMPONENTS:
+            lines.append(
+                f'clubs_request_component_seconds_total{{view="{_label(url_name)}",component="{component}"}} '
+                f'{totals[url_name][component]}'
+            )
+    return '\n'.join(lines) + '\n'
+
+"""
+Times every request, sends the split back in a Server-Timing header and
+records it in the histogram of its url name. It must come before
+QueryBudgetMiddleware, whose query stats give the database time.
+"""
+class ServerTimingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.timer = timer = RequestTimer()
+        start = time.perf_counter()
+        response = self.get_response(request)
+        total = time.perf_counter() - start
+        stats = getattr(request, 'query_stats', None)
+        db = stats.duration if stats else 0.0
+        components = {
+            'db': db,
+            'template': timer.template,
+            'view': max(total - db - timer.template, 0.0),
+        }
+        response['Server-Timing'] = ', '.join(
+            [f'{name};dur={seconds * 1000:.1f}' for name, seconds in components.items()]
+            + [f'total;dur={total * 1000:.1f}']
+        )
+        match = request.resolver_match
+        histograms.observe(match.url_name if match and match.url_name else UNRESOLVED, total, components)
+        histograms.flush()
+        return response
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.5 on 2026-10-18 18:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clubs', '0011_alter_user_options'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['user_type', 'username'], name='clubs_user_type_username_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('application_status', 'PENDING'), ('user_type', 'APPLICANT')), fields=['user_type', 'username'], name='clubs_user_pending_idx'),
+        ),
+    ]
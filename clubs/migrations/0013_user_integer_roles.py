@@ -0,0 +1,86 @@
+from django.db import migrations, models
+
+
+USER_TYPES = {'APPLICANT': 0, 'MEMBER': 1, 'OFFICER': 2, 'OWNER': 3}
+APPLICATION_STATUSES = {'PENDING': 0, 'ACCEPTED': 1, 'REJECTED': 2}
+
+
+def encode_roles(apps, schema_editor):
+    User = apps.get_model('clubs', 'User')
+    for field, codes in (('user_type', USER_TYPES), ('application_status', APPLICATION_STATUSES)):
+        for value in User.objects.values_list(field, flat=True).distinct():
+            # Stray whitespace or case is folded; anything unrecognised keeps the default
+            code = codes.get((value or '').strip().upper(), 0)
+            User.objects.filter(**{field: value}).update(**{f'{field}_code': code})
+
+
+def decode_roles(apps, schema_editor):
+    User = apps.get_model('clubs', 'User')
+    for field, codes in (('user_type', USER_TYPES), ('application_status', APPLICATION_STATUSES)):
+        for name, code in codes.items():
+            User.objects.filter(**{f'{field}_code': code}).update(**{field: name})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clubs', '0012_user_role_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='user',
+            name='clubs_user_type_username_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='user',
+            name='clubs_user_pending_idx',
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='user_type_code',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='application_status_code',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.RunPython(encode_roles, decode_roles),
+        migrations.RemoveField(
+            model_name='user',
+            name='user_type',
+        ),
+        migrations.RemoveField(
+            model_name='user',
+            name='application_status',
+        ),
+        migrations.RenameField(
+            model_name='user',
+            old_name='user_type_code',
+            new_name='user_type',
+        ),
+        migrations.RenameField(
+            model_name='user',
+            old_name='application_status_code',
+            new_name='application_status',
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='user_type',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'APPLICANT'), (1, 'MEMBER'), (2, 'OFFICER'), (3, 'OWNER')], default=0),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='application_status',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'PENDING'), (1, 'ACCEPTED'), (2, 'REJECTED')], default=0),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['user_type', 'username'], name='clubs_user_type_username_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('application_status', 0), ('user_type', 0)), fields=['user_type', 'username'], name='clubs_user_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 3.2.5 on 2026-10-18 19:05
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def fill_email_hashes(apps, schema_editor):
+    User = apps.get_model('clubs', 'User')
+    users = []
+    for user in User.objects.only('id', 'email').iterator(chunk_size=2000):
+        user.email_hash = hashlib.md5(user.email.strip().lower().encode('utf-8')).hexdigest()
+        users.append(user)
+        if len(users) == 2000:
+            User.objects.bulk_update(users, ['email_hash'])
+            users = []
+    User.objects.bulk_update(users, ['email_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clubs', '0013_user_integer_roles'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='email_hash',
+            field=models.CharField(blank=True, editable=False, max_length=32),
+        ),
+        migrations.RunPython(fill_email_hashes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE clubs_user_fts USING fts5("
+        "username, first_name, last_name, bio, personal_statement, prefix='2 3')"
+    )
+    schema_editor.execute(
+        "INSERT INTO clubs_user_fts(rowid, username, first_name, last_name, bio, personal_statement) "
+        "SELECT id, username, first_name, last_name, bio, personal_statement FROM clubs_user"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS clubs_user_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clubs', '0014_user_email_hash'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
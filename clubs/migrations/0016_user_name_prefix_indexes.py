@@ -0,0 +1,27 @@
+# Generated by Django 3.2.5 on 2026-10-18 19:10
+
+from django.db import migrations, models
+import django.db.models.expressions
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clubs', '0015_user_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(django.db.models.expressions.F('user_type'), django.db.models.functions.text.Lower('username'), name='clubs_user_username_ci_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(django.db.models.expressions.F('user_type'), django.db.models.functions.text.Lower('first_name'), name='clubs_user_first_name_ci_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(django.db.models.expressions.F('user_type'), django.db.models.functions.text.Lower('last_name'), name='clubs_user_last_name_ci_idx'),
+        ),
+    ]
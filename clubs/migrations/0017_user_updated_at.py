@@ -0,0 +1,50 @@
+# Generated by Django 3.2.5 on 2026-10-18 19:33
+
+from django.db import migrations, models
+import django.db.models.expressions
+import django.db.models.functions.text
+import django.utils.timezone
+
+
+# SQLite rebuilds the table to add a column, and Django can't recreate
+# expression indexes while doing so, so they are dropped around the rebuild
+CI_INDEXES = ['username', 'first_name', 'last_name']
+
+
+def create_watermarks(apps, schema_editor):
+    UserListWatermark = apps.get_model('clubs', 'UserListWatermark')
+    UserListWatermark.objects.bulk_create([UserListWatermark(user_type=user_type) for user_type in range(4)])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clubs', '0016_user_name_prefix_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserListWatermark',
+            fields=[
+                ('user_type', models.PositiveSmallIntegerField(choices=[(0, 'APPLICANT'), (1, 'MEMBER'), (2, 'OFFICER'), (3, 'OWNER')], primary_key=True, serialize=False)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        *[
+            migrations.RemoveIndex(model_name='user', name=f'clubs_user_{field}_ci_idx')
+            for field in CI_INDEXES
+        ],
+        migrations.AddField(
+            model_name='user',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        *[
+            migrations.AddIndex(
+                model_name='user',
+                index=models.Index(django.db.models.expressions.F('user_type'), django.db.models.functions.text.Lower(field), name=f'clubs_user_{field}_ci_idx'),
+            )
+            for field in CI_INDEXES
+        ],
+        migrations.RunPython(create_watermarks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.5 on 2026-10-18 20:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clubs', '0017_user_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['email_hash'], name='clubs_user_email_hash_idx'),
+        ),
+    ]
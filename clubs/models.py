@@ -1,14 +1,62 @@
 '''Models for clubs applcation'''
+import datetime
 from django.db import models
-from libgravatar import Gravatar
+from django.db.models.functions import Lower
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import RegexValidator
 from django.core.validators import EmailValidator
+from django.utils import timezone
+from . import avatars
+
+'''Roles a user can hold within the club, stored as small integers'''
+class UserType(models.IntegerChoices):
+    APPLICANT = 0, 'APPLICANT'
+    MEMBER = 1, 'MEMBER'
+    OFFICER = 2, 'OFFICER'
+    OWNER = 3, 'OWNER'
+
+'''Progress of an applicant's application, stored as small integers'''
+class ApplicationStatus(models.IntegerChoices):
+    PENDING = 0, 'PENDING'
+    ACCEPTED = 1, 'ACCEPTED'
+    REJECTED = 2, 'REJECTED'
+
+'''Roles whose lists each role may browse'''
+LISTED_ROLES = {
+    UserType.MEMBER: (UserType.MEMBER,),
+    UserType.OFFICER: (UserType.APPLICANT, UserType.MEMBER),
+    UserType.OWNER: (UserType.MEMBER, UserType.OFFICER),
+}
+
+'''Roles whose full profile (email, statement, experience) each role may see'''
+FULL_PROFILE_ROLES = {
+    UserType.OFFICER: (UserType.APPLICANT, UserType.MEMBER),
+    UserType.OWNER: (UserType.OFFICER, UserType.MEMBER),
+}
+
+'''The only columns a row of a user list needs'''
+LIST_FIELDS = ('id', 'username', 'first_name', 'last_name', 'email_hash')
 
 '''User model'''
 class User(AbstractUser):
     class Meta:
         ordering = ['username']
+        indexes = [
+            # Role filtered lists ordered by username
+            models.Index(fields=['user_type', 'username'], name='clubs_user_type_username_idx'),
+            # Applicants still waiting on a decision
+            models.Index(
+                fields=['user_type', 'username'],
+                name='clubs_user_pending_idx',
+                condition=models.Q(user_type=UserType.APPLICANT, application_status=ApplicationStatus.PENDING),
+            ),
+            # Case insensitive prefix lookups within a role for autocomplete
+            models.Index('user_type', Lower('username'), name='clubs_user_username_ci_idx'),
+            models.Index('user_type', Lower('first_name'), name='clubs_user_first_name_ci_idx'),
+            models.Index('user_type', Lower('last_name'), name='clubs_user_last_name_ci_idx'),
+            # Avatars are only served for the email hashes of existing users
+            models.Index(fields=['email_hash'], name='clubs_user_email_hash_idx'),
+        ]
         
     username = models.CharField(
         max_length=30,
@@ -60,41 +108,130 @@ class User(AbstractUser):
 
     bio = models.CharField(max_length=300, blank=True)
 
-    user_type = models.CharField(max_length=20, default='APPLICANT')
+    # Gravatar hash of the email, kept in step with it by save()
+    email_hash = models.CharField(max_length=32, blank=True, editable=False)
+
+    user_type = models.PositiveSmallIntegerField(
+        choices=UserType.choices, default=UserType.APPLICANT)
+
+    application_status = models.PositiveSmallIntegerField(
+        choices=ApplicationStatus.choices, default=ApplicationStatus.PENDING)
+
+    # Set by save(), and by every queryset update of users, for conditional GETs
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        user = super().from_db(db, field_names, values)
+        # Remembered so a save that changes role can refresh both roles' lists
+        user.loaded_user_type = user.__dict__.get('user_type')
+        return user
+
+    @property
+    def is_applicant(self):
+        return self.user_type == UserType.APPLICANT
+
+    @property
+    def is_member(self):
+        return self.user_type == UserType.MEMBER
+
+    @property
+    def is_officer(self):
+        return self.user_type == UserType.OFFICER
+
+    @property
+    def is_owner(self):
+        return self.user_type == UserType.OWNER
+
+    def can_see_all_info_of(self, user):
+        return user.user_type in FULL_PROFILE_ROLES.get(self.user_type, ())
+
+    @property
+    def is_rejected(self):
+        return self.application_status == ApplicationStatus.REJECTED
+
+    def save(self, *args, **kwargs):
+        self.email_hash = avatars.email_hash(self.email)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'email' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'email_hash'}
+        super().save(*args, **kwargs)
 
-    application_status = models.CharField(max_length=20, default='PENDING')
-    
     def gravatar(self, size=120):
         """Return a URL to the user's gravatar."""
-        gravatar_object = Gravatar(self.email)
-        gravatar_url = gravatar_object.get_image(size=size, default='mp')
-        return gravatar_url
+        return avatars.avatar_url(self.email_hash or avatars.email_hash(self.email), size)
 
     def mini_gravatar(self):
         """Return a URL to a miniature version of the user's gravatar."""
         return self.gravatar(size=60)
 
 
+    """
+    The role transitions below are applied through clubs.transitions as a
+    conditional update, and return whether the change was made. The given
+    user objects are only updated in memory when the change wins.
+    """
     def demote_officer(self, user):
-        user.user_type = 'MEMBER'
-        user.save()
+        from .transitions import demote_officer
+        if not demote_officer(user.id):
+            return False
+        user.user_type = UserType.MEMBER
+        return True
 
     def promote_member(self, user):
-        user.user_type = 'OFFICER'
-        user.save()
+        from .transitions import promote_member
+        if not promote_member(user.id):
+            return False
+        user.user_type = UserType.OFFICER
+        return True
 
     def transfer_ownership(self, user):
-        user.user_type = 'OWNER'
-        user.save()
-        self.user_type = 'OFFICER'
-        self.save()
-        
+        from .transitions import transfer_ownership
+        if not transfer_ownership(self.id, user.id):
+            return False
+        user.user_type = UserType.OWNER
+        self.user_type = UserType.OFFICER
+        return True
+
     def accept_application(self, user):
-        user.user_type = 'MEMBER'
-        user.application_status = 'ACCEPTED'
-        user.save()
+        from .transitions import accept_application
+        if not accept_application(user.id):
+            return False
+        user.user_type = UserType.MEMBER
+        user.application_status = ApplicationStatus.ACCEPTED
+        return True
 
     def reject_application(self, user):
-        user.application_status = 'REJECTED'
-        user.save()
-
+        from .transitions import reject_application
+        if not reject_application(user.id):
+            return False
+        user.application_status = ApplicationStatus.REJECTED
+        return True
+
+"""
+When anything shown in the list of users of a role last changed: a user of
+the role joined, left, changed role or changed a listed column.
+Lets user lists answer conditional GETs with one primary key lookup.
+"""
+class UserListWatermark(models.Model):
+    # Stands in for a role without a row yet. Every write touches, and so
+    # creates, the rows of the roles it changes, so nothing shown is newer
+    EPOCH = datetime.datetime(2021, 1, 1, tzinfo=timezone.utc)
+
+    user_type = models.PositiveSmallIntegerField(choices=UserType.choices, primary_key=True)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    @classmethod
+    def touch(cls, user_types):
+        user_types = set(user_types)
+        now = timezone.now()
+        if cls.objects.filter(user_type__in=user_types).update(updated_at=now) < len(user_types):
+            cls.objects.bulk_create(
+                [cls(user_type=user_type, updated_at=now) for user_type in user_types],
+                ignore_conflicts=True,
+            )
+
+    @classmethod
+    def updated_at_of(cls, user_type):
+        updated_at = cls.objects.filter(user_type=user_type).values_list('updated_at', flat=True).first()
+        return updated_at or cls.EPOCH
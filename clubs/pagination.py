@@ -0,0 +1,118 @@
+'''Keyset (cursor) pagination for the clubs application'''
+import base64
+import binascii
+import json
+from django.core.paginator import Paginator
+from django.db.models import Count
+from django.utils.functional import cached_property
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+def encode_cursor(direction, key):
+    """Return an opaque, url safe token pointing either side of a key."""
+    payload = json.dumps([direction, key], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+def decode_cursor(token):
+    """
+    Return the (direction, key) pair stored in a token.
+    Tokens that cannot be decoded are treated as the first page.
+    """
+    if not token:
+        return None, None
+    try:
+        padding = '=' * (-len(token) % 4)
+        direction, key = json.loads(base64.urlsafe_b64decode(token + padding))
+    except (binascii.Error, ValueError, TypeError):
+        return None, None
+    if direction not in (NEXT, PREVIOUS):
+        return None, None
+    return direction, key
+
+"""
+A single page of a keyset paginated list.
+Behaves like a django Page where templates and views need it to,
+but knows nothing about page numbers or the total count.
+"""
+class KeysetPage:
+    def __init__(self, object_list, next_token=None, previous_token=None):
+        self.object_list = object_list
+        self.next_token = next_token
+        self.previous_token = previous_token
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_token is not None
+
+    def has_previous(self):
+        return self.previous_token is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+"""
+Paginates a queryset on a unique column (username by default) so that
+every page costs a single indexed range scan of per_page + 1 rows,
+whatever its depth. No COUNT(*) query is ever run.
+"""
+class KeysetPaginator:
+    def __init__(self, queryset, per_page, key='username'):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.key = key
+
+    def get_page(self, token):
+        direction, cursor = decode_cursor(token)
+        # Keys are usernames, anything else in a token is treated as the first page
+        if not isinstance(cursor, str):
+            direction = None
+        queryset = self.queryset
+        if direction == PREVIOUS:
+            queryset = queryset.filter(**{f'{self.key}__lt': cursor}).order_by(f'-{self.key}')
+        elif direction == NEXT:
+            queryset = queryset.filter(**{f'{self.key}__gt': cursor}).order_by(self.key)
+        else:
+            queryset = queryset.order_by(self.key)
+
+        rows = list(queryset[:self.per_page + 1])
+        return build_page(rows, direction, self.per_page, lambda row: getattr(row, self.key))
+
+"""
+Turns up to per_page + 1 rows fetched in the given direction into a page.
+key returns the cursor value of a row.
+"""
+def build_page(rows, direction, per_page, key):
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if direction == PREVIOUS:
+        rows.reverse()
+        has_next, has_previous = True, has_more
+    else:
+        has_next, has_previous = has_more, direction == NEXT
+
+    next_token = previous_token = None
+    if rows and has_next:
+        next_token = encode_cursor(NEXT, key(rows[-1]))
+    if rows and has_previous:
+        previous_token = encode_cursor(PREVIOUS, key(rows[0]))
+    return KeysetPage(rows, next_token, previous_token)
+
+"""
+Pages a role's users by page number, counting them on the username
+column. A bare COUNT(*) lets SQLite count on whichever index led by
+user_type it estimates narrowest, such as the autocomplete expression
+indexes, rather than the (user_type, username) index pages are read from.
+"""
+class UserListPaginator(Paginator):
+    @cached_property
+    def count(self):
+        return self.object_list.aggregate(count=Count('username'))['count']
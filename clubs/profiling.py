@@ -0,0 +1,114 @@
+'''
+Profiling of single requests.
+A request is run under cProfile and written out twice: as a .prof file
+for pstats, snakeviz and the like, and as collapsed stacks, one
+"caller;callee;... microseconds" line per stack, for flamegraph.pl,
+speedscope and other flamegraph tools. cProfile only records which
+function called which, so the time of a function called from several
+places is shared out between them in proportion to the time each spent
+in it.
+'''
+import cProfile
+import os
+import pstats
+import re
+from django.conf import settings
+from django.utils import timezone
+
+DEFAULT_PROFILING_DIR = os.path.join(settings.BASE_DIR, 'profiles')
+'''Stacks worth less than this many microseconds are left out of the flamegraph'''
+MIN_STACK_MICROSECONDS = 1
+MAX_DEPTH = 200
+
+"""Return a profiler that has run func, and what func returned"""
+def profile_call(func, *args, **kwargs):
+    profiler = cProfile.Profile()
+    result = profiler.runcall(func, *args, **kwargs)
+    return profiler, result
+
+def _label(function):
+    filename, line, name = function
+    if filename == '~':
+        return name
+    return f'{_short_path(filename)}:{line}({name})'
+
+def _short_path(filename):
+    parts = filename.replace(os.sep, '/').split('/')
+    for package in ('site-packages', 'clubs', 'django'):
+        if package in parts:
+            index = len(parts) - 1 - parts[::-1].index(package)
+            return '/'.join(parts[index + 1:] if package == 'site-packages' else parts[index:])
+    return parts[-1]
+
+"""
+Return collapsed stacks, with their time in microseconds, rebuilt from
+the call graph of a profiler's stats.
+"""
+def collapsed_stacks(stats):
+    callees = {}
+    for function, (_, _, _, _, callers) in stats.stats.items():
+        for caller, (_, _, _, cumulative) in callers.items():
+            callees.setdefault(caller, []).append((function, cumulative))
+    roots = [function for function, (_, _, _, _, callers) in stats.stats.items() if not callers]
+    stacks = {}
+
+    def walk(function, stack, share):
+        own = stats.stats[function][2]
+        stack = stack + (_label(function),)
+        microseconds = round(own * share * 1_000_000)
+        if microseconds >= MIN_STACK_MICROSECONDS:
+            key = ';'.join(stack)
+            stacks[key] = stacks.get(key, 0) + microseconds
+        if len(stack) >= MAX_DEPTH:
+            return
+        for callee, edge in callees.get(function, ()):
+            callee_total = stats.stats[callee][3]
+            # The part of the callee's time spent under this stack
+            reached = share * edge
+            if _label(callee) in stack or callee_total <= 0 or reached * 1_000_000 < MIN_STACK_MICROSECONDS:
+                continue
+            walk(callee, stack, min(reached / callee_total, 1.0))
+
+    for root in roots:
+        walk(root, (), 1.0)
+    return stacks
+
+"""
+Write a profiler's stats to <base>.prof and its collapsed stacks to
+<base>.collapsed and return both paths.
+"""
+def write_profile(profiler, base):
+    os.makedirs(os.path.dirname(base) or '.', exist_ok=True)
+    stats = pstats.Stats(profiler)
+    stats.dump_stats(f'{base}.prof')
+    with open(f'{base}.collapsed', 'w') as output:
+        for stack, microseconds in sorted(collapsed_stacks(stats).items()):
+            output.write(f'{stack} {microseconds}\n')
+    return f'{base}.prof', f'{base}.collapsed'
+
+"""Return where to write the profile of a request to a url name or path"""
+def profile_base(name):
+    slug = re.sub(r'[^\w-]+', '-', name).strip('-') or 'root'
+    directory = getattr(settings, 'PROFILING_DIR', DEFAULT_PROFILING_DIR)
+    return os.path.join(directory, f'{slug}-{timezone.now():%Y%m%d-%H%M%S-%f}')
+
+"""
+Profiles the request when PROFILING_ENABLED is set and the owner adds
+?profile to the url, other requests are served as usual. The profile is written to PROFILING_DIR and its
+paths are sent back in X-Profile headers. It must come after
+AuthenticationMiddleware.
+"""
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not (getattr(settings, 'PROFILING_ENABLED', False) and 'profile' in request.GET
+                and request.user.is_authenticated and request.user.is_owner):
+            return self.get_response(request)
+        profiler, response = profile_call(self.get_response, request)
+        match = request.resolver_match
+        prof_path, collapsed_path = write_profile(profiler, profile_base(match.url_name if match else request.path))
+        response['X-Profile'] = prof_path
+        response['X-Profile-Collapsed'] = collapsed_path
+        return response
@@ -0,0 +1,122 @@
+'''
+Full-text member search.
+On SQLite the searchable columns of every user are mirrored into the
+clubs_user_fts FTS5 table (created by migration 0015 and kept up to date
+by the signals in clubs.signals), results are ranked with bm25 and paged
+by a (rank, id) cursor. Other databases fall back to a LIKE search.
+'''
+import math
+import re
+from django.db import connection
+from django.db.models import Q
+from .models import User, LISTED_ROLES, FULL_PROFILE_ROLES, LIST_FIELDS
+from .pagination import KeysetPaginator, KeysetPage, build_page, decode_cursor, PREVIOUS, NEXT
+
+FTS_TABLE = 'clubs_user_fts'
+PUBLIC_COLUMNS = ('username', 'first_name', 'last_name', 'bio')
+PRIVATE_COLUMNS = ('personal_statement',)
+
+def _uses_fts():
+    return connection.vendor == 'sqlite'
+
+"""Adds or refreshes a user's row in the search index"""
+def index_user(user):
+    index_users([user])
+
+"""Adds or refreshes the search index rows of many users at once"""
+def index_users(users):
+    if not _uses_fts() or not users:
+        return
+    columns = PUBLIC_COLUMNS + PRIVATE_COLUMNS
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [[user.pk] for user in users])
+        cursor.executemany(
+            f'INSERT INTO {FTS_TABLE}(rowid, {", ".join(columns)}) VALUES (%s{", %s" * len(columns)})',
+            [[user.pk] + [getattr(user, column) for column in columns] for user in users],
+        )
+
+"""Removes a user's row from the search index"""
+def remove_user(user_id):
+    if not _uses_fts():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [user_id])
+
+"""
+Rebuilds the whole search index from clubs_user.
+Needed after writes that skip signals, such as bulk_create.
+"""
+def rebuild_index():
+    if not _uses_fts():
+        return
+    columns = ', '.join(PUBLIC_COLUMNS + PRIVATE_COLUMNS)
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(f'INSERT INTO {FTS_TABLE}(rowid, {columns}) SELECT id, {columns} FROM clubs_user')
+
+"""
+Turns free text into an FTS5 query matching every word as a prefix,
+restricted to the given columns.
+"""
+def fts_query(text, columns):
+    words = re.findall(r'\w+', text)
+    if not words:
+        return None
+    phrases = ' '.join('"{}"*'.format(word.replace('"', '""')) for word in words)
+    return f'{{{" ".join(columns)}}} : ({phrases})'
+
+"""
+Searches the users the viewer may list for the given text.
+Statements are only searched where the viewer may see full profiles.
+Returns a KeysetPage of users ranked best match first.
+"""
+def search_users(viewer, text, token, per_page):
+    user_types = LISTED_ROLES.get(viewer.user_type, ())
+    columns = PUBLIC_COLUMNS
+    if set(user_types) <= set(FULL_PROFILE_ROLES.get(viewer.user_type, ())):
+        columns += PRIVATE_COLUMNS
+    if not user_types or not re.search(r'\w', text):
+        return KeysetPage([])
+    if not _uses_fts():
+        return _search_with_like(user_types, text, columns, token, per_page)
+
+    direction, cursor = decode_cursor(token)
+    if direction and not _valid_cursor(cursor):
+        direction = None
+    params = [fts_query(text, columns)] + list(user_types)
+    sql = (
+        f'SELECT {", ".join("u." + column for column in LIST_FIELDS)}, hits.score '
+        f'FROM (SELECT rowid AS id, bm25({FTS_TABLE}) AS score FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s) AS hits '
+        f'JOIN clubs_user u ON u.id = hits.id '
+        f'WHERE u.user_type IN ({", ".join(["%s"] * len(user_types))})'
+    )
+    if direction == PREVIOUS:
+        sql += ' AND (hits.score, hits.id) < (%s, %s) ORDER BY hits.score DESC, hits.id DESC'
+        params += cursor
+    elif direction == NEXT:
+        sql += ' AND (hits.score, hits.id) > (%s, %s) ORDER BY hits.score, hits.id'
+        params += cursor
+    else:
+        sql += ' ORDER BY hits.score, hits.id'
+    sql += ' LIMIT %s'
+    params.append(per_page + 1)
+
+    rows = list(User.objects.raw(sql, params))
+    return build_page(rows, direction, per_page, lambda user: [user.score, user.id])
+
+"""Whether a decoded cursor is a [rank, id] pair, anything else is treated as the first page"""
+def _valid_cursor(cursor):
+    if not (isinstance(cursor, list) and len(cursor) == 2):
+        return False
+    rank, user_id = cursor
+    return (isinstance(rank, (int, float)) and not isinstance(rank, bool) and math.isfinite(rank)
+            and isinstance(user_id, int) and not isinstance(user_id, bool) and 0 < user_id < 2 ** 63)
+
+def _search_with_like(user_types, text, columns, token, per_page):
+    users = User.objects.filter(user_type__in=user_types).only(*LIST_FIELDS)
+    for word in re.findall(r'\w+', text):
+        matches = Q()
+        for column in columns:
+            matches |= Q(**{f'{column}__icontains': word})
+        users = users.filter(matches)
+    return KeysetPaginator(users, per_page).get_page(token)
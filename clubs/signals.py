@@ -0,0 +1,51 @@
+'''Signal handlers for the clubs application'''
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from .models import User, UserListWatermark, LIST_FIELDS
+from . import search, autocomplete, avatars, caching
+
+SEARCHED_FIELDS = set(search.PUBLIC_COLUMNS + search.PRIVATE_COLUMNS)
+LISTED_FIELDS = {*LIST_FIELDS, 'user_type'}
+
+"""
+Fixtures are saved raw, bypassing User.save() and auto_now, so hash their
+emails and stamp them here
+"""
+@receiver(pre_save, sender=User)
+def prepare_raw_user(sender, instance, raw=False, **kwargs):
+    if raw:
+        instance.email_hash = avatars.email_hash(instance.email)
+        if instance.updated_at is None:
+            instance.updated_at = timezone.now()
+
+"""Keeps the search index and this process's autocomplete cache in step with saved users"""
+@receiver(post_save, sender=User)
+def index_saved_user(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not SEARCHED_FIELDS.intersection(update_fields):
+        return
+    search.index_user(instance)
+    autocomplete.invalidate()
+
+"""
+Any write, including fixtures and last_login updates, invalidates the cached
+user. The lists the user was and is in are only marked as changed when a
+listed column may have changed.
+"""
+@receiver(post_save, sender=User)
+def invalidate_saved_user(sender, instance, update_fields=None, **kwargs):
+    caching.invalidate_users([instance.pk])
+    if update_fields is None or LISTED_FIELDS.intersection(update_fields):
+        loaded_user_type = getattr(instance, 'loaded_user_type', None)
+        UserListWatermark.touch({instance.user_type, loaded_user_type} - {None})
+        instance.loaded_user_type = instance.user_type
+
+@receiver(post_delete, sender=User)
+def invalidate_deleted_user(sender, instance, **kwargs):
+    caching.invalidate_users([instance.pk])
+    UserListWatermark.touch([instance.user_type])
+
+@receiver(post_delete, sender=User)
+def unindex_deleted_user(sender, instance, **kwargs):
+    search.remove_user(instance.pk)
+    autocomplete.invalidate()
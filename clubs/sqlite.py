@@ -0,0 +1,73 @@
+'''
+SQLite tuning.
+The pragmas in SQLITE_PRAGMAS are set on every new SQLite connection, and
+a database system check reads them back, since SQLite quietly keeps its
+old journal mode when it can't switch (on a network filesystem, say).
+'''
+import logging
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger('clubs.sqlite')
+
+'''synchronous is read back as a number rather than a name'''
+SYNCHRONOUS_LEVELS = {'off': 0, 'normal': 1, 'full': 2, 'extra': 3}
+
+"""Return the pragma statements for the configured pragmas, in order"""
+def pragma_statements(pragmas):
+    return [f'PRAGMA {name} = {value}' for name, value in pragmas.items()]
+
+"""Set the configured pragmas on every new SQLite connection"""
+@receiver(connection_created)
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', {})
+    if connection.vendor != 'sqlite' or not pragmas:
+        return
+    if connection.is_in_memory_db():
+        # In-memory databases have no journal file to share, nor anything to map
+        pragmas = {name: value for name, value in pragmas.items() if name not in ('journal_mode', 'mmap_size')}
+    # Run on the sqlite3 connection itself, so they are not counted as the queries of a request
+    for statement in pragma_statements(pragmas):
+        connection.connection.execute(statement)
+    # SQLite keeps its old journal mode when it can't switch
+    journal_mode = pragmas.get('journal_mode')
+    if journal_mode:
+        actual = connection.connection.execute('PRAGMA journal_mode').fetchone()[0].lower()
+        if actual != str(journal_mode).lower():
+            logger.warning('SQLite stayed in %s journal mode instead of %s', actual, journal_mode)
+
+def _expected(name, value):
+    value = str(value).lower()
+    if name == 'synchronous':
+        return str(SYNCHRONOUS_LEVELS.get(value, value))
+    return value
+
+"""Return the configured pragmas a connection does not have, as (name, expected, actual)"""
+def pragma_mismatches(connection):
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', {})
+    if connection.vendor != 'sqlite' or connection.is_in_memory_db():
+        return []
+    mismatches = []
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}')
+            actual = str(cursor.fetchone()[0]).lower()
+            if actual != _expected(name, value):
+                mismatches.append((name, _expected(name, value), actual))
+    return mismatches
+
+"""Warns about SQLITE_PRAGMAS that did not take effect, when checks are run against the database"""
+@register(Tags.database)
+def check_sqlite_pragmas(app_configs, databases=None, **kwargs):
+    warnings = []
+    for alias in databases or []:
+        for name, expected, actual in pragma_mismatches(connections[alias]):
+            warnings.append(Warning(
+                f'SQLite pragma {name} is {actual} on the {alias} database, not {expected}.',
+                hint='Check that the database is on a local filesystem that supports shared memory.',
+                id='clubs.W001',
+            ))
+    return warnings
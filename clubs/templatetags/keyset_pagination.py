@@ -0,0 +1,23 @@
+'''Template tags for keyset paginated lists'''
+from django import template
+
+register = template.Library()
+
+def _url_with_cursor(request, token):
+    query = request.GET.copy()
+    query.pop('page', None)
+    query['cursor'] = token
+    return f'?{query.urlencode()}'
+
+"""
+Renders previous/next links for a KeysetPage.
+A drop in replacement for bootstrap_paginate on cursor paginated lists.
+"""
+@register.inclusion_tag('partials/keyset_pagination.html', takes_context=True)
+def keyset_paginate(context, page):
+    request = context['request']
+    return {
+        'page': page,
+        'previous_url': _url_with_cursor(request, page.previous_token) if page.has_previous() else None,
+        'next_url': _url_with_cursor(request, page.next_token) if page.has_next() else None,
+    }
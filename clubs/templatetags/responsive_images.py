@@ -0,0 +1,47 @@
+'''Template tags for serving static images at the right size and format'''
+from functools import lru_cache
+from django import template
+from django.contrib.staticfiles import finders
+from django.templatetags.static import static
+from django.utils.html import format_html, mark_safe
+from clubs.images import RESPONSIVE_IMAGES, VARIANT_FORMATS, cover_sizes, variant_path
+
+register = template.Library()
+
+@lru_cache(maxsize=None)
+def _exists(path):
+    return finders.find(path) is not None
+
+def _srcset(path, widths, extension):
+    return ', '.join(
+        f'{static(variant_path(path, width, extension))} {width}w'
+        for width in widths
+        if _exists(variant_path(path, width, extension))
+    )
+
+"""
+Renders a picture element for an image drawn over the whole viewport.
+Its srcset lists the variants build_images has written by width, WebP
+first where supported, and sizes accounts for the cropping of a cover
+image, so the browser fetches the smallest variant for the viewport and
+its pixel ratio. Until the variants exist only the full size image is used.
+"""
+@register.simple_tag
+def cover_picture(path, css_class, alt=''):
+    (width, height), widths = RESPONSIVE_IMAGES[path]
+    sizes = cover_sizes(width, height)
+    sources = []
+    for extension, mime_type, _ in VARIANT_FORMATS[:-1]:
+        srcset = _srcset(path, widths, extension)
+        if srcset:
+            sources.append(format_html('<source type="{}" srcset="{}" sizes="{}">', mime_type, srcset, sizes))
+    fallback = _srcset(path, widths, VARIANT_FORMATS[-1][0])
+    if fallback:
+        img = format_html(
+            '<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" alt="{}" decoding="async">',
+            static(path), fallback, sizes, width, height, alt,
+        )
+    else:
+        img = format_html('<img src="{}" width="{}" height="{}" alt="{}" decoding="async">',
+                          static(path), width, height, alt)
+    return format_html('<picture class="{}">{}{}</picture>', css_class, mark_safe(''.join(sources)), img)
@@ -0,0 +1,31 @@
+'''Template tags for third party stylesheets and scripts'''
+from functools import lru_cache
+from django import template
+from django.contrib.staticfiles import finders
+from django.templatetags.static import static
+from django.utils.html import format_html
+from clubs.vendor import VENDOR_ASSETS
+
+register = template.Library()
+
+@lru_cache(maxsize=None)
+def _is_vendored(path):
+    return finders.find(path) is not None
+
+"""
+Renders the link or script tag of a vendored asset.
+Vendored copies are served with the other static files, fingerprinted in
+production; assets not vendored yet come from their CDN with their
+integrity hash.
+"""
+@register.simple_tag
+def vendor_asset(path):
+    url, integrity = VENDOR_ASSETS[path]
+    attributes = ''
+    if _is_vendored(path):
+        url = static(path)
+    elif integrity:
+        attributes = format_html(' integrity="{}" crossorigin="anonymous"', integrity)
+    if path.endswith('.css'):
+        return format_html('<link href="{}" rel="stylesheet"{}>', url, attributes)
+    return format_html('<script src="{}"{}></script>', url, attributes)
@@ -1,4 +1,7 @@
+from django.conf import settings
+from django.core.cache import cache, caches
 from django.urls import reverse
+from clubs.instrumentation import budget_for
 from clubs.models import User
 '''Some helper methods for testing'''
 class LogInTester:
@@ -10,3 +13,32 @@ def reverse_with_next(url_name, next_url):
     url += f"?next={next_url}"
 
     return url
+
+"""Mixin for view tests asserting the query budget configured in QUERY_BUDGETS"""
+class QueryBudgetTester:
+    """Asserts that the request behind a response kept to its query budget and ran no N+1"""
+    def assertWithinQueryBudget(self, response):
+        request = response.wsgi_request
+        stats = request.query_stats
+        max_queries, _ = budget_for(request.resolver_match.url_name)
+        self.assertLessEqual(stats.count, max_queries,
+            f'{request.path} ran {stats.count} queries, over its budget of {max_queries}')
+        self.assertEqual(stats.repeated(settings.QUERY_REPEAT_LIMIT), [])
+
+    """
+    Asserts that the queries run for a url do not grow with the number of
+    users listed, by requesting it before and after add_users is called.
+    The caches are cleared first, so that both requests miss them.
+    """
+    def assertQueriesDoNotGrowWithUsers(self, url, add_users):
+        cache.clear()
+        caches['fragments'].clear()
+        before = self.client.get(url).wsgi_request.query_stats.count
+        add_users()
+        cache.clear()
+        caches['fragments'].clear()
+        response = self.client.get(url)
+        after = response.wsgi_request.query_stats.count
+        self.assertEqual(after, before,
+            f'{url} ran {before} queries, then {after} with more users listed')
+        return response
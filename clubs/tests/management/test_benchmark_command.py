@@ -0,0 +1,73 @@
+"""Tests of the benchmark management command"""
+import json
+import os
+import tempfile
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from clubs.management.commands.benchmark import MIX, compare, percentile
+from clubs.models import User, UserType, ApplicationStatus
+
+class BenchmarkCommandTestCase(TestCase):
+    fixtures = ['clubs/tests/fixtures/default_user.json', 'clubs/tests/fixtures/other_users.json']
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.output = os.path.join(self.directory.name, 'results.json')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_percentile(self):
+        samples = list(range(1, 101))
+        self.assertEqual(percentile(samples, 50), 50)
+        self.assertEqual(percentile(samples, 99), 99)
+        self.assertEqual(percentile([3.0], 95), 3.0)
+
+    """Tests that every view of the mix is reported and the database is left as it was"""
+    def test_benchmark_current_database(self):
+        user_types = dict(User.objects.values_list('username', 'user_type'))
+        self._benchmark(requests=60)
+        with open(self.output) as output:
+            results = json.load(output)
+        dataset = results['datasets']['current']
+        self.assertEqual(dataset['users'], User.objects.count())
+        self.assertEqual(set(dataset['views']), set(MIX))
+        for view in dataset['views'].values():
+            self.assertLessEqual(view['p50_ms'], view['p95_ms'])
+            self.assertLessEqual(view['p95_ms'], view['p99_ms'])
+            self.assertGreater(view['peak_memory_kib'], 0)
+        self.assertGreater(dataset['views']['view_members']['queries'], 0)
+        self.assertEqual(dict(User.objects.values_list('username', 'user_type')), user_types)
+        self.assertEqual(User.objects.get(username='johndoe1').application_status, ApplicationStatus.PENDING)
+
+    """Tests that a run is compared against its baseline"""
+    def test_regressions_against_baseline_fail(self):
+        self._benchmark(requests=30)
+        with open(self.output) as output:
+            baseline = json.load(output)
+        self.assertEqual(compare(baseline, baseline, 0.25), [])
+        baseline['datasets']['current']['views']['profile']['queries'] = 0
+        baseline_path = os.path.join(self.directory.name, 'baseline.json')
+        with open(baseline_path, 'w') as baseline_file:
+            json.dump(baseline, baseline_file)
+        with self.assertRaisesMessage(CommandError, 'regressions against'):
+            self._benchmark(requests=30, baseline=baseline_path)
+
+    def test_slowdowns_within_tolerance_pass(self):
+        view = {'queries': 2, 'p95_ms': 10.0, 'peak_memory_kib': 100}
+        baseline = {'datasets': {'1000': {'views': {'profile': view}}}}
+        slower = {'datasets': {'1000': {'views': {'profile': {**view, 'p95_ms': 12.0}}}}}
+        much_slower = {'datasets': {'1000': {'views': {'profile': {**view, 'p95_ms': 20.0}}}}}
+        self.assertEqual(compare(slower, baseline, 0.25), [])
+        self.assertEqual(len(compare(much_slower, baseline, 0.25)), 1)
+
+    def test_database_without_an_owner_is_refused(self):
+        User.objects.filter(user_type=UserType.OWNER).delete()
+        with self.assertRaises(CommandError):
+            self._benchmark(requests=10)
+
+    def _benchmark(self, **options):
+        call_command('benchmark', use_current_database=True, output=self.output,
+                     stdout=StringIO(), stderr=StringIO(), **options)
@@ -0,0 +1,50 @@
+"""Tests of the workers of the benchmark_sqlite management command"""
+import os
+import sqlite3
+import tempfile
+import time
+from django.conf import settings
+from django.test import SimpleTestCase
+from clubs.management.commands.benchmark_sqlite import Command, DEFAULT_PRAGMAS, contend
+
+class BenchmarkSQLiteCommandTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'contention.sqlite3')
+        connection = sqlite3.connect(self.path)
+        connection.execute(
+            'CREATE TABLE clubs_user (id INTEGER PRIMARY KEY, username TEXT, first_name TEXT, last_name TEXT, '
+            'email_hash TEXT, user_type INTEGER, updated_at TEXT)'
+        )
+        connection.executemany(
+            'INSERT INTO clubs_user (username, user_type) VALUES (?, 1)',
+            [(f'member{index}',) for index in range(50)],
+        )
+        connection.commit()
+        connection.close()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_writers_and_readers(self):
+        for pragmas in (DEFAULT_PRAGMAS, settings.TUNED_SQLITE_PRAGMAS):
+            deadline = time.time() + 0.2
+            writer, writes, locked = contend(self.path, pragmas, 0, deadline)
+            self.assertTrue(writer)
+            self.assertGreater(writes, 0)
+            self.assertEqual(locked, 0)
+            reader, reads, _ = contend(self.path, pragmas, 1, deadline + 0.2)
+            self.assertFalse(reader)
+            self.assertGreater(reads, 0)
+        connection = sqlite3.connect(self.path)
+        self.assertEqual(connection.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+        self.assertGreater(connection.execute('SELECT COUNT(*) FROM clubs_user WHERE updated_at IS NOT NULL').fetchone()[0], 0)
+        connection.close()
+
+    """Tests that the workers run when started with spawn, as on macOS and Windows"""
+    def test_contention_with_spawned_workers(self):
+        options = {'workers': 2, 'duration': 0.5, 'data_dir': self.directory.name, 'start_method': 'spawn'}
+        result = Command().contention(self.path, settings.TUNED_SQLITE_PRAGMAS, options)
+        self.assertGreater(result['writes_per_second'], 0)
+        self.assertGreater(result['reads_per_second'], 0)
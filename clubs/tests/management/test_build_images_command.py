@@ -0,0 +1,34 @@
+"""Tests of the build_images management command"""
+import os
+import shutil
+import tempfile
+import unittest
+from io import StringIO
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from clubs.images import RESPONSIVE_IMAGES, VARIANT_FORMATS, variant_path
+from clubs.management.commands.build_images import Image
+
+@unittest.skipIf(Image is None, 'Pillow is not installed')
+class BuildImagesCommandTestCase(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        for path in RESPONSIVE_IMAGES:
+            os.makedirs(os.path.join(self.directory.name, os.path.dirname(path)), exist_ok=True)
+            shutil.copy(os.path.join(settings.STATICFILES_DIRS[0], path), os.path.join(self.directory.name, path))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_variants_are_smaller_than_their_source(self):
+        with override_settings(STATICFILES_DIRS=[self.directory.name]):
+            call_command('build_images', stdout=StringIO())
+        for path, (_, widths) in RESPONSIVE_IMAGES.items():
+            source_size = os.path.getsize(os.path.join(self.directory.name, path))
+            for extension, _, _ in VARIANT_FORMATS:
+                variant = os.path.join(self.directory.name, variant_path(path, widths[0], extension))
+                with Image.open(variant) as image:
+                    self.assertEqual(image.width, widths[0])
+                self.assertLess(os.path.getsize(variant), source_size)
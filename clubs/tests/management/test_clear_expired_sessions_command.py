@@ -0,0 +1,42 @@
+"""Tests of the clear_expired_sessions management command"""
+from datetime import timedelta
+from io import StringIO
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+class ClearExpiredSessionsCommandTestCase(TestCase):
+
+    def setUp(self):
+        now = timezone.now()
+        for index in range(5):
+            Session.objects.create(session_key=f'expired{index}', session_data='', expire_date=now - timedelta(days=1))
+        Session.objects.create(session_key='current', session_data='', expire_date=now + timedelta(days=1))
+
+    def test_expired_sessions_are_deleted(self):
+        self._clear()
+        self.assertEqual(list(Session.objects.values_list('session_key', flat=True)), ['current'])
+
+    def test_sessions_are_deleted_in_batches(self):
+        with CaptureQueriesContext(connection) as queries:
+            self._clear(batch_size=2)
+        deletes = [query for query in queries.captured_queries if query['sql'].startswith('DELETE')]
+        self.assertEqual(len(deletes), 3)
+        self.assertEqual(Session.objects.count(), 1)
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db')
+    def test_cached_db_sessions_are_deleted(self):
+        self._clear()
+        self.assertEqual(Session.objects.count(), 1)
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cache')
+    def test_sessions_outside_the_database_raise_error(self):
+        with self.assertRaises(CommandError):
+            self._clear()
+
+    def _clear(self, **options):
+        call_command('clear_expired_sessions', sleep=0, stdout=StringIO(), **options)
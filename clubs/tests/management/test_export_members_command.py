@@ -0,0 +1,40 @@
+"""Tests of the export_members management command"""
+import csv
+import io
+import json
+import os
+import tempfile
+from django.core.management import call_command
+from django.test import TestCase
+from clubs.models import User
+from clubs import exports
+
+class ExportMembersCommandTestCase(TestCase):
+    fixtures = ['clubs/tests/fixtures/default_user.json', 'clubs/tests/fixtures/other_users.json']
+
+    def test_export_every_role_by_default(self):
+        rows = list(csv.DictReader(io.StringIO(self._export())))
+        self.assertEqual(len(rows), User.objects.count())
+        self.assertEqual([int(row['id']) for row in rows], sorted(User.objects.values_list('id', flat=True)))
+
+    def test_export_chosen_roles_as_json_lines(self):
+        output = self._export(role=['officers', 'owners'], format='jsonl')
+        rows = [json.loads(line) for line in output.splitlines()]
+        self.assertEqual({row['username'] for row in rows}, {'bobsmith1', 'jillbrown1'})
+
+    def test_export_reads_in_chunks(self):
+        chunks = list(exports.iter_users(list(exports.ROLE_NAMES.values()), chunk_size=2))
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+
+    def test_export_to_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'members.csv')
+            self._export(role=['members'], output=path)
+            with open(path) as export:
+                rows = list(csv.DictReader(export))
+        self.assertEqual([row['username'] for row in rows], ['janedoe1', 'billysmith1'])
+
+    def _export(self, **options):
+        stdout = io.StringIO()
+        call_command('export_members', chunk_size=2, stdout=stdout, **options)
+        return stdout.getvalue()
@@ -0,0 +1,169 @@
+"""Tests of the import_members management command"""
+import csv
+import json
+import os
+import tempfile
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from clubs.models import User, UserType
+from clubs import search
+
+class ImportMembersCommandTestCase(TestCase):
+
+    fixtures = ['clubs/tests/fixtures/default_user.json']
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.user = User.objects.get(username='johndoe1')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_import_csv_creates_members(self):
+        path = self._write_csv([self._row('janedoe'), self._row('petrapickles')])
+        self._import(path)
+        jane = User.objects.get(username='janedoe')
+        self.assertEqual(jane.user_type, UserType.MEMBER)
+        self.assertTrue(jane.is_member)
+        self.assertTrue(jane.check_password('Password123'))
+        self.assertTrue(jane.email_hash)
+        self.assertTrue(User.objects.filter(username='petrapickles').exists())
+
+    def test_import_jsonl_creates_members(self):
+        path = self._write_jsonl([self._row('janedoe'), self._row('petrapickles')])
+        self._import(path)
+        self.assertEqual(User.objects.filter(username__in=['janedoe', 'petrapickles']).count(), 2)
+
+    def test_import_updates_existing_username(self):
+        row = self._row('johndoe1', first_name='Johnny', email=self.user.email)
+        path = self._write_jsonl([row])
+        self._import(path, update_existing=True)
+        user = User.objects.get(username='johndoe1')
+        self.assertEqual(user.first_name, 'Johnny')
+        self.assertEqual(user.user_type, self.user.user_type)
+        self.assertEqual(User.objects.count(), 1)
+
+    """Tests that existing users are left alone without --update-existing"""
+    def test_existing_username_is_rejected_by_default(self):
+        rejects_path = os.path.join(self.directory.name, 'rejects.jsonl')
+        self._import(self._write_jsonl([self._row('johndoe1', first_name='Johnny')]), rejects=rejects_path)
+        user = User.objects.get(username='johndoe1')
+        self.assertEqual(user.first_name, self.user.first_name)
+        self.assertEqual(user.password, self.user.password)
+        with open(rejects_path) as rejects:
+            self.assertIn('--update-existing', json.loads(rejects.readline())['errors']['username'][0])
+
+    """Tests that an import cannot reset the password of an officer or the owner"""
+    def test_officers_and_owner_are_never_updated(self):
+        for user_type in (UserType.OFFICER, UserType.OWNER):
+            with self.subTest(user_type=user_type):
+                self.user.user_type = user_type
+                self.user.save()
+                self._import(self._write_jsonl([self._row('johndoe1', password='Hijacked123')]), update_existing=True)
+                self.assertTrue(User.objects.get(username='johndoe1').check_password('Password123'))
+
+    """Tests that a CSV row with more fields than the header is rejected and the import carries on"""
+    def test_csv_row_with_extra_fields_is_rejected(self):
+        path = self._write_csv([self._row('janedoe'), self._row('petrapickles')])
+        with open(path, 'a', newline='') as source:
+            csv.writer(source).writerow(['x'] * 12)
+            csv.writer(source).writerow(['Hello', 'bobsmith@example.org', 'BEGINNER', 'Bob', 'Smith',
+                                         'Password123', 'I like chess', 'bobsmith'])
+        rejects_path = os.path.join(self.directory.name, 'rejects.jsonl')
+        self._import(path, rejects=rejects_path)
+        self.assertEqual(User.objects.filter(username__in=['janedoe', 'petrapickles', 'bobsmith']).count(), 3)
+        with open(rejects_path) as rejects:
+            rejected = [json.loads(line) for line in rejects]
+        self.assertEqual([reject['line'] for reject in rejected], [4])
+        self.assertEqual(rejected[0]['errors'], {'__all__': ['Row has more fields than the header']})
+        self.assertNotIn('password', rejected[0]['row'])
+
+    def test_invalid_rows_are_rejected(self):
+        rows = [
+            self._row('janedoe'),
+            self._row('petrapickles', password='weak', password_confirm='weak'),
+            self._row('x'),
+            self._row('bobsmith', email=self.user.email),
+        ]
+        path = self._write_jsonl(rows)
+        rejects_path = os.path.join(self.directory.name, 'rejects.jsonl')
+        self._import(path, rejects=rejects_path)
+        self.assertEqual(list(User.objects.order_by('username').values_list('username', flat=True)), ['janedoe', 'johndoe1'])
+        with open(rejects_path) as rejects:
+            rejected = [json.loads(line) for line in rejects]
+        self.assertEqual([reject['line'] for reject in rejected], [2, 3, 4])
+        self.assertIn('password', rejected[0]['errors'])
+        self.assertIn('username', rejected[1]['errors'])
+        self.assertIn('email', rejected[2]['errors'])
+        for reject in rejected:
+            self.assertNotIn('password', reject['row'])
+
+    def test_unparseable_lines_are_rejected(self):
+        path = os.path.join(self.directory.name, 'members.jsonl')
+        with open(path, 'w') as source:
+            source.write('not json\n')
+            source.write(json.dumps(self._row('janedoe')) + '\n')
+        rejects_path = os.path.join(self.directory.name, 'rejects.jsonl')
+        self._import(path, rejects=rejects_path)
+        self.assertTrue(User.objects.filter(username='janedoe').exists())
+        with open(rejects_path) as rejects:
+            self.assertEqual(json.loads(rejects.readline())['line'], 1)
+
+    def test_duplicate_username_in_file_keeps_last_row(self):
+        rows = [self._row('janedoe', first_name='First'), self._row('janedoe', first_name='Second')]
+        self._import(self._write_csv(rows))
+        self.assertEqual(User.objects.get(username='janedoe').first_name, 'Second')
+
+    def test_imported_members_are_searchable(self):
+        self._import(self._write_csv([self._row('janedoe', first_name='Zebedee')]))
+        self.user.user_type = UserType.OFFICER
+        self.user.save()
+        page = search.search_users(self.user, 'Zebedee', None, 10)
+        self.assertEqual([user.username for user in page], ['janedoe'])
+
+    """Tests that passwords are hashed in worker processes started with spawn, as on macOS and Windows"""
+    def test_import_with_spawned_workers(self):
+        path = self._write_csv([self._row('janedoe'), self._row('petrapickles')])
+        self._import(path, workers=2, start_method='spawn')
+        self.assertTrue(User.objects.get(username='janedoe').check_password('Password123'))
+        self.assertTrue(User.objects.filter(username='petrapickles').exists())
+
+    def test_missing_file_raises_error(self):
+        with self.assertRaises(CommandError):
+            self._import(os.path.join(self.directory.name, 'missing.csv'))
+
+    def _row(self, username, **fields):
+        row = {
+            'username': username,
+            'first_name': 'Jane',
+            'last_name': 'Doe',
+            'email': f'{username}@example.org',
+            'experience_level': 'BEGINNER',
+            'personal_statement': 'I like chess',
+            'bio': 'Hello',
+            'password': 'Password123',
+        }
+        row.update(fields)
+        return row
+
+    def _write_csv(self, rows):
+        path = os.path.join(self.directory.name, 'members.csv')
+        fieldnames = sorted({key for row in rows for key in row})
+        with open(path, 'w', newline='') as source:
+            writer = csv.DictWriter(source, fieldnames)
+            writer.writeheader()
+            writer.writerows(rows)
+        return path
+
+    def _write_jsonl(self, rows):
+        path = os.path.join(self.directory.name, 'members.jsonl')
+        with open(path, 'w') as source:
+            for row in rows:
+                source.write(json.dumps(row) + '\n')
+        return path
+
+    def _import(self, path, **options):
+        options.setdefault('workers', 1)
+        call_command('import_members', path, batch_size=2, stdout=StringIO(), **options)
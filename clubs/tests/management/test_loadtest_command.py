@@ -0,0 +1,41 @@
+"""Tests of the loadtest management command"""
+import json
+import os
+import tempfile
+from io import StringIO
+from django.core.management import call_command
+from django.test import TransactionTestCase
+from clubs.management.commands.loadtest import invariant_violations
+from clubs.models import User, UserType
+
+class LoadtestCommandTestCase(TransactionTestCase):
+    fixtures = ['clubs/tests/fixtures/default_user.json', 'clubs/tests/fixtures/other_users.json']
+
+    def setUp(self):
+        User.objects.filter(username='billysmith1').update(user_type=UserType.OFFICER)
+        self.directory = tempfile.TemporaryDirectory()
+        self.output = os.path.join(self.directory.name, 'results.json')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_fixtures_keep_the_invariants(self):
+        self.assertEqual(invariant_violations(), {})
+
+    def test_two_owners_break_an_invariant(self):
+        User.objects.filter(username='bobsmith1').update(user_type=UserType.OWNER)
+        self.assertEqual(invariant_violations(), {'owners other than exactly one': 1})
+
+    """Tests that an intake day against a live server is reported and keeps the invariants"""
+    def test_intake_day(self):
+        call_command('loadtest', use_current_database=True, clients=5, duration=1.5,
+                     output=self.output, stdout=StringIO(), stderr=StringIO())
+        with open(self.output) as output:
+            results = json.load(output)
+        self.assertEqual(results['scenario'], 'intake_day')
+        self.assertGreater(results['requests'], 0)
+        self.assertGreater(results['requests_per_second'], 0)
+        self.assertIn('sign_up_form', results['steps'])
+        self.assertGreater(results['invariant_checks'], 0)
+        self.assertEqual(results['invariant_violations'], {})
+        self.assertEqual(User.objects.filter(user_type=UserType.OWNER).count(), 1)
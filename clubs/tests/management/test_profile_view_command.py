@@ -0,0 +1,56 @@
+"""Tests of the profile_view management command"""
+import os
+import tempfile
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from clubs.models import User
+
+class ProfileViewCommandTestCase(TestCase):
+    fixtures = ['clubs/tests/fixtures/default_user.json', 'clubs/tests/fixtures/other_users.json']
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.output = os.path.join(self.directory.name, 'view')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    """Tests that rendering user_list.html is profiled"""
+    def test_profile_user_list(self):
+        self._profile_view('/view_members/', user='bobsmith1')
+        self.assertTrue(os.path.exists(f'{self.output}.prof'))
+        stacks = self._stacks()
+        self.assertTrue(any('clubs/views.py' in line and '(user_list)' in line for line in stacks))
+        self.assertTrue(any('(user_list)' in line and 'django/template/base.py' in line for line in stacks))
+
+    """Tests that signing up is profiled through SignUpForm and then rolled back"""
+    def test_profile_sign_up(self):
+        before = User.objects.count()
+        self._profile_view('/sign_up/', method='post', repeat=2, data=[
+            'username=profiled1', 'first_name=Profiled', 'last_name=User',
+            'email=profiled1@example.org', 'experience_level=BEGINNER', 'bio=Bio',
+            'personal_statement=Statement', 'password=Password123', 'password_confirm=Password123',
+        ])
+        self.assertTrue(any('clubs/forms.py' in line and '(clean)' in line for line in self._stacks()))
+        self.assertEqual(User.objects.count(), before)
+
+    def test_unknown_url_is_refused(self):
+        with self.assertRaisesMessage(CommandError, 'is not a url of this site'):
+            self._profile_view('/no_such_page/')
+
+    def test_unknown_user_is_refused(self):
+        with self.assertRaisesMessage(CommandError, 'There is no user'):
+            self._profile_view('/profile/', user='nobody')
+
+    def test_malformed_data_is_refused(self):
+        with self.assertRaisesMessage(CommandError, 'is not FIELD=VALUE'):
+            self._profile_view('/sign_up/', method='post', data=['username'])
+
+    def _profile_view(self, url, **options):
+        call_command('profile_view', url, output=self.output, stdout=StringIO(), **options)
+
+    def _stacks(self):
+        with open(f'{self.output}.collapsed') as collapsed:
+            return collapsed.read().splitlines()
@@ -0,0 +1,57 @@
+"""Tests of the seed management command"""
+from io import StringIO
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from clubs.models import User, UserType
+from clubs.management.commands.seed import Command
+
+class SeedCommandTestCase(TestCase):
+
+    def test_seed_creates_requested_counts(self):
+        self._seed(applicants=4, members=7, officers=3)
+        self.assertEqual(User.objects.filter(user_type=UserType.APPLICANT).count(), 4)
+        # jebKerman is a member, valKerman an officer and bilKerman the owner
+        self.assertEqual(User.objects.filter(user_type=UserType.MEMBER).count(), 8)
+        self.assertEqual(User.objects.filter(user_type=UserType.OFFICER).count(), 4)
+        self.assertEqual(User.objects.filter(user_type=UserType.OWNER).count(), 1)
+
+    def test_seeded_users_can_log_in(self):
+        self._seed(applicants=1, members=1, officers=1)
+        user = User.objects.exclude(username__endswith='Kerman').first()
+        self.assertTrue(user.check_password('Password123'))
+        self.assertTrue(User.objects.get(username='bilKerman').check_password('Password123'))
+        self.assertEqual(User.objects.values('password').distinct().count(), 1)
+
+    def test_seeded_users_have_email_hashes(self):
+        self._seed(applicants=2, members=2, officers=2)
+        self.assertFalse(User.objects.filter(email_hash='').exists())
+
+    def test_seed_resumes(self):
+        self._seed(applicants=2, members=5, officers=0)
+        first_run = set(User.objects.values_list('username', flat=True))
+        self._seed(applicants=2, members=9, officers=1)
+        second_run = set(User.objects.values_list('username', flat=True))
+        self.assertTrue(first_run < second_run)
+        self.assertEqual(User.objects.filter(user_type=UserType.MEMBER).count(), 10)
+        self.assertEqual(User.objects.filter(user_type=UserType.APPLICANT).count(), 2)
+
+    """Tests that counting the users an earlier run seeded is a range scan of the role index"""
+    def test_seeded_count_uses_role_index(self):
+        self._seed(applicants=0, members=2, officers=0)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(Command().seeded_count(UserType.MEMBER), 2)
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {queries[0]["sql"]}')
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn('clubs_user_type_username_idx', plan)
+        self.assertIn('username>?', plan)
+
+    """Tests that users are generated in worker processes started with spawn, as on macOS and Windows"""
+    def test_seed_with_spawned_workers(self):
+        self._seed(applicants=4, members=0, officers=0, workers=2, start_method='spawn')
+        self.assertEqual(User.objects.filter(user_type=UserType.APPLICANT).count(), 4)
+
+    def _seed(self, workers=1, **options):
+        call_command('seed', batch_size=3, workers=workers, stdout=StringIO(), **options)
@@ -0,0 +1,61 @@
+"""Tests of the vendor_assets management command"""
+import io
+import json
+import os
+import tempfile
+from unittest import mock
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, override_settings
+from clubs.vendor import MANIFEST, integrity_of
+
+CONTENT = {
+    'https://cdn.example.org/library.css': b'body { margin: 0 }',
+    'https://cdn.example.org/icons.woff2': b'wOF2',
+}
+ASSETS = {
+    'vendor/library/library.css': ('https://cdn.example.org/library.css', integrity_of(CONTENT['https://cdn.example.org/library.css'])),
+    'vendor/library/icons.woff2': ('https://cdn.example.org/icons.woff2', None),
+}
+
+class VendorAssetsCommandTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(STATICFILES_DIRS=[self.directory.name])
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.directory.cleanup()
+
+    """Tests that downloaded assets are written with their integrity hashes"""
+    def test_vendor_assets_writes_manifest(self):
+        self._vendor()
+        for path, (url, _) in ASSETS.items():
+            with open(os.path.join(self.directory.name, path), 'rb') as asset:
+                self.assertEqual(asset.read(), CONTENT[url])
+        with open(os.path.join(self.directory.name, MANIFEST)) as manifest:
+            self.assertEqual(json.load(manifest), {path: integrity_of(CONTENT[url]) for path, (url, _) in ASSETS.items()})
+        self._vendor(check=True)
+
+    def test_download_not_matching_pinned_integrity(self):
+        with self.assertRaises(CommandError):
+            self._vendor(content={**CONTENT, 'https://cdn.example.org/library.css': b'tampered'})
+
+    """Tests that the check fails on missing or changed files, without downloading anything"""
+    def test_check_finds_missing_and_changed_assets(self):
+        with self.assertRaises(CommandError):
+            self._vendor(check=True)
+        self._vendor()
+        with open(os.path.join(self.directory.name, 'vendor/library/icons.woff2'), 'wb') as asset:
+            asset.write(b'changed')
+        with self.assertRaisesMessage(CommandError, 'vendor/library/icons.woff2 does not match'):
+            self._vendor(check=True)
+
+    def _vendor(self, content=CONTENT, **options):
+        def urlopen(url, timeout):
+            return io.BytesIO(content[url])
+        with mock.patch('clubs.management.commands.vendor_assets.VENDOR_ASSETS', ASSETS), \
+                mock.patch('clubs.management.commands.vendor_assets.urlopen', urlopen):
+            call_command('vendor_assets', stdout=io.StringIO(), **options)
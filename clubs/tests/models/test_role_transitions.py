@@ -0,0 +1,71 @@
+"""Tests for the conditional role transitions"""
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from clubs.models import User, UserType, ApplicationStatus
+from clubs import transitions
+
+class RoleTransitionTestCase(TestCase):
+    fixtures = ['clubs/tests/fixtures/default_user.json', 'clubs/tests/fixtures/other_users.json']
+
+    def setUp(self):
+        self.applicant = User.objects.get(username='johndoe1')
+        self.member = User.objects.get(username='janedoe1')
+        self.officer = User.objects.get(username='bobsmith1')
+        self.owner = User.objects.get(username='jillbrown1')
+
+    def test_transition_is_a_single_update(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(transitions.promote_member(self.member.id))
+        self._assert_single_user_update(queries)
+        self.member.refresh_from_db()
+        self.assertEqual(self.member.user_type, UserType.OFFICER)
+
+    def test_transition_loses_when_role_already_changed(self):
+        self.assertTrue(transitions.demote_officer(self.officer.id))
+        self.assertFalse(transitions.demote_officer(self.officer.id))
+
+    def test_transition_on_missing_user(self):
+        self.assertFalse(transitions.accept_application(self.applicant.id + 9999))
+
+    def test_model_method_only_updates_memory_when_it_wins(self):
+        stale_applicant = User.objects.get(id=self.applicant.id)
+        self.assertTrue(self.officer.accept_application(self.applicant))
+        self.assertEqual(self.applicant.user_type, UserType.MEMBER)
+        self.assertEqual(self.applicant.application_status, ApplicationStatus.ACCEPTED)
+        self.assertFalse(self.officer.accept_application(stale_applicant))
+        self.assertEqual(stale_applicant.user_type, UserType.APPLICANT)
+
+    def test_transfer_ownership_is_a_single_update(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(transitions.transfer_ownership(self.owner.id, self.officer.id))
+        self._assert_single_user_update(queries)
+        self.owner.refresh_from_db()
+        self.officer.refresh_from_db()
+        self.assertEqual(self.owner.user_type, UserType.OFFICER)
+        self.assertEqual(self.officer.user_type, UserType.OWNER)
+
+    def test_transfer_ownership_to_non_officer_changes_nothing(self):
+        self.assertFalse(transitions.transfer_ownership(self.owner.id, self.member.id))
+        self.owner.refresh_from_db()
+        self.member.refresh_from_db()
+        self.assertEqual(self.owner.user_type, UserType.OWNER)
+        self.assertEqual(self.member.user_type, UserType.MEMBER)
+
+    def test_only_one_transfer_of_ownership_wins(self):
+        other_officer = User.objects.create_user(
+            'otherofficer', email='other@example.org', first_name='Other',
+            last_name='Officer', user_type=UserType.OFFICER, password='Password123')
+        self.assertTrue(transitions.transfer_ownership(self.owner.id, self.officer.id))
+        self.assertFalse(transitions.transfer_ownership(self.owner.id, other_officer.id))
+        self.assertEqual(User.objects.filter(user_type=UserType.OWNER).count(), 1)
+
+    def _statements(self, queries):
+        return [query['sql'] for query in queries if 'SAVEPOINT' not in query['sql']]
+
+    def _assert_single_user_update(self, queries):
+        statements = self._statements(queries)
+        # One UPDATE of the users, plus one marking their lists as changed
+        self.assertEqual(len(statements), 2)
+        self.assertTrue(statements[0].startswith('UPDATE "clubs_user" '))
+        self.assertTrue(statements[1].startswith('UPDATE "clubs_userlistwatermark" '))
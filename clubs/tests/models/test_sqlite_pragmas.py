@@ -0,0 +1,60 @@
+"""Tests of the pragmas set on SQLite connections"""
+import os
+import tempfile
+from django.conf import settings
+from django.db import connections
+from django.test import TestCase, override_settings
+from clubs.sqlite import check_sqlite_pragmas, pragma_mismatches
+
+class SQLitePragmasTestCase(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'pragmas.sqlite3')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    """Tests that the tuned pragmas are set on every new connection"""
+    def test_tuned_pragmas_are_set_on_new_connections(self):
+        with override_settings(SQLITE_PRAGMAS=settings.TUNED_SQLITE_PRAGMAS):
+            connection = self._connect()
+            try:
+                self.assertEqual(pragma_mismatches(connection), [])
+                with connection.cursor() as cursor:
+                    cursor.execute('PRAGMA journal_mode')
+                    self.assertEqual(cursor.fetchone()[0], 'wal')
+                    cursor.execute('PRAGMA synchronous')
+                    self.assertEqual(cursor.fetchone()[0], 1)
+                    cursor.execute('PRAGMA busy_timeout')
+                    self.assertEqual(cursor.fetchone()[0], 5000)
+            finally:
+                connection.close()
+
+    def test_default_connections_keep_sqlite_defaults(self):
+        connection = self._connect()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode')
+                self.assertEqual(cursor.fetchone()[0], 'delete')
+        finally:
+            connection.close()
+
+    """Tests that pragmas which did not take effect are found"""
+    def test_mismatched_pragmas_are_reported(self):
+        connection = self._connect()
+        try:
+            with override_settings(SQLITE_PRAGMAS={'journal_mode': 'wal', 'synchronous': 'full'}):
+                self.assertEqual(pragma_mismatches(connection), [('journal_mode', 'wal', 'delete')])
+        finally:
+            connection.close()
+
+    def test_in_memory_test_database_is_not_checked(self):
+        with override_settings(SQLITE_PRAGMAS=settings.TUNED_SQLITE_PRAGMAS):
+            self.assertEqual(check_sqlite_pragmas(None, databases=['default']), [])
+
+    def _connect(self):
+        connection = connections['default'].copy()
+        connection.settings_dict['NAME'] = self.path
+        connection.ensure_connection()
+        return connection
@@ -1,5 +1,7 @@
+import hashlib
+from unittest import mock
 from django.test import TestCase
-from clubs.models import User
+from clubs.models import User, UserType, ApplicationStatus
 from django.core.exceptions import ValidationError
 
 class UnitTestCase(TestCase):
@@ -175,10 +177,51 @@ class UnitTestCase(TestCase):
         self._assert_user_is_invalid()
 
     def test_default_application_status(self):
-        self.assertEqual(self.test_user.application_status, "PENDING")
-        self.assertEqual(self.member.application_status, "PENDING")
-        self.assertEqual(self.officer.application_status, "PENDING")
-        self.assertEqual(self.owner.application_status, "PENDING")
+        self.assertEqual(self.test_user.application_status, ApplicationStatus.PENDING)
+        self.assertEqual(self.member.application_status, ApplicationStatus.PENDING)
+        self.assertEqual(self.officer.application_status, ApplicationStatus.PENDING)
+        self.assertEqual(self.owner.application_status, ApplicationStatus.PENDING)
+
+    def test_role_helpers(self):
+        self.assertTrue(self.test_user.is_applicant)
+        self.assertTrue(self.member.is_member)
+        self.assertTrue(self.officer.is_officer)
+        self.assertTrue(self.owner.is_owner)
+        self.assertFalse(self.owner.is_officer)
+        self.assertFalse(self.test_user.is_rejected)
+
+    def test_unknown_user_type_is_invalid(self):
+        self.test_user.user_type = 7
+
+        self._assert_user_is_invalid()
+
+    def test_misspelt_user_type_cannot_be_queried(self):
+        with self.assertRaises(ValueError):
+            list(User.objects.filter(user_type='APPLICANT '))
+
+    def test_user_type_display(self):
+        self.assertEqual(self.officer.user_type, UserType.OFFICER)
+        self.assertEqual(self.officer.get_user_type_display(), 'OFFICER')
+
+    def test_gravatar(self):
+        self.assertEqual(
+            self.member.gravatar(),
+            'https://www.gravatar.com/avatar/' + hashlib.md5(b'janedoe@example.org').hexdigest() + '?size=120&default=mp'
+        )
+        self.assertIn('size=60', self.member.mini_gravatar())
+
+    def test_email_hash_follows_email(self):
+        self.member.email = ' Jane.Doe@Example.org '
+        self.member.save()
+        self.member.refresh_from_db()
+        self.assertEqual(self.member.email_hash, hashlib.md5(b'jane.doe@example.org').hexdigest())
+
+    def test_gravatar_does_not_hash_saved_users(self):
+        self.member.save()
+        with mock.patch('clubs.avatars.email_hash') as email_hash:
+            self.member.gravatar()
+            self.member.mini_gravatar()
+        email_hash.assert_not_called()
 
     def _assert_user_is_valid(self):
         try:
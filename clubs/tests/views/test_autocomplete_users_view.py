@@ -0,0 +1,99 @@
+""" tests of the username and name autocomplete endpoint """
+from django.test import TestCase
+from django.db import connection
+from django.db.models.functions import Lower
+from clubs.models import User, UserType
+from django.urls import reverse
+from clubs.tests.helpers import reverse_with_next
+from clubs import autocomplete, caching, transitions
+
+class AutocompleteUsersViewTestCase(TestCase):
+    fixtures = ['clubs/tests/fixtures/default_user.json', 'clubs/tests/fixtures/other_users.json']
+
+    def setUp(self):
+        autocomplete.cache.clear()
+        self.url = reverse('autocomplete_users')
+        self.member = User.objects.get(username='janedoe1')
+        self.officer = User.objects.get(username='bobsmith1')
+        self.owner = User.objects.get(username='jillbrown1')
+
+    def test_autocomplete_url(self):
+        self.assertEqual(self.url, '/autocomplete/')
+
+    """Tests that usernames, first names and last names are matched by prefix"""
+    def test_autocomplete_matches_prefixes(self):
+        self.client.login(username=self.officer.username, password='Password123')
+        response = self.client.get(self.url, {'q': 'J'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'results': [
+            {'id': self.member.id, 'username': 'janedoe1', 'name': 'Jane Doe'},
+            {'id': 1, 'username': 'johndoe1', 'name': 'John Doe'},
+        ]})
+        response = self.client.get(self.url, {'q': 'smi'})
+        self.assertEqual([result['username'] for result in response.json()['results']], ['billysmith1'])
+
+    """Tests that only roles the viewer may list are returned"""
+    def test_autocomplete_respects_listed_roles(self):
+        self.client.login(username=self.owner.username, password='Password123')
+        response = self.client.get(self.url, {'q': 'smith'})
+        self.assertEqual([result['username'] for result in response.json()['results']], ['billysmith1', 'bobsmith1'])
+
+    """Tests that repeated prefixes are answered from the cache"""
+    def test_autocomplete_caches_prefixes(self):
+        self.client.login(username=self.officer.username, password='Password123')
+        self.client.get(self.url, {'q': 'doe'})
+        with self.assertNumQueries(1):
+            # Session lookup only, the user comes from the user cache
+            response = self.client.get(self.url, {'q': 'doe'})
+        self.assertEqual(len(response.json()['results']), 2)
+
+    """Tests that role transitions, which skip post_save, still clear cached results"""
+    def test_transitions_invalidate_cached_results(self):
+        self.client.login(username=self.officer.username, password='Password123')
+        self.assertEqual(self._usernames('jane'), ['janedoe1'])
+        transitions.promote_member(self.member.id)
+        self.assertEqual(self._usernames('jane'), [])
+
+        self.client.login(username=self.owner.username, password='Password123')
+        self.assertEqual(self._usernames('john'), [])
+        transitions.review_applications([1], accept=True)
+        self.assertEqual(self._usernames('john'), ['johndoe1'])
+
+    """Tests that the prefix lookups are range scans on the lowercased indexes"""
+    def test_autocomplete_uses_indexes(self):
+        for field in autocomplete.PREFIX_FIELDS:
+            users = (
+                User.objects.annotate(prefix_key=Lower(field))
+                .filter(user_type=UserType.MEMBER, prefix_key__gte='ab', prefix_key__lt='ac')
+                .order_by('prefix_key')
+            )
+            plan = users.explain()
+            self.assertIn(f'clubs_user_{field}_ci_idx', plan)
+            self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_cache_evicts_least_recently_used(self):
+        cache = caching.LRUCache(max_entries=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+
+    def test_cache_entries_expire(self):
+        cache = caching.LRUCache(ttl=-1)
+        cache.set('a', 1)
+        self.assertIsNone(cache.get('a'))
+
+    def test_members_cannot_autocomplete(self):
+        self.client.login(username=self.member.username, password='Password123')
+        response = self.client.get(self.url, {'q': 'b'})
+        self.assertEqual(response.status_code, 403)
+
+    def test_autocomplete_redirects_when_not_logged_in(self):
+        response = self.client.get(self.url)
+        redirect_url = reverse_with_next('log_in', self.url)
+        self.assertRedirects(response, redirect_url, status_code=302, target_status_code=200)
+
+    def _usernames(self, prefix):
+        return [result['username'] for result in self.client.get(self.url, {'q': prefix}).json()['results']]
@@ -0,0 +1,65 @@
+"""Tests of the locally rendered avatar view"""
+import tempfile
+from pathlib import Path
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from clubs.models import User
+from clubs import avatars
+
+class AvatarViewTestCase(TestCase):
+    fixtures = ['clubs/tests/fixtures/default_user.json']
+
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(AVATAR_CACHE_DIR=self.cache_dir.name)
+        self.settings_override.enable()
+        self.user = User.objects.get(username='johndoe1')
+        self.hash = avatars.email_hash(self.user.email)
+        self.url = reverse('avatar', kwargs={'email_hash': self.hash, 'size': 120})
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.cache_dir.cleanup()
+
+    def test_avatar_url(self):
+        self.assertEqual(self.url, f'/avatar/{self.hash}/120.png')
+
+    def test_get_avatar(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertIn('max-age=31536000', response['Cache-Control'])
+        self.assertIn('immutable', response['Cache-Control'])
+        body = b''.join(response.streaming_content)
+        self.assertTrue(body.startswith(b'\x89PNG'))
+        self.assertTrue((Path(self.cache_dir.name) / '120' / f'{self.hash}.png').exists())
+
+    def test_avatar_is_deterministic(self):
+        first = b''.join(self.client.get(self.url).streaming_content)
+        (Path(self.cache_dir.name) / '120' / f'{self.hash}.png').unlink()
+        second = b''.join(self.client.get(self.url).streaming_content)
+        self.assertEqual(first, second)
+        other = avatars.render_identicon(avatars.email_hash('someone@example.org'), 120)
+        self.assertNotEqual(first, other)
+
+    def test_avatar_sizes_are_bucketed(self):
+        url = reverse('avatar', kwargs={'email_hash': self.hash, 'size': 100})
+        self.client.get(url)
+        self.assertTrue((Path(self.cache_dir.name) / '120' / f'{self.hash}.png').exists())
+
+    def test_avatar_with_invalid_hash(self):
+        url = reverse('avatar', kwargs={'email_hash': 'not-a-hash', 'size': 120})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 404)
+
+    """Tests that no identicon is rendered for a hash no user has"""
+    def test_avatar_of_unknown_hash(self):
+        hash = avatars.email_hash('nobody@example.org')
+        response = self.client.get(reverse('avatar', kwargs={'email_hash': hash, 'size': 120}))
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse((Path(self.cache_dir.name) / '120' / f'{hash}.png').exists())
+
+    @override_settings(AVATAR_PROVIDER='local')
+    def test_gravatar_points_at_local_avatars(self):
+        self.assertEqual(self.user.gravatar(), self.url)
+        self.assertEqual(self.user.mini_gravatar(), reverse('avatar', kwargs={'email_hash': self.hash, 'size': 60}))
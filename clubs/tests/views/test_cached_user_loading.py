@@ -0,0 +1,80 @@
+""" tests of loading the logged in user from the user cache """
+from unittest import mock
+from django.contrib.auth import authenticate
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from clubs.models import User, UserType
+from clubs import caching, transitions
+
+class CachedUserLoadingTestCase(TestCase):
+    fixtures = ['clubs/tests/fixtures/default_user.json', 'clubs/tests/fixtures/other_users.json']
+
+    def setUp(self):
+        cache.clear()
+        caching.local_users.clear()
+        self.url = reverse('profile')
+        self.member = User.objects.get(username='janedoe1')
+        self.client.login(username=self.member.username, password='Password123')
+
+    def test_logged_in_user_is_not_selected_again(self):
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['user'], self.member)
+        self.assertFalse([query for query in queries.captured_queries if 'FROM "clubs_user"' in query['sql']])
+
+    """Tests that sessions logged in with the plain model backend stay logged in"""
+    def test_model_backend_sessions_are_kept(self):
+        self.client.force_login(self.member, backend='django.contrib.auth.backends.ModelBackend')
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['user'], self.member)
+
+    """Tests that a wrong password is only checked by the cached backend"""
+    def test_failed_login_checks_password_once(self):
+        with mock.patch.object(User, 'check_password', autospec=True, return_value=False) as check_password:
+            self.assertIsNone(authenticate(username=self.member.username, password='WrongPassword123'))
+        self.assertEqual(check_password.call_count, 1)
+
+    def test_role_transition_reloads_user(self):
+        self.client.get(self.url)
+        self.assertTrue(transitions.promote_member(self.member.id))
+        response = self.client.get(self.url)
+        self.assertEqual(response.context['user'].user_type, UserType.OFFICER)
+
+    def test_bulk_review_reloads_user(self):
+        applicant = User.objects.get(username='johndoe1')
+        self.client.login(username=applicant.username, password='Password123')
+        self.client.get(self.url)
+        transitions.review_applications([applicant.id], accept=True)
+        response = self.client.get(self.url)
+        self.assertTrue(response.context['user'].is_member)
+
+    def test_profile_edit_reloads_user(self):
+        self.client.get(self.url)
+        form_input = {
+            'first_name': 'Janet', 'last_name': 'Doe', 'username': 'janedoe1',
+            'email': self.member.email, 'bio': 'Hello', 'personal_statement': 'Hi',
+            'experience_level': 'BEGINNER',
+        }
+        self.client.post(reverse('edit_profile'), form_input)
+        response = self.client.get(self.url)
+        self.assertEqual(response.context['user'].first_name, 'Janet')
+
+    def test_password_change_elsewhere_logs_out(self):
+        self.client.get(self.url)
+        self.member.set_password('NewPassword123')
+        self.member.save()
+        response = self.client.get(self.url)
+        self.assertRedirects(response, f"{reverse('log_in')}?next={self.url}")
+
+    def test_each_request_gets_its_own_copy(self):
+        first = caching.get_user(self.member.id, lambda user_id: User.objects.get(pk=user_id))
+        first.user_type = UserType.OWNER
+        second = caching.get_user(self.member.id, lambda user_id: User.objects.get(pk=user_id))
+        self.assertEqual(second.user_type, UserType.MEMBER)
+        self.assertIsNot(first, second)
@@ -0,0 +1,134 @@
+""" tests of conditional GETs on profiles and user lists """
+from django.contrib.messages import get_messages
+from django.core.cache import cache, caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from clubs.models import User, UserListWatermark
+from clubs import helpers, transitions
+
+class ConditionalGetTestCase(TestCase):
+    fixtures = ['clubs/tests/fixtures/default_user.json', 'clubs/tests/fixtures/other_users.json']
+
+    def setUp(self):
+        cache.clear()
+        caches['fragments'].clear()
+        self.member = User.objects.get(username='janedoe1')
+        self.officer = User.objects.get(username='bobsmith1')
+        self.owner = User.objects.get(username='jillbrown1')
+        self.show_url = reverse('show_user', kwargs={'user_id': self.member.id})
+        self.client.login(username=self.owner.username, password='Password123')
+
+    def test_pages_carry_validators(self):
+        for url in (reverse('profile'), self.show_url, reverse('view_members')):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.has_header('ETag'))
+            self.assertTrue(response.has_header('Last-Modified'))
+            self.assertIn('no-cache', response['Cache-Control'])
+            self.assertIn('private', response['Cache-Control'])
+
+    def test_profile_not_modified(self):
+        etag = self.client.get(reverse('profile'))['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('profile'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(self._user_queries(queries))
+
+    def test_show_user_not_modified_costs_one_lookup(self):
+        etag = self.client.get(self.show_url)['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.show_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(self._user_queries(queries)), 1)
+        self.assertEqual(response.content, b'')
+
+    def test_show_user_modified_after_profile_user_changes(self):
+        etag = self.client.get(self.show_url)['ETag']
+        transitions.promote_member(self.member.id)
+        response = self.client.get(self.show_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Demote to Member')
+
+    """Tests that a change in the same second as the last fetch is not answered with 304"""
+    def test_if_modified_since_alone_is_not_trusted(self):
+        last_modified = self.client.get(self.show_url)['Last-Modified']
+        transitions.promote_member(self.member.id)
+        response = self.client.get(self.show_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Demote to Member')
+
+    def test_if_modified_since_with_current_etag(self):
+        first = self.client.get(self.show_url)
+        response = self.client.get(
+            self.show_url, HTTP_IF_NONE_MATCH=first['ETag'], HTTP_IF_MODIFIED_SINCE=first['Last-Modified'],
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_list_not_modified_costs_one_lookup(self):
+        url = reverse('view_members')
+        etag = self.client.get(url)['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(self._user_queries(queries))
+        watermark_queries = [query for query in queries.captured_queries if 'clubs_userlistwatermark' in query['sql']]
+        self.assertEqual(len(watermark_queries), 1)
+
+    def test_list_modified_when_role_changes(self):
+        url = reverse('view_members')
+        etag = self.client.get(url)['ETag']
+        transitions.promote_member(self.member.id)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, 'janedoe1')
+
+    def test_other_roles_lists_stay_valid(self):
+        self.client.login(username=self.officer.username, password='Password123')
+        url = reverse('view_applications')
+        etag = self.client.get(url)['ETag']
+        member = User.objects.get(username='billysmith1')
+        member.bio = 'Only the members list changes'
+        member.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    """Tests that lists of a role without a watermark row still validate"""
+    def test_list_without_watermark_not_modified(self):
+        UserListWatermark.objects.all().delete()
+        url = reverse('view_members')
+        first = self.client.get(url)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['Last-Modified'], first['Last-Modified'])
+
+    """Tests that a new deploy renders pages cached under the last one afresh"""
+    def test_deploy_changes_etags(self):
+        url = reverse('view_members')
+        etag = self.client.get(url)['ETag']
+        try:
+            with override_settings(DEPLOY_VERSION='next-release'):
+                helpers.deploy_version.cache_clear()
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        finally:
+            helpers.deploy_version.cache_clear()
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_pages_of_a_list_have_different_etags(self):
+        url = reverse('view_members')
+        self.assertNotEqual(self.client.get(url)['ETag'], self.client.get(url, {'page': 2})['ETag'])
+
+    def test_pending_messages_skip_validation(self):
+        etag = self.client.get(reverse('profile'))['ETag']
+        self.client.post(reverse('edit_profile'), {
+            'username': self.owner.username, 'first_name': 'Jill', 'last_name': 'Brown',
+            'email': self.owner.email, 'experience_level': 'BEGINNER', 'personal_statement': '', 'bio': '',
+        })
+        response = self.client.get(reverse('profile'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('ETag'))
+        self.assertTrue(list(get_messages(response.wsgi_request)))
+
+    def _user_queries(self, queries):
+        return [query for query in queries.captured_queries if 'FROM "clubs_user"' in query['sql']]
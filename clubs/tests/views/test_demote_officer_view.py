@@ -1,13 +1,13 @@
 """Tests for demoting officer to member"""
 
 from django.test import TestCase, Client
-from clubs.models import User
+from clubs.models import User, UserType
 from django.urls import reverse
 from django.contrib.auth import authenticate
-from clubs.tests.helpers import reverse_with_next
+from clubs.tests.helpers import reverse_with_next, QueryBudgetTester
 
 
-class DemoteOfficerTestCase(TestCase):
+class DemoteOfficerTestCase(TestCase, QueryBudgetTester):
     fixtures = ['clubs/tests/fixtures/default_user.json',
                 'clubs/tests/fixtures/other_users.json']
 
@@ -47,10 +47,10 @@ class DemoteOfficerTestCase(TestCase):
 
     def test_owner_demote_officer(self):
         self.client.login(username=self.owner.username, password='Password123')
+        self.assertEqual(self.officer.user_type, UserType.OFFICER)
         response = self.client.get(self.demote_url)
-        self.assertEqual(self.officer.user_type, "OFFICER")
-        self.owner.demote_officer(self.officer)
-        self.assertEqual(self.officer.user_type, "MEMBER")
+        self.officer.refresh_from_db()
+        self.assertEqual(self.officer.user_type, UserType.MEMBER)
 
     """Tests that demoting an officer that doesn't exist redirects back to the user's profile"""
 
@@ -63,3 +63,9 @@ class DemoteOfficerTestCase(TestCase):
         self.assertRedirects(response, response_url,
                              status_code=302, target_status_code=200)
         self.assertTemplateUsed(response, 'profile.html')
+
+    """Tests that demoting an officer keeps to its query budget"""
+    def test_query_budget(self):
+        self.client.login(username=self.owner.username, password='Password123')
+        response = self.client.get(self.demote_url)
+        self.assertWithinQueryBudget(response)
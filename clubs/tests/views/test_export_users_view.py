@@ -0,0 +1,62 @@
+""" tests of the streaming user list export """
+import csv
+import io
+import json
+from django.test import TestCase
+from django.http import StreamingHttpResponse
+from clubs.models import User
+from django.urls import reverse
+from clubs.tests.helpers import reverse_with_next
+
+class ExportUsersViewTestCase(TestCase):
+    fixtures = ['clubs/tests/fixtures/default_user.json', 'clubs/tests/fixtures/other_users.json']
+
+    def setUp(self):
+        self.url = reverse('export_users')
+        self.member = User.objects.get(username='janedoe1')
+        self.officer = User.objects.get(username='bobsmith1')
+        self.owner = User.objects.get(username='jillbrown1')
+
+    def test_export_url(self):
+        self.assertEqual(self.url, '/export/')
+
+    def test_export_redirects_when_not_logged_in(self):
+        redirect_url = reverse_with_next('log_in', self.url)
+        response = self.client.get(self.url)
+        self.assertRedirects(response, redirect_url, status_code=302, target_status_code=200)
+
+    def test_member_cannot_export(self):
+        self.client.login(username=self.member.username, password='Password123')
+        response = self.client.get(self.url, {'role': 'members'})
+        self.assertRedirects(response, reverse('profile'), status_code=302, target_status_code=200)
+
+    def test_owner_exports_members_as_csv(self):
+        self.client.login(username=self.owner.username, password='Password123')
+        response = self.client.get(self.url, {'role': 'members'})
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('attachment; filename="members.csv"', response['Content-Disposition'])
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual([row['username'] for row in rows], ['janedoe1', 'billysmith1'])
+        self.assertEqual(rows[0]['email'], self.member.email)
+        self.assertEqual(rows[0]['user_type'], 'MEMBER')
+
+    def test_officer_exports_applicants_as_json_lines(self):
+        self.client.login(username=self.officer.username, password='Password123')
+        response = self.client.get(self.url, {'role': 'applicants', 'format': 'jsonl'})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([row['username'] for row in rows], ['johndoe1'])
+        self.assertEqual(rows[0]['application_status'], 'PENDING')
+
+    def test_roles_outside_the_viewers_lists_are_not_found(self):
+        self.client.login(username=self.officer.username, password='Password123')
+        response = self.client.get(self.url, {'role': 'officers'})
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(self.url, {'role': 'members', 'format': 'xml'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_user_list_links_to_export(self):
+        self.client.login(username=self.owner.username, password='Password123')
+        response = self.client.get(reverse('view_officers'))
+        self.assertContains(response, f'{self.url}?role=officers&amp;format=csv')
@@ -0,0 +1,115 @@
+""" tests of the cached profile and user list fragments """
+from django.core.cache import cache, caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from clubs.models import User
+from clubs import helpers, transitions
+
+class FragmentCachingTestCase(TestCase):
+    fixtures = ['clubs/tests/fixtures/default_user.json', 'clubs/tests/fixtures/other_users.json']
+
+    def setUp(self):
+        cache.clear()
+        caches['fragments'].clear()
+        self.member = User.objects.get(username='janedoe1')
+        self.officer = User.objects.get(username='bobsmith1')
+        self.owner = User.objects.get(username='jillbrown1')
+        self.profile_url = reverse('show_user', kwargs={'user_id': self.member.id})
+
+    def test_profile_is_served_from_cache(self):
+        self.client.login(username=self.owner.username, password='Password123')
+        self.client.get(self.profile_url)
+        # A queryset update skips every invalidation hook
+        User.objects.filter(pk=self.member.pk).update(bio='Changed behind the cache')
+        response = self.client.get(self.profile_url)
+        self.assertNotContains(response, 'Changed behind the cache')
+
+    """Tests that fragments are kept in their own cache, apart from sessions and users"""
+    def test_fragments_use_their_own_cache(self):
+        self.client.login(username=self.owner.username, password='Password123')
+        self.client.get(self.profile_url)
+        User.objects.filter(pk=self.member.pk).update(bio='Changed behind the cache')
+        cache.clear()
+        self.client.login(username=self.owner.username, password='Password123')
+        self.assertNotContains(self.client.get(self.profile_url), 'Changed behind the cache')
+        caches['fragments'].clear()
+        self.assertContains(self.client.get(self.profile_url), 'Changed behind the cache')
+
+    """Tests that fragments cached by the last release are not served after a deploy"""
+    def test_deploy_refreshes_fragments(self):
+        self.client.login(username=self.owner.username, password='Password123')
+        self.client.get(self.profile_url)
+        User.objects.filter(pk=self.member.pk).update(bio='Changed behind the cache')
+        try:
+            with override_settings(DEPLOY_VERSION='next-release'):
+                helpers.deploy_version.cache_clear()
+                response = self.client.get(self.profile_url)
+        finally:
+            helpers.deploy_version.cache_clear()
+        self.assertContains(response, 'Changed behind the cache')
+
+    def test_avatar_provider_refreshes_fragments(self):
+        url = reverse('view_members')
+        self.client.login(username=self.owner.username, password='Password123')
+        self.assertContains(self.client.get(url), 'gravatar.com')
+        with override_settings(AVATAR_PROVIDER='local'):
+            response = self.client.get(url)
+        self.assertNotContains(response, 'gravatar.com')
+
+    def test_saving_the_profile_user_refreshes_profile(self):
+        self.client.login(username=self.owner.username, password='Password123')
+        self.client.get(self.profile_url)
+        self.member.bio = 'A new bio'
+        self.member.save()
+        response = self.client.get(self.profile_url)
+        self.assertContains(response, 'A new bio')
+
+    def test_profile_fragment_varies_with_viewer_role(self):
+        self.client.login(username=self.owner.username, password='Password123')
+        response = self.client.get(self.profile_url)
+        self.assertContains(response, 'Promote to Officer')
+        self.client.login(username=self.officer.username, password='Password123')
+        response = self.client.get(self.profile_url)
+        self.assertNotContains(response, 'Promote to Officer')
+
+    def test_role_transition_refreshes_profile(self):
+        self.client.login(username=self.owner.username, password='Password123')
+        self.client.get(self.profile_url)
+        transitions.promote_member(self.member.id)
+        response = self.client.get(self.profile_url)
+        self.assertContains(response, 'Demote to Member')
+
+    def test_list_rows_are_served_from_cache(self):
+        url = reverse('view_members')
+        self.client.login(username=self.owner.username, password='Password123')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertContains(response, 'janedoe1')
+        user_queries = [query['sql'] for query in queries.captured_queries if 'FROM "clubs_user"' in query['sql']]
+        # Only the page count is left
+        self.assertEqual(len(user_queries), 1)
+        self.assertIn('SELECT COUNT(', user_queries[0])
+
+    def test_list_is_refreshed_when_users_change(self):
+        url = reverse('view_members')
+        self.client.login(username=self.owner.username, password='Password123')
+        self.client.get(url)
+        User.objects.create_user(
+            'newmember1', first_name='New', last_name='Member', email='new@example.org',
+            password='Password123', user_type=self.member.user_type,
+        )
+        self.assertContains(self.client.get(url), 'newmember1')
+        transitions.promote_member(self.member.id)
+        self.assertNotContains(self.client.get(url), 'janedoe1')
+
+    def test_last_login_does_not_refresh_lists(self):
+        url = reverse('view_members')
+        self.client.login(username=self.owner.username, password='Password123')
+        self.client.get(url)
+        User.objects.filter(pk=self.member.pk).update(first_name='Behind')
+        self.client.login(username=self.member.username, password='Password123')
+        self.client.login(username=self.owner.username, password='Password123')
+        self.assertNotContains(self.client.get(url), 'Behind')
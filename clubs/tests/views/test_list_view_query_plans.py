@@ -0,0 +1,68 @@
+"""Tests of the queries behind the user list views"""
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from clubs.models import User, UserType, ApplicationStatus, LIST_FIELDS
+from django.urls import reverse
+
+class ListViewQueryPlanTestCase(TestCase):
+    fixtures = ['clubs/tests/fixtures/default_user.json', 'clubs/tests/fixtures/other_users.json']
+
+    def setUp(self):
+        self.officer = User.objects.get(username='bobsmith1')
+        self.owner = User.objects.get(username='jillbrown1')
+
+    """Tests that the applicant list uses the composite role index"""
+    def test_view_applications_uses_role_index(self):
+        self._assert_list_uses_index(self.officer, 'view_applications', 'clubs_user_type_username_idx')
+
+    """Tests that the member list uses the composite role index"""
+    def test_view_members_uses_role_index(self):
+        self._assert_list_uses_index(self.officer, 'view_members', 'clubs_user_type_username_idx')
+
+    """Tests that the officer list uses the composite role index"""
+    def test_view_officers_uses_role_index(self):
+        self._assert_list_uses_index(self.owner, 'view_officers', 'clubs_user_type_username_idx')
+
+    """Tests that looking up pending applicants uses the partial index"""
+    def test_pending_applicants_use_partial_index(self):
+        users = User.objects.filter(user_type=UserType.APPLICANT, application_status=ApplicationStatus.PENDING)
+        plan = users.explain()
+        self.assertIn('clubs_user_pending_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    """Tests that list pages only select the columns the list renders"""
+    def test_list_views_only_select_list_columns(self):
+        for viewer, url_name in [(self.officer, 'view_applications'), (self.officer, 'view_members'), (self.owner, 'view_officers')]:
+            self.client.login(username=viewer.username, password='Password123')
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse(url_name))
+            self.assertEqual(response.status_code, 200)
+            page_queries = [query['sql'] for query in queries if 'FROM "clubs_user"' in query['sql'] and 'ORDER BY' in query['sql']]
+            self.assertEqual(len(page_queries), 1)
+            selected = page_queries[0].split(' FROM ')[0][len('SELECT '):]
+            columns = {column.strip().split('.')[-1].strip('"') for column in selected.split(',')}
+            self.assertEqual(columns, set(LIST_FIELDS))
+            # The viewer, the count and the page; rendering rows loads nothing deferred
+            user_queries = [query for query in queries if 'FROM "clubs_user"' in query['sql']]
+            self.assertEqual(len(user_queries), 3)
+
+    def _assert_list_uses_index(self, viewer, url_name, index_name):
+        self.client.login(username=viewer.username, password='Password123')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(url_name))
+        self.assertEqual(response.status_code, 200)
+        list_queries = [
+            query['sql'] for query in queries
+            if 'FROM "clubs_user"' in query['sql'] and '"user_type" =' in query['sql']
+        ]
+        self.assertTrue(list_queries)
+        for sql in list_queries:
+            plan = self._explain(sql)
+            self.assertIn(index_name, plan)
+            self.assertNotIn('TEMP B-TREE', plan)
+
+    def _explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return '\n'.join(str(row[-1]) for row in cursor.fetchall())
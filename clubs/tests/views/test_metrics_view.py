@@ -0,0 +1,126 @@
+"""Tests of request timing and the metrics view"""
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+from unittest import mock
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from clubs import metrics
+from clubs.models import User
+
+class MetricsViewTestCase(TestCase):
+    fixtures = ['clubs/tests/fixtures/default_user.json', 'clubs/tests/fixtures/other_users.json']
+
+    def setUp(self):
+        self.url = reverse('metrics')
+        self.officer = User.objects.get(username='bobsmith1')
+        self.owner = User.objects.get(username='jillbrown1')
+        metrics.histograms.clear()
+
+    def test_metrics_url(self):
+        self.assertEqual(self.url, '/metrics/')
+
+    """Tests that responses say where their time went"""
+    def test_server_timing_header(self):
+        self.client.login(username=self.officer.username, password='Password123')
+        response = self.client.get(reverse('view_members'))
+        timings = dict(re.findall(r'(\w+);dur=([\d.]+)', response['Server-Timing']))
+        self.assertEqual(set(timings), {'db', 'template', 'view', 'total'})
+        self.assertGreater(float(timings['template']), 0)
+        self.assertLessEqual(float(timings['db']), float(timings['total']))
+
+    """Tests that only the owner can read the metrics"""
+    def test_officer_cannot_read_metrics(self):
+        self.client.login(username=self.officer.username, password='Password123')
+        response = self.client.get(self.url)
+        self.assertRedirects(response, reverse('profile'), status_code=302, target_status_code=200)
+
+    """Tests that requests are counted in the histogram of their url name"""
+    def test_requests_are_counted_by_url_name(self):
+        self.client.login(username=self.owner.username, password='Password123')
+        self.client.get(reverse('view_members'))
+        self.client.get(reverse('view_members'))
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        content = response.content.decode()
+        self.assertIn('# TYPE clubs_request_duration_seconds histogram', content)
+        self.assertIn('clubs_request_duration_seconds_count{view="view_members"} 2', content)
+        self.assertIn('clubs_request_duration_seconds_bucket{view="view_members",le="+Inf"} 2', content)
+        self.assertIn('clubs_request_component_seconds_total{view="view_members",component="template"}', content)
+
+    """Tests that the histograms of other workers are added to this one's"""
+    def test_workers_are_merged(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_DIR=directory):
+            parent = os.getppid()
+            self._write_worker(directory, f'worker-{parent}-{metrics._start_time(parent)}.json', 3)
+            self.client.login(username=self.owner.username, password='Password123')
+            self.client.get(reverse('view_members'))
+            metrics.histograms.flush(force=True)
+            with open(metrics._worker_file(directory, *metrics._identity())) as own_file:
+                self.assertEqual(json.load(own_file)['view_members']['count'], 1)
+            response = self.client.get(self.url)
+        self.assertContains(response, 'clubs_request_duration_seconds_count{view="view_members"} 4')
+        self.assertContains(response, 'clubs_request_duration_seconds_bucket{view="view_members",le="+Inf"} 4')
+
+    """
+    Tests that the files of exited workers, and of a pid since given to
+    another process, are folded into one file and still counted once
+    """
+    def test_exited_workers_are_folded(self):
+        exited = subprocess.Popen([sys.executable, '-c', 'pass'])
+        exited.wait()
+        pid, start = metrics._identity()
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_DIR=directory):
+            self._write_worker(directory, f'worker-{exited.pid}-1.json', 2)
+            self._write_worker(directory, f'worker-{pid}-{start + 1}.json', 5)
+            self.client.login(username=self.owner.username, password='Password123')
+            response = self.client.get(self.url)
+            self.assertContains(response, 'clubs_request_duration_seconds_count{view="view_members"} 7')
+            names = os.listdir(directory)
+            self.assertIn(metrics.EXITED_FILE, names)
+            self.assertNotIn(f'worker-{exited.pid}-1.json', names)
+            self.assertNotIn(f'worker-{pid}-{start + 1}.json', names)
+            response = self.client.get(self.url)
+            self.assertContains(response, 'clubs_request_duration_seconds_count{view="view_members"} 7')
+
+    """Tests that the histograms of finished threads are folded together and still counted"""
+    def test_finished_threads_are_retired(self):
+        histograms = metrics.Histograms()
+        for _ in range(20):
+            thread = threading.Thread(target=histograms.observe, args=('view_members', 0.001, {'db': 0.0005}))
+            thread.start()
+            thread.join()
+        histograms.observe('view_members', 0.001, {})
+        self.assertEqual(list(histograms._shards), [threading.current_thread()])
+        totals = histograms.snapshot()['view_members']
+        self.assertEqual(totals['count'], 21)
+        self.assertAlmostEqual(totals['db'], 0.01)
+
+    """Tests that the metrics load and lock their directory without fcntl, as on Windows"""
+    def test_metrics_without_fcntl(self):
+        script = (
+            'import sys, types, django.template.backends.django; '
+            'sys.modules["fcntl"] = None; sys.modules["msvcrt"] = types.ModuleType("msvcrt"); '
+            'import clubs.metrics; print(clubs.metrics.fcntl)'
+        )
+        result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True)
+        self.assertEqual(result.stdout.strip(), 'None', result.stderr)
+        msvcrt = mock.Mock(LK_LOCK=1, LK_UNLCK=0)
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_DIR=directory), \
+                mock.patch.object(metrics, 'fcntl', None), mock.patch.object(metrics, 'msvcrt', msvcrt, create=True), \
+                mock.patch.object(metrics.os, 'name', 'nt'):
+            self._write_worker(directory, 'worker-1-1.json', 2)
+            self.assertEqual(metrics.merged_snapshot()['view_members']['count'], 2)
+        self.assertEqual([call.args[1:] for call in msvcrt.locking.call_args_list], [(1, 1), (0, 1)])
+
+    def _write_worker(self, directory, name, count):
+        worker = metrics._new_series()
+        worker['buckets'][0] = count
+        worker['count'] = count
+        with open(os.path.join(directory, name), 'w') as worker_file:
+            json.dump({'view_members': worker}, worker_file)
@@ -1,9 +1,9 @@
 from django.test import TestCase, TransactionTestCase
 from clubs.models import User
 from django.urls import reverse
-from clubs.tests.helpers import reverse_with_next
+from clubs.tests.helpers import reverse_with_next, QueryBudgetTester
 
-class ProfileViewTestCase(TransactionTestCase):
+class ProfileViewTestCase(TransactionTestCase, QueryBudgetTester):
     fixtures = ['clubs/tests/fixtures/default_user.json', 'clubs/tests/fixtures/other_users.json']
 
     """
@@ -41,3 +41,9 @@ class ProfileViewTestCase(TransactionTestCase):
         response = self.client.get(self.url)
         redirect_url = reverse_with_next('log_in', self.url)
         self.assertRedirects(response, redirect_url, status_code=302, target_status_code=200)
+
+    """Tests that the profile page keeps to its query budget"""
+    def test_query_budget(self):
+        self.client.login(username=self.user.username, password='Password123')
+        response = self.client.get(self.url)
+        self.assertWithinQueryBudget(response)
@@ -0,0 +1,47 @@
+"""Tests of profiling requests with ?profile"""
+import os
+import tempfile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from clubs.models import User
+
+class ProfilingTestCase(TestCase):
+    fixtures = ['clubs/tests/fixtures/default_user.json', 'clubs/tests/fixtures/other_users.json']
+
+    def setUp(self):
+        self.owner = User.objects.get(username='jillbrown1')
+        self.officer = User.objects.get(username='bobsmith1')
+        self.directory = tempfile.TemporaryDirectory()
+        self.url = reverse('profile') + '?profile'
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_profiling_is_off_by_default(self):
+        self.client.login(username=self.owner.username, password='Password123')
+        with override_settings(PROFILING_DIR=self.directory.name):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Profile', response)
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+    """Tests that the owner's request is profiled, template rendering included"""
+    def test_owner_request_is_profiled(self):
+        self.client.login(username=self.owner.username, password='Password123')
+        with override_settings(PROFILING_ENABLED=True, PROFILING_DIR=self.directory.name):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(os.path.basename(response['X-Profile']).startswith('profile-'))
+        self.assertTrue(os.path.exists(response['X-Profile']))
+        with open(response['X-Profile-Collapsed']) as collapsed:
+            stacks = collapsed.read().splitlines()
+        self.assertTrue(stacks)
+        self.assertTrue(all(line.rsplit(' ', 1)[1].isdigit() for line in stacks))
+        self.assertTrue(any('clubs/views.py' in line and 'django/template/base.py' in line for line in stacks))
+
+    def test_other_users_are_not_profiled(self):
+        self.client.login(username=self.officer.username, password='Password123')
+        with override_settings(PROFILING_ENABLED=True, PROFILING_DIR=self.directory.name):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Profile', response)
@@ -1,13 +1,13 @@
 """Tests for promoting member to officer"""
 
 from django.test import TestCase, Client
-from clubs.models import User
+from clubs.models import User, UserType
 from django.urls import reverse
 from django.contrib.auth import authenticate
-from clubs.tests.helpers import reverse_with_next
+from clubs.tests.helpers import reverse_with_next, QueryBudgetTester
 
 
-class PromoteMemberTestCase(TestCase):
+class PromoteMemberTestCase(TestCase, QueryBudgetTester):
     fixtures = ['clubs/tests/fixtures/default_user.json',
                 'clubs/tests/fixtures/other_users.json']
 
@@ -36,10 +36,10 @@ class PromoteMemberTestCase(TestCase):
 
     def test_owner_promote_member(self):
         self.client.login(username=self.owner.username, password='Password123')
+        self.assertEqual(self.member.user_type, UserType.MEMBER)
         response = self.client.get(self.promote_url)
-        self.assertEqual(self.member.user_type, "MEMBER")
-        self.owner.promote_member(self.member)
-        self.assertEqual(self.member.user_type, "OFFICER")
+        self.member.refresh_from_db()
+        self.assertEqual(self.member.user_type, UserType.OFFICER)
 
     """Tests that promoting a member that doesn't exist redirects back to the user's profile"""
 
@@ -52,3 +52,9 @@ class PromoteMemberTestCase(TestCase):
         self.assertRedirects(response, response_url,
                              status_code=302, target_status_code=200)
         self.assertTemplateUsed(response, 'profile.html')
+
+    """Tests that promoting a member keeps to its query budget"""
+    def test_query_budget(self):
+        self.client.login(username=self.owner.username, password='Password123')
+        response = self.client.get(self.promote_url)
+        self.assertWithinQueryBudget(response)
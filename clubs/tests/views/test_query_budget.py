@@ -0,0 +1,92 @@
+"""Tests of the per-request query budget instrumentation"""
+from django.conf import settings
+from django.http import HttpResponse
+from django.test import TestCase, override_settings
+from django.urls import path, reverse
+from clubs.instrumentation import normalize_sql, QueryRecorder
+from clubs.models import User, UserType
+from clubs.tests.helpers import QueryBudgetTester
+
+"""A view loading every user with a query of its own, the N+1 the middleware looks for"""
+def users_one_by_one(request):
+    users = [User.objects.get(id=user_id) for user_id in User.objects.values_list('id', flat=True)]
+    return HttpResponse(len(users))
+
+urlpatterns = [path('users_one_by_one/', users_one_by_one, name='users_one_by_one')]
+
+class QueryBudgetTestCase(TestCase, QueryBudgetTester):
+    fixtures = ['clubs/tests/fixtures/default_user.json', 'clubs/tests/fixtures/other_users.json']
+
+    def setUp(self):
+        self.officer = User.objects.get(username='bobsmith1')
+        self.client.login(username=self.officer.username, password='Password123')
+
+    """Tests that statements differing only in their values normalize to the same sql"""
+    def test_normalize_sql(self):
+        self.assertEqual(
+            normalize_sql('SELECT * FROM "clubs_user" WHERE "id" = 12 AND "email" = \'a\'\'b\''),
+            normalize_sql('SELECT * FROM "clubs_user" WHERE "id" = 7 AND "email" = \'c\''),
+        )
+        self.assertEqual(
+            normalize_sql('SELECT 1 FROM "clubs_user" WHERE "id" IN (%s, %s, %s)'),
+            'SELECT ? FROM "clubs_user" WHERE "id" IN (...)',
+        )
+
+    """Tests that every request records its queries"""
+    def test_request_records_query_stats(self):
+        response = self.client.get(reverse('view_members'))
+        stats = response.wsgi_request.query_stats
+        self.assertIsInstance(stats, QueryRecorder)
+        self.assertGreater(stats.count, 0)
+        self.assertEqual(sum(stats.statements.values()), stats.count)
+        self.assertGreaterEqual(stats.duration, 0)
+
+    """Tests that requests within their budget are not logged"""
+    def test_request_within_budget_is_not_logged(self):
+        with self.assertRaises(AssertionError):
+            with self.assertLogs('clubs.queries', 'WARNING'):
+                self.client.get(reverse('view_members'))
+
+    """Tests that a request over its budget is logged as a warning"""
+    @override_settings(QUERY_BUDGETS={'view_members': 1})
+    def test_request_over_budget_is_logged(self):
+        with self.assertLogs('clubs.queries', 'WARNING') as logs:
+            self.client.get(reverse('view_members'))
+        self.assertIn('/view_members/ (view_members) ran', logs.output[0])
+        self.assertIn('over its budget of 1 queries', logs.output[0])
+
+    """Tests that a statement repeated more than the limit is reported as an N+1"""
+    @override_settings(ROOT_URLCONF=__name__)
+    def test_repeated_statement_is_logged(self):
+        with self.assertLogs('clubs.queries', 'WARNING') as logs:
+            self.client.get(reverse('users_one_by_one'))
+        self.assertTrue(any(
+            f'ran a similar query {User.objects.count()} times, a likely N+1' in line for line in logs.output
+        ))
+
+    """Tests that the user lists run as many queries for a full page as for a nearly empty one"""
+    def test_user_lists_do_not_grow_with_users(self):
+        owner = User.objects.get(user_type=UserType.OWNER)
+        for viewer, url_name, user_type in ((self.officer, 'view_applications', UserType.APPLICANT),
+                                            (self.officer, 'view_members', UserType.MEMBER),
+                                            (owner, 'view_officers', UserType.OFFICER)):
+            with self.subTest(url_name=url_name):
+                self.client.login(username=viewer.username, password='Password123')
+                response = self.assertQueriesDoNotGrowWithUsers(
+                    reverse(url_name), lambda: self._create_users(user_type, settings.USERS_PER_PAGE)
+                )
+                self.assertEqual(len(response.context['users']), settings.USERS_PER_PAGE)
+
+    def _create_users(self, user_type, user_count):
+        for user_id in range(user_count):
+            User.objects.create_user(
+                username=f'{user_type.label.lower()}{user_id}',
+                first_name=f'First{user_id}',
+                last_name=f'Last{user_id}',
+                email=f'{user_type.label.lower()}{user_id}@test.org',
+                experience_level='BEGINNER',
+                personal_statement='I would like to play chess',
+                bio=f'Bio {user_id}',
+                user_type=user_type,
+                password='Password123',
+            )
@@ -1,10 +1,10 @@
 from django.test import TestCase, Client
-from clubs.models import User
+from clubs.models import User, UserType, ApplicationStatus
 from django.urls import reverse
 from django.contrib.auth import authenticate
-from clubs.tests.helpers import reverse_with_next
+from clubs.tests.helpers import reverse_with_next, QueryBudgetTester
 
-class AcceptApplicationTestCase(TestCase):
+class AcceptApplicationTestCase(TestCase, QueryBudgetTester):
     fixtures = ['clubs/tests/fixtures/default_user.json', 'clubs/tests/fixtures/other_users.json']
     """Creates a test officer and applicant to test the feature"""
     def setUp(self):
@@ -36,12 +36,12 @@ class AcceptApplicationTestCase(TestCase):
     """Tests that an officer can successfully reject an application"""
     def test_successful_reject_application(self):
         self.client.login(username=self.officer.username, password='Password123')
+        self.assertEqual(self.applicant.application_status, ApplicationStatus.PENDING)
+        self.assertEqual(self.applicant.user_type, UserType.APPLICANT)
         response = self.client.get(self.reject_url)
-        self.assertEqual(self.applicant.application_status, "PENDING")
-        self.assertEqual(self.applicant.user_type, "APPLICANT")
-        self.officer.reject_application(self.applicant)
-        self.assertEqual(self.applicant.application_status, "REJECTED")
-        self.assertEqual(self.applicant.user_type, "APPLICANT")
+        self.applicant.refresh_from_db()
+        self.assertEqual(self.applicant.application_status, ApplicationStatus.REJECTED)
+        self.assertEqual(self.applicant.user_type, UserType.APPLICANT)
 
     """Tests that rejecting a user that doesn't exist redirects back to the current user's profile"""
     def test_reject_application_with_invalid_id(self):
@@ -51,3 +51,9 @@ class AcceptApplicationTestCase(TestCase):
         response_url = reverse('profile')
         self.assertRedirects(response, response_url, status_code=302, target_status_code=200)
         self.assertTemplateUsed(response, 'profile.html')
+
+    """Tests that rejecting an application keeps to its query budget"""
+    def test_query_budget(self):
+        self.client.login(username=self.officer.username, password='Password123')
+        response = self.client.get(self.reject_url)
+        self.assertWithinQueryBudget(response)
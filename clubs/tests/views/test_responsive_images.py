@@ -0,0 +1,55 @@
+""" tests of serving the home page background at the right size and format """
+import os
+import tempfile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from clubs.images import RESPONSIVE_IMAGES, VARIANT_FORMATS, cover_sizes, variant_path
+from clubs.templatetags import responsive_images
+
+class ResponsiveImagesTestCase(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        responsive_images._exists.cache_clear()
+
+    def tearDown(self):
+        self.directory.cleanup()
+        responsive_images._exists.cache_clear()
+
+    def test_variant_path(self):
+        self.assertEqual(variant_path('images/chess-bg.jpg', 480, 'webp'), 'images/variants/chess-bg-480w.webp')
+
+    def test_cover_sizes(self):
+        self.assertEqual(cover_sizes(1200, 899), '(max-aspect-ratio: 1200/899) 133.48vh, 100vw')
+
+    def test_no_variants_serve_the_full_size_image(self):
+        with override_settings(STATICFILES_DIRS=[self.directory.name]):
+            response = self.client.get(reverse('home'))
+        self.assertContains(response,
+            '<picture class="cover-picture"><img src="/static/images/chess-bg.jpg" width="1200" height="899" '
+            'alt="" decoding="async"></picture>', html=True)
+        self.assertNotContains(response, 'srcset')
+
+    """Tests that the browser is offered every variant by width, with sizes for a cover image"""
+    def test_variants_are_offered_by_width(self):
+        path = 'images/chess-bg.jpg'
+        for width in RESPONSIVE_IMAGES[path][1]:
+            for extension, _, _ in VARIANT_FORMATS:
+                variant = os.path.join(self.directory.name, variant_path(path, width, extension))
+                os.makedirs(os.path.dirname(variant), exist_ok=True)
+                open(variant, 'w').close()
+        with override_settings(STATICFILES_DIRS=[self.directory.name]):
+            response = self.client.get(reverse('home'))
+        sizes = '(max-aspect-ratio: 1200/899) 133.48vh, 100vw'
+        self.assertContains(response,
+            '<picture class="cover-picture">'
+            '<source type="image/webp" srcset="/static/images/variants/chess-bg-480w.webp 480w, '
+            '/static/images/variants/chess-bg-960w.webp 960w, /static/images/variants/chess-bg-1200w.webp 1200w" '
+            f'sizes="{sizes}">'
+            '<img src="/static/images/chess-bg.jpg" srcset="/static/images/variants/chess-bg-480w.jpg 480w, '
+            '/static/images/variants/chess-bg-960w.jpg 960w, /static/images/variants/chess-bg-1200w.jpg 1200w" '
+            f'sizes="{sizes}" width="1200" height="899" alt="" decoding="async"></picture>', html=True)
+
+    def test_committed_variants_are_served(self):
+        response = self.client.get(reverse('home'))
+        self.assertContains(response, '/static/images/variants/chess-bg-480w.webp 480w')
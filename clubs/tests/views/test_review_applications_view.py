@@ -0,0 +1,99 @@
+'''Tests for reviewing many applications at once'''
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from clubs.models import User, UserType, ApplicationStatus
+from django.urls import reverse
+from clubs.tests.helpers import reverse_with_next
+from clubs import transitions
+
+class ReviewApplicationsTestCase(TestCase):
+    fixtures = ['clubs/tests/fixtures/default_user.json', 'clubs/tests/fixtures/other_users.json']
+
+    def setUp(self):
+        self.url = reverse('review_applications')
+        self.officer = User.objects.get(username='bobsmith1')
+        self.member = User.objects.get(username='janedoe1')
+        self.applicants = self._create_test_applicants(5)
+
+    def test_review_applications_url(self):
+        self.assertEqual(self.url, '/review_applications/')
+
+    """Tests that the applicant list offers the bulk review form to officers"""
+    def test_view_applications_shows_review_form(self):
+        self.client.login(username=self.officer.username, password='Password123')
+        response = self.client.get(reverse('view_applications'))
+        self.assertContains(response, self.url)
+        self.assertContains(response, f'name="user_ids" value="{self.applicants[0].id}"')
+
+    """Tests that many applicants are accepted in one batched update"""
+    def test_bulk_accept(self):
+        self.client.login(username=self.officer.username, password='Password123')
+        ids = [applicant.id for applicant in self.applicants[:3]]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, {'action': 'accept', 'user_ids': ids})
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'review_applications.html')
+        updates = [query for query in queries if query['sql'].startswith('UPDATE "clubs_user"')]
+        self.assertEqual(len(updates), 1)
+        for applicant in self.applicants[:3]:
+            applicant.refresh_from_db()
+            self.assertEqual(applicant.user_type, UserType.MEMBER)
+            self.assertEqual(applicant.application_status, ApplicationStatus.ACCEPTED)
+        self.applicants[3].refresh_from_db()
+        self.assertEqual(self.applicants[3].user_type, UserType.APPLICANT)
+
+    """Tests that the summary reports an outcome for every selected user"""
+    def test_bulk_reject_outcomes(self):
+        self.client.login(username=self.officer.username, password='Password123')
+        ids = [self.applicants[0].id, self.member.id, self.member.id + 9999]
+        response = self.client.post(self.url, {'action': 'reject', 'user_ids': ids})
+        self.assertEqual(response.context['outcomes'], [
+            (self.applicants[0].id, self.applicants[0].username, transitions.REVIEW_REJECTED),
+            (self.member.id, self.member.username, transitions.REVIEW_SKIPPED),
+            (self.member.id + 9999, None, transitions.REVIEW_NOT_FOUND),
+        ])
+        self.applicants[0].refresh_from_db()
+        self.assertEqual(self.applicants[0].application_status, ApplicationStatus.REJECTED)
+        self.member.refresh_from_db()
+        self.assertEqual(self.member.application_status, ApplicationStatus.PENDING)
+
+    """Tests that a review without any selected applicants changes nothing"""
+    def test_bulk_review_without_selection(self):
+        self.client.login(username=self.officer.username, password='Password123')
+        response = self.client.post(self.url, {'action': 'accept'}, follow=True)
+        self.assertRedirects(response, reverse('view_applications'), status_code=302, target_status_code=200)
+        self.assertEqual(User.objects.filter(user_type=UserType.APPLICANT).count(), 6)
+
+    """Tests that ids which are not plain integers SQLite can store are rejected"""
+    def test_bulk_review_with_invalid_ids(self):
+        self.client.login(username=self.officer.username, password='Password123')
+        for user_id in ['\u00b2', '9' * 30, '0', '-1']:
+            response = self.client.post(self.url, {'action': 'accept', 'user_ids': [self.applicants[0].id, user_id]})
+            self.assertRedirects(response, reverse('view_applications'), status_code=302, target_status_code=200)
+        self.assertEqual(User.objects.filter(user_type=UserType.APPLICANT).count(), 6)
+
+    """Tests that only officers can review applications"""
+    def test_only_an_officer_can_review_applications(self):
+        self.client.login(username=self.member.username, password='Password123')
+        ids = [applicant.id for applicant in self.applicants]
+        response = self.client.post(self.url, {'action': 'accept', 'user_ids': ids}, follow=True)
+        self.assertRedirects(response, reverse('profile'), status_code=302, target_status_code=200)
+        self.assertEqual(User.objects.filter(user_type=UserType.APPLICANT).count(), 6)
+
+    def test_review_applications_redirects_when_not_logged_in(self):
+        response = self.client.post(self.url, {'action': 'accept'})
+        redirect_url = reverse_with_next('log_in', self.url)
+        self.assertRedirects(response, redirect_url, status_code=302, target_status_code=200)
+
+    def _create_test_applicants(self, user_count):
+        return [
+            User.objects.create_user(
+                username=f'user{user_id}',
+                first_name=f'First{user_id}',
+                last_name=f'Last{user_id}',
+                email=f'user{user_id}@test.org',
+                password='Password123',
+            )
+            for user_id in range(user_count)
+        ]
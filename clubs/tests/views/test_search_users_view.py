@@ -0,0 +1,116 @@
+""" tests of the member search view """
+from django.test import TestCase
+from clubs.models import User, UserType
+from django.urls import reverse
+from clubs.tests.helpers import reverse_with_next
+from clubs.pagination import encode_cursor, NEXT
+from django.conf import settings
+
+class SearchUsersViewTestCase(TestCase):
+    fixtures = ['clubs/tests/fixtures/default_user.json', 'clubs/tests/fixtures/other_users.json']
+
+    def setUp(self):
+        self.url = reverse('search_users')
+        self.applicant = User.objects.get(username='johndoe1')
+        self.member = User.objects.get(username='janedoe1')
+        self.officer = User.objects.get(username='bobsmith1')
+        self.owner = User.objects.get(username='jillbrown1')
+
+    def test_search_users_url(self):
+        self.assertEqual(self.url, '/search/')
+
+    """Tests that members are found by a prefix of their name"""
+    def test_search_by_name_prefix(self):
+        self.client.login(username=self.member.username, password='Password123')
+        response = self.client.get(self.url, {'q': 'bil smi'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'search.html')
+        self.assertEqual([u.username for u in response.context['users']], ['billysmith1'])
+
+    """Tests that users the viewer may not list are never returned"""
+    def test_search_respects_listed_roles(self):
+        self.client.login(username=self.member.username, password='Password123')
+        response = self.client.get(self.url, {'q': 'Hello'})
+        usernames = {u.username for u in response.context['users']}
+        self.assertEqual(usernames, {'janedoe1', 'billysmith1'})
+
+        self.client.login(username=self.officer.username, password='Password123')
+        response = self.client.get(self.url, {'q': 'Hello'})
+        usernames = {u.username for u in response.context['users']}
+        self.assertEqual(usernames, {'johndoe1', 'janedoe1', 'billysmith1'})
+
+    """Tests that personal statements are only searched for viewers who can read them"""
+    def test_search_personal_statement(self):
+        self.client.login(username=self.member.username, password='Password123')
+        response = self.client.get(self.url, {'q': 'intermediate'})
+        self.assertEqual(len(response.context['users']), 0)
+
+        self.client.login(username=self.owner.username, password='Password123')
+        response = self.client.get(self.url, {'q': 'intermediate'})
+        usernames = {u.username for u in response.context['users']}
+        self.assertEqual(usernames, {'bobsmith1', 'billysmith1'})
+
+    """Tests that the index follows profile edits"""
+    def test_search_after_profile_update(self):
+        self.member.bio = 'Grandmaster in waiting'
+        self.member.save()
+        self.client.login(username=self.officer.username, password='Password123')
+        response = self.client.get(self.url, {'q': 'grandmaster'})
+        self.assertEqual([u.username for u in response.context['users']], ['janedoe1'])
+
+    """Tests that results are paged by cursor"""
+    def test_search_pagination(self):
+        self._create_test_members(settings.USERS_PER_PAGE + 3)
+        self.client.login(username=self.officer.username, password='Password123')
+        response = self.client.get(self.url, {'q': 'tester'})
+        page_obj = response.context['users']
+        self.assertEqual(len(page_obj), settings.USERS_PER_PAGE)
+        self.assertTrue(page_obj.has_next())
+        first_page = {u.username for u in page_obj}
+
+        response = self.client.get(self.url, {'q': 'tester', 'cursor': page_obj.next_token})
+        page_obj = response.context['users']
+        self.assertEqual(len(page_obj), 3)
+        self.assertFalse(page_obj.has_next())
+        self.assertTrue(page_obj.has_previous())
+        self.assertFalse(first_page & {u.username for u in page_obj})
+
+        response = self.client.get(self.url, {'q': 'tester', 'cursor': page_obj.previous_token})
+        self.assertEqual({u.username for u in response.context['users']}, first_page)
+
+    """Tests that hand made cursors are treated as the first page"""
+    def test_search_with_invalid_cursor(self):
+        self.client.login(username=self.officer.username, password='Password123')
+        first_page = self.client.get(self.url, {'q': 'Hello'}).context['users']
+        cursors = [['a', 'b'], [{}, 1], [[1], 2], [-1.5, 'x'], [None, 1], [True, 1], [-1.5, 2.5], [-1.5, 10 ** 30], 'abc', [1]]
+        for cursor in cursors:
+            response = self.client.get(self.url, {'q': 'Hello', 'cursor': encode_cursor(NEXT, cursor)})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual([u.username for u in response.context['users']], [u.username for u in first_page])
+
+    def test_search_with_empty_query(self):
+        self.client.login(username=self.member.username, password='Password123')
+        response = self.client.get(self.url, {'q': '  '})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['users']), 0)
+
+    def test_applicants_cannot_search(self):
+        self.client.login(username=self.applicant.username, password='Password123')
+        response = self.client.get(self.url, {'q': 'Doe'}, follow=True)
+        self.assertRedirects(response, reverse('profile'), status_code=302, target_status_code=200)
+
+    def test_search_redirects_when_not_logged_in(self):
+        response = self.client.get(self.url)
+        redirect_url = reverse_with_next('log_in', self.url)
+        self.assertRedirects(response, redirect_url, status_code=302, target_status_code=200)
+
+    def _create_test_members(self, user_count):
+        for user_id in range(user_count):
+            User.objects.create_user(
+                username=f'user{user_id}',
+                first_name=f'First{user_id}',
+                last_name='Tester',
+                email=f'user{user_id}@test.org',
+                user_type=UserType.MEMBER,
+                password='Password123',
+            )
@@ -1,9 +1,9 @@
 from django.test import TestCase, TransactionTestCase
 from clubs.models import User
 from django.urls import reverse
-from clubs.tests.helpers import reverse_with_next
+from clubs.tests.helpers import reverse_with_next, QueryBudgetTester
 
-class ShowUserViewTestCase(TransactionTestCase):
+class ShowUserViewTestCase(TransactionTestCase, QueryBudgetTester):
     fixtures = ['clubs/tests/fixtures/default_user.json', 'clubs/tests/fixtures/other_users.json']
 
     """
@@ -87,3 +87,9 @@ class ShowUserViewTestCase(TransactionTestCase):
         response_url = reverse('profile')
         self.assertRedirects(response, response_url, status_code=302, target_status_code=200)
         self.assertTemplateUsed(response, 'profile.html')
+
+    """Tests that showing a user keeps to its query budget"""
+    def test_query_budget(self):
+        self.client.login(username=self.officer.username, password='Password123')
+        response = self.client.get(self.member_url)
+        self.assertWithinQueryBudget(response)
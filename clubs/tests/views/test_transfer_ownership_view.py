@@ -1,13 +1,13 @@
 """Tests for transfering ownership from owner to officer"""
 
 from django.test import TestCase, Client
-from clubs.models import User
+from clubs.models import User, UserType
 from django.urls import reverse
 from django.contrib.auth import authenticate
-from clubs.tests.helpers import reverse_with_next
+from clubs.tests.helpers import reverse_with_next, QueryBudgetTester
 
 
-class TransferOwnershipTestCase(TestCase):
+class TransferOwnershipTestCase(TestCase, QueryBudgetTester):
     fixtures = ['clubs/tests/fixtures/default_user.json',
                 'clubs/tests/fixtures/other_users.json']
 
@@ -48,10 +48,10 @@ class TransferOwnershipTestCase(TestCase):
 
     def test_owner_transfer_ownership(self):
         self.client.login(username=self.owner.username, password='Password123')
+        self.assertEqual(self.officer.user_type, UserType.OFFICER)
         response = self.client.get(self.transfer_url)
-        self.assertEqual(self.officer.user_type, "OFFICER")
-        self.owner.transfer_ownership(self.officer)
-        self.assertEqual(self.officer.user_type, "OWNER")
+        self.officer.refresh_from_db()
+        self.assertEqual(self.officer.user_type, UserType.OWNER)
 
     """Tests that transferring ownership to an officer that doesn't exist redirects back to the user's profile"""
 
@@ -64,3 +64,9 @@ class TransferOwnershipTestCase(TestCase):
         self.assertRedirects(response, response_url,
                              status_code=302, target_status_code=200)
         self.assertTemplateUsed(response, 'profile.html')
+
+    """Tests that transferring ownership keeps to its query budget"""
+    def test_query_budget(self):
+        self.client.login(username=self.owner.username, password='Password123')
+        response = self.client.get(self.transfer_url)
+        self.assertWithinQueryBudget(response)
@@ -0,0 +1,40 @@
+""" tests of serving third party assets locally once vendored """
+import os
+import tempfile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from clubs.templatetags import vendor_assets
+from clubs.vendor import VENDOR_ASSETS
+
+class VendorAssetsTestCase(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        vendor_assets._is_vendored.cache_clear()
+
+    def tearDown(self):
+        self.directory.cleanup()
+        vendor_assets._is_vendored.cache_clear()
+
+    def test_assets_not_vendored_come_from_cdn_with_integrity(self):
+        with override_settings(STATICFILES_DIRS=[self.directory.name]):
+            response = self.client.get(reverse('home'))
+        url, integrity = VENDOR_ASSETS['vendor/bootstrap/bootstrap.min.css']
+        self.assertContains(response, f'<link href="{url}" rel="stylesheet" integrity="{integrity}" crossorigin="anonymous">', html=True)
+
+    def test_vendored_assets_are_served_locally(self):
+        for path in VENDOR_ASSETS:
+            os.makedirs(os.path.join(self.directory.name, os.path.dirname(path)), exist_ok=True)
+            open(os.path.join(self.directory.name, path), 'w').close()
+        with override_settings(STATICFILES_DIRS=[self.directory.name]):
+            response = self.client.get(reverse('home'))
+        self.assertNotContains(response, 'cdn.jsdelivr.net')
+        self.assertContains(response, '<link href="/static/vendor/bootstrap/bootstrap.min.css" rel="stylesheet">', html=True)
+        self.assertContains(response, '<script src="/static/vendor/bootstrap/bootstrap.min.js"></script>', html=True)
+
+    """Tests that the committed copies are used, so no page loads anything from a CDN"""
+    def test_pages_do_not_use_cdn(self):
+        for url in (reverse('home'), reverse('log_in'), reverse('sign_up')):
+            response = self.client.get(url)
+            self.assertNotContains(response, 'cdn.jsdelivr.net')
+            self.assertContains(response, '<link href="/static/vendor/bootstrap-icons/bootstrap-icons.min.css" rel="stylesheet">', html=True)
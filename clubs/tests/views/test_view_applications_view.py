@@ -3,10 +3,10 @@ from django.test import TestCase
 from clubs.models import User
 from django.urls import reverse
 from django.contrib.auth import authenticate
-from clubs.tests.helpers import reverse_with_next
+from clubs.tests.helpers import reverse_with_next, QueryBudgetTester
 from django.conf import settings
 
-class ViewApplicationsViewTestCase(TestCase):
+class ViewApplicationsViewTestCase(TestCase, QueryBudgetTester):
     fixtures = ['clubs/tests/fixtures/default_user.json', 'clubs/tests/fixtures/other_users.json']
 
     """
@@ -112,3 +112,9 @@ class ViewApplicationsViewTestCase(TestCase):
                 bio=f'Bio {user_id}',
                 password='Password123',
             )
+
+    """Tests that the applicant list keeps to its query budget"""
+    def test_query_budget(self):
+        self.client.login(username=self.officer.username, password='Password123')
+        response = self.client.get(self.url)
+        self.assertWithinQueryBudget(response)
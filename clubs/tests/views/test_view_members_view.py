@@ -1,12 +1,15 @@
 """ tests of the member user list view """
-from django.test import TestCase
-from clubs.models import User
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from clubs.models import User, UserType
 from django.urls import reverse
 from django.contrib.auth import authenticate
-from clubs.tests.helpers import reverse_with_next
+from clubs.tests.helpers import reverse_with_next, QueryBudgetTester
+from clubs.pagination import encode_cursor, NEXT, PREVIOUS
 from django.conf import settings
 
-class ViewMembersViewTestCase(TestCase):
+class ViewMembersViewTestCase(TestCase, QueryBudgetTester):
     fixtures = ['clubs/tests/fixtures/default_user.json', 'clubs/tests/fixtures/other_users.json']
 
     """
@@ -111,6 +114,52 @@ class ViewMembersViewTestCase(TestCase):
         self.assertTrue(page_obj.has_previous())
         self.assertFalse(page_obj.has_next())
 
+    """Test that the list of members can be paged with cursors instead of page numbers"""
+    @override_settings(USER_LIST_PAGINATION='keyset')
+    def test_view_members_keyset_pagination(self):
+        self.client.login(username=self.officer.username, password='Password123')
+        self._create_test_members(settings.USERS_PER_PAGE*2+3-1)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'user_list.html')
+        page_obj = response.context['users']
+        self.assertEqual(len(page_obj), settings.USERS_PER_PAGE)
+        self.assertFalse(page_obj.has_previous())
+        self.assertTrue(page_obj.has_next())
+        first_page = [u.username for u in page_obj]
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {'cursor': page_obj.next_token})
+        self.assertFalse(any('COUNT(' in query['sql'] for query in queries))
+        page_obj = response.context['users']
+        self.assertEqual(len(page_obj), settings.USERS_PER_PAGE)
+        self.assertTrue(page_obj.has_previous())
+        self.assertTrue(page_obj.has_next())
+
+        response = self.client.get(self.url, {'cursor': page_obj.next_token})
+        page_obj = response.context['users']
+        self.assertEqual(len(page_obj), 4)
+        self.assertTrue(page_obj.has_previous())
+        self.assertFalse(page_obj.has_next())
+
+        response = self.client.get(self.url, {'cursor': page_obj.previous_token})
+        response = self.client.get(self.url, {'cursor': response.context['users'].previous_token})
+        page_obj = response.context['users']
+        self.assertEqual([u.username for u in page_obj], first_page)
+        self.assertFalse(page_obj.has_previous())
+
+    """Test that a malformed cursor falls back to the first page"""
+    @override_settings(USER_LIST_PAGINATION='keyset')
+    def test_view_members_with_invalid_cursor(self):
+        self.client.login(username=self.officer.username, password='Password123')
+        self._create_test_members(settings.USERS_PER_PAGE)
+        for cursor in ('not-a-cursor', encode_cursor(NEXT, None), encode_cursor(PREVIOUS, ['user1'])):
+            response = self.client.get(self.url, {'cursor': cursor})
+            self.assertEqual(response.status_code, 200)
+            page_obj = response.context['users']
+            self.assertEqual(len(page_obj), settings.USERS_PER_PAGE)
+            self.assertFalse(page_obj.has_previous())
+
     """Test that the user is redirected when trying to view members when not logged in"""
     def test_get_view_members_redirects_when_not_logged_in(self):
         response = self.client.get(self.url)
@@ -130,6 +179,12 @@ class ViewMembersViewTestCase(TestCase):
                 experience_level='BEGINNER',
                 personal_statement='I am a beginner level player',
                 bio=f'Bio {user_id}',
-                user_type='MEMBER',
+                user_type=UserType.MEMBER,
                 password='Password123',
             )
+
+    """Tests that the member list keeps to its query budget"""
+    def test_query_budget(self):
+        self.client.login(username=self.officer.username, password='Password123')
+        response = self.client.get(self.url)
+        self.assertWithinQueryBudget(response)
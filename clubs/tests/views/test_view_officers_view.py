@@ -1,12 +1,12 @@
 """ tests of the officers user list view """
 from django.test import TestCase
-from clubs.models import User
+from clubs.models import User, UserType
 from django.urls import reverse
 from django.contrib.auth import authenticate
-from clubs.tests.helpers import reverse_with_next
+from clubs.tests.helpers import reverse_with_next, QueryBudgetTester
 from django.conf import settings
 
-class ViewMembersViewTestCase(TestCase):
+class ViewMembersViewTestCase(TestCase, QueryBudgetTester):
     fixtures = ['clubs/tests/fixtures/default_user.json',
                 'clubs/tests/fixtures/other_users.json']
 
@@ -113,6 +113,12 @@ class ViewMembersViewTestCase(TestCase):
                 experience_level='BEGINNER',
                 personal_statement='I am a beginner level player',
                 bio=f'Bio {user_id}',
-                user_type='OFFICER',
+                user_type=UserType.OFFICER,
                 password='Password123',
             )
+
+    """Tests that the officer list keeps to its query budget"""
+    def test_query_budget(self):
+        self.client.login(username=self.owner.username, password='Password123')
+        response = self.client.get(self.url)
+        self.assertWithinQueryBudget(response)
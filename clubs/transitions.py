@@ -0,0 +1,110 @@
+'''
+Role transitions for the clubs application.
+Each transition is a single conditional UPDATE of only the columns it
+changes, so it either wins the race and returns True, or finds the row
+no longer in the expected state and returns False without writing.
+Updates bypass save(), so updated_at, the changed users' cached copies,
+the watermarks of the lists they leave and join and the autocomplete
+results are all seen to here.
+'''
+from django.db import transaction
+from django.db.models import Case, Q, Value, When
+from django.utils import timezone
+from .models import User, UserType, ApplicationStatus, UserListWatermark
+from . import autocomplete, caching
+
+def _transition(user_id, expected, **changes):
+    with transaction.atomic():
+        updated = User.objects.filter(pk=user_id, **expected).update(updated_at=timezone.now(), **changes)
+        if updated:
+            caching.invalidate_users([user_id])
+            if 'user_type' in changes:
+                UserListWatermark.touch([expected['user_type'], changes['user_type']])
+                autocomplete.invalidate()
+    return updated == 1
+
+"""Turn an officer back into a member"""
+def demote_officer(user_id):
+    return _transition(user_id, {'user_type': UserType.OFFICER}, user_type=UserType.MEMBER)
+
+"""Turn a member into an officer"""
+def promote_member(user_id):
+    return _transition(user_id, {'user_type': UserType.MEMBER}, user_type=UserType.OFFICER)
+
+"""Make an applicant a member and mark their application as accepted"""
+def accept_application(user_id):
+    return _transition(
+        user_id,
+        {'user_type': UserType.APPLICANT},
+        user_type=UserType.MEMBER,
+        application_status=ApplicationStatus.ACCEPTED,
+    )
+
+"""Mark an applicant's application as rejected"""
+def reject_application(user_id):
+    return _transition(
+        user_id,
+        {'user_type': UserType.APPLICANT},
+        application_status=ApplicationStatus.REJECTED,
+    )
+
+"""
+Swap the owner and an officer in one statement.
+Both rows must still hold their expected roles, otherwise nothing changes.
+"""
+def transfer_ownership(owner_id, officer_id):
+    with transaction.atomic():
+        updated = User.objects.filter(
+            Q(pk=owner_id, user_type=UserType.OWNER) | Q(pk=officer_id, user_type=UserType.OFFICER)
+        ).update(updated_at=timezone.now(), user_type=Case(
+            When(pk=officer_id, then=Value(UserType.OWNER)),
+            default=Value(UserType.OFFICER),
+        ))
+        if updated != 2:
+            transaction.set_rollback(True)
+            return False
+        caching.invalidate_users([owner_id, officer_id])
+        UserListWatermark.touch([UserType.OWNER, UserType.OFFICER])
+        autocomplete.invalidate()
+    return True
+
+REVIEW_ACCEPTED = 'Accepted'
+REVIEW_REJECTED = 'Rejected'
+REVIEW_SKIPPED = 'Skipped, no longer an applicant'
+REVIEW_NOT_FOUND = 'Skipped, user does not exist'
+
+"""
+Accept or reject many applicants at once.
+The applicants are read and updated with one batched UPDATE inside a
+single transaction. Returns a list of (user_id, username, outcome) in the
+order the ids were given; username is None for ids that don't exist.
+"""
+def review_applications(user_ids, accept):
+    if accept:
+        changes = {'user_type': UserType.MEMBER, 'application_status': ApplicationStatus.ACCEPTED}
+        outcome = REVIEW_ACCEPTED
+    else:
+        changes = {'application_status': ApplicationStatus.REJECTED}
+        outcome = REVIEW_REJECTED
+
+    with transaction.atomic():
+        applicants = User.objects.select_for_update().filter(pk__in=user_ids)
+        rows = {user_id: (username, user_type) for user_id, username, user_type
+                in applicants.values_list('id', 'username', 'user_type')}
+        eligible = {user_id for user_id, (_, user_type) in rows.items() if user_type == UserType.APPLICANT}
+        if eligible:
+            User.objects.filter(pk__in=eligible, user_type=UserType.APPLICANT).update(updated_at=timezone.now(), **changes)
+            caching.invalidate_users(eligible)
+            if accept:
+                UserListWatermark.touch([UserType.APPLICANT, UserType.MEMBER])
+                autocomplete.invalidate()
+
+    results = []
+    for user_id in user_ids:
+        if user_id not in rows:
+            results.append((user_id, None, REVIEW_NOT_FOUND))
+        elif user_id in eligible:
+            results.append((user_id, rows[user_id][0], outcome))
+        else:
+            results.append((user_id, rows[user_id][0], REVIEW_SKIPPED))
+    return results
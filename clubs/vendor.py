@@ -0,0 +1,46 @@
+'''
+Third party assets the pages use, pinned to the versions base.html was
+written against. The vendor_assets command downloads each of them into
+static/clubs/vendor, where they are committed and served from; a page
+only falls back to the CDN for a file that is missing. The command records the integrity hash of every vendored file in
+MANIFEST, so the committed copies can be checked without the network.
+'''
+import base64
+import hashlib
+
+MANIFEST = 'vendor/manifest.json'
+MANIFEST_ALGORITHM = 'sha384'
+
+"""The subresource integrity hash of some content, such as sha384-<base64 digest>"""
+def integrity_of(content, algorithm=MANIFEST_ALGORITHM):
+    return f'{algorithm}-{base64.b64encode(hashlib.new(algorithm, content).digest()).decode()}'
+
+
+'''Static path: (CDN url, subresource integrity hash or None)'''
+VENDOR_ASSETS = {
+    'vendor/bootstrap/bootstrap.min.css': (
+        'https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css',
+        'sha384-1BmE4kWBq78iYhFldvKuhfTAU6auU8tT94WrHftjDbrCEXSU1oBoqyl2QvZ6jIW3',
+    ),
+    'vendor/bootstrap/bootstrap.min.js': (
+        'https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.min.js',
+        'sha384-QJHtvGhmr9XOIpI6YVutG+2QOK9T+ZnN4kzFN1RtK3zEFEIsxhlmWl5/YESvpZ13',
+    ),
+    'vendor/popper/popper.min.js': (
+        'https://cdn.jsdelivr.net/npm/@popperjs/core@2.10.2/dist/umd/popper.min.js',
+        'sha384-7+zCNj/IqJ95wo16oMtfsKbZ9ccEh31eOz1HGyDuCQ6wgnyJNSYdrPa03rtR1zdB',
+    ),
+    'vendor/bootstrap-icons/bootstrap-icons.min.css': (
+        'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.3/font/bootstrap-icons.min.css',
+        'sha384-XGjxtQfXaH2tnPFa9x+ruJTuLE3Aa6LhHSWRr1XeTyhezb4abCG4ccI5AkVDxqC+',
+    ),
+    # Fetched alongside the stylesheet, which refers to them as fonts/...
+    'vendor/bootstrap-icons/fonts/bootstrap-icons.woff2': (
+        'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.3/font/fonts/bootstrap-icons.woff2',
+        None,
+    ),
+    'vendor/bootstrap-icons/fonts/bootstrap-icons.woff': (
+        'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.3/font/fonts/bootstrap-icons.woff',
+        None,
+    ),
+}
@@ -1,16 +1,20 @@
 from django.shortcuts import render, redirect
-from django.http import HttpResponse
+from django.http import HttpResponse, FileResponse, Http404, JsonResponse, StreamingHttpResponse
 from django.contrib.auth.hashers import check_password
-from .forms import LogInForm, SignUpForm, UserForm, PasswordForm
+from .forms import LogInForm, SignUpForm, UserForm, PasswordForm, ReviewApplicationsForm
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from .models import User
+from .models import User, UserType, UserListWatermark, LIST_FIELDS, LISTED_ROLES
 from django.template import Template, Context
-from .helpers import login_prohibited
+from .helpers import login_prohibited, render_conditionally
+from . import transitions, avatars, search, autocomplete, exports, metrics
 from django.contrib.auth import authenticate, login, logout
 from django.core.exceptions import ObjectDoesNotExist, ImproperlyConfigured
 from django.core.paginator import Paginator
 from django.conf import settings
+from django.utils.cache import patch_cache_control
+import re
+from .pagination import KeysetPaginator, UserListPaginator
 
 """
 The home view that renders the home page
@@ -26,9 +30,9 @@ then the officer can view a list of submitted applications
 @login_required
 def view_applications(request):
     current_user = request.user
-    if current_user.user_type == "OFFICER":
-        users = User.objects.all().filter(user_type="APPLICANT")
-        return user_list(request, users, "Applicants")
+    if current_user.is_officer:
+        users = User.objects.all().filter(user_type=UserType.APPLICANT)
+        return user_list(request, users, "Applicants", UserType.APPLICANT, bulk_review=True)
     return redirect('/profile')
 
 """
@@ -38,9 +42,9 @@ then the owner can view a list of officers
 @login_required
 def view_officers(request):
     current_user = request.user
-    if current_user.user_type == "OWNER":
-        users = User.objects.all().filter(user_type="OFFICER")
-        return user_list(request, users, "Officers")
+    if current_user.is_owner:
+        users = User.objects.all().filter(user_type=UserType.OFFICER)
+        return user_list(request, users, "Officers", UserType.OFFICER)
     return redirect('/profile')
 
 """
@@ -50,20 +54,97 @@ Then the officer can view a list of members
 @login_required
 def view_members(request):
     current_user = request.user
-    if (current_user.user_type == "MEMBER" or current_user.user_type == "OFFICER" or current_user.user_type == "OWNER"):
-        users = User.objects.all().filter(user_type="MEMBER")
-        return user_list(request, users, "Members")
+    if not current_user.is_applicant:
+        users = User.objects.all().filter(user_type=UserType.MEMBER)
+        return user_list(request, users, "Members", UserType.MEMBER)
     return redirect('/profile')
 
 """
-A view containing a list of all given users
+A view containing a list of all given users, who all hold the given role
+Only the columns the list renders are loaded
+Pages either by page number or, when USER_LIST_PAGINATION is 'keyset',
+by an opaque cursor on the username ordering which skips the count query
+Answers conditional GETs from the role's list watermark alone
 """
 @login_required
-def user_list(request, users, user_type):
-    paginator = Paginator(users, settings.USERS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    return render(request, 'user_list.html', {'users':page_obj, 'user_type':user_type})
+def user_list(request, users, user_type, role, bulk_review=False):
+    # Read before the users, so a concurrent write is never cached under it
+    list_updated_at = UserListWatermark.updated_at_of(role)
+    keyset = settings.USER_LIST_PAGINATION == 'keyset'
+
+    def get_context():
+        listed_users = users.only(*LIST_FIELDS)
+        if keyset:
+            paginator = KeysetPaginator(listed_users, settings.USERS_PER_PAGE)
+            page_key = request.GET.get('cursor', '')
+            page_obj = paginator.get_page(page_key)
+        else:
+            paginator = UserListPaginator(listed_users, settings.USERS_PER_PAGE)
+            page_number = request.GET.get('page')
+            page_obj = paginator.get_page(page_number)
+            page_key = page_obj.number
+        export_role = user_type.lower() if user_type.lower() in exports.ROLE_NAMES else None
+        return {'users':page_obj, 'user_type':user_type, 'keyset':keyset, 'bulk_review':bulk_review,
+                'export_role':export_role, 'list_updated_at':list_updated_at, 'page_key':page_key}
+
+    return render_conditionally(request, 'user_list.html', get_context, list_updated_at, keyset)
+
+"""
+Full-text search over the users the current user is allowed to list.
+Results are ranked by relevance and paged by cursor.
+"""
+@login_required
+def search_users(request):
+    current_user = request.user
+    if current_user.is_applicant:
+        return redirect('profile')
+    query = request.GET.get('q', '')
+    page_obj = search.search_users(current_user, query, request.GET.get('cursor'), settings.USERS_PER_PAGE)
+    return render(request, 'search.html', {'users': page_obj, 'query': query})
+
+"""
+Type-ahead for officers and the owner.
+Returns the id, username and name of listable users matching a prefix as JSON.
+"""
+@login_required
+def autocomplete_users(request):
+    current_user = request.user
+    if not (current_user.is_officer or current_user.is_owner):
+        return JsonResponse({'results': []}, status=403)
+    results = autocomplete.complete(current_user, request.GET.get('q', ''))
+    return JsonResponse({'results': results})
+
+"""
+Streams one of the lists an officer or the owner may browse as a CSV or
+JSON lines download. Rows are sent as they are read from the database.
+"""
+@login_required
+def export_users(request):
+    current_user = request.user
+    if not (current_user.is_officer or current_user.is_owner):
+        return redirect('profile')
+    user_type = exports.ROLE_NAMES.get(request.GET.get('role'))
+    file_format = request.GET.get('format', 'csv')
+    if user_type not in LISTED_ROLES[current_user.user_type] or file_format not in exports.FORMATS:
+        raise Http404
+    response = StreamingHttpResponse(
+        exports.export_users([user_type], file_format),
+        content_type=exports.FORMATS[file_format],
+    )
+    response['Content-Disposition'] = f'attachment; filename="{request.GET["role"]}.{file_format}"'
+    return response
+
+"""
+Serves the request latency histograms of every worker to the owner,
+in the Prometheus text format.
+"""
+@login_required
+def metrics_view(request):
+    if not request.user.is_owner:
+        return redirect('profile')
+    response = HttpResponse(metrics.render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+    patch_cache_control(response, private=True, no_store=True)
+    return response
 
 """
 Responsible for displaying a particular user based on user_id
@@ -75,20 +156,19 @@ def show_user(request, user_id):
     try:
         user = User.objects.get(id=user_id)
         #Decides whether the user will be able to see all information
-        if (user.user_type == "APPLICANT" or user.user_type == "MEMBER") and current_user.user_type == "OFFICER":
-            all_info = True
-        if (user.user_type == "OFFICER" or user.user_type == "MEMBER") and current_user.user_type == "OWNER":
-            all_info = True
+        all_info = current_user.can_see_all_info_of(user)
     except User.DoesNotExist:
         return redirect('profile')
-    return render(request, 'profile.html', {'profile_user': user, 'all_info': all_info})
+    return render_conditionally(request, 'profile.html', lambda: {'profile_user': user, 'all_info': all_info},
+                                user.updated_at, user.pk)
 
 """
 Renders all the information of the request user's profile
 """
 @login_required
 def profile(request):
-    return render(request, 'profile.html', {'profile_user': request.user, 'all_info': False})
+    return render_conditionally(request, 'profile.html', lambda: {'profile_user': request.user, 'all_info': False},
+                                request.user.updated_at)
 
 
 """
@@ -126,7 +206,7 @@ def password(request):
                 new_password = form.cleaned_data.get('new_password')
                 current_user.set_password(new_password)
                 current_user.save()
-                login(request, current_user)
+                login(request, current_user, backend=settings.AUTHENTICATION_BACKENDS[0])
                 messages.add_message(request, messages.SUCCESS, "Password Updated Successfully")
                 return redirect('/profile')
         else:
@@ -146,7 +226,7 @@ def sign_up(request):
         form = SignUpForm(request.POST)
         if form.is_valid():
             user = form.save()
-            login(request, user)
+            login(request, user, backend=settings.AUTHENTICATION_BACKENDS[0])
             return redirect('/profile')
     else:
         form = SignUpForm()
@@ -181,54 +261,40 @@ def log_in(request):
 """
 Allow an owner to demote an officer, changing their user type back
 to MEMBER.
-If the user they are trying to demote doesn't exist, the owner will be redirected to
+If the user they are trying to demote doesn't exist or is no longer an officer, the owner will be redirected to
 their profile.
 """
 @login_required
 def demote_officer(request, user_id):
     current_user = request.user
-    try:
-        user = User.objects.get(id=user_id)
-        if (user.user_type == "OFFICER") and current_user.user_type == "OWNER":
-            current_user.demote_officer(user)
-            return show_user(request, user_id)
-    except User.DoesNotExist:
-        return redirect('profile')
+    if current_user.is_owner and transitions.demote_officer(user_id):
+        return show_user(request, user_id)
     return redirect('profile')
 
 """
 Allow an owner to promote a member, changing their user type to
 to OFFICER.
-If the user they are trying to promote doesn't exist, the owner will be redirected to
-their profile.
+If the user they are trying to promote doesn't exist or is no longer a member, the owner
+will be redirected to their profile.
 """
 @login_required
 def promote_member(request, user_id):
     current_user = request.user
-    try:
-        user = User.objects.get(id=user_id)
-        if (user.user_type == "MEMBER") and (current_user.user_type == "OWNER"):
-            current_user.promote_member(user)
-            return show_user(request, user_id)
-    except User.DoesNotExist:
-        return redirect('profile')
+    if current_user.is_owner and transitions.promote_member(user_id):
+        return show_user(request, user_id)
     return redirect('profile')
 
 """
-Allow the owner to make an officer the owner and demote themselved.
+Allow the owner to make an officer the owner and demote themselved in one statement.
 If the user they are trying to promote doesn't exist, the owner will be redirected to
 their profile.
 """
 @login_required
 def transfer_ownership(request, user_id):
     current_user = request.user
-    try:
-        user = User.objects.get(id=user_id)
-        if (user.user_type == "OFFICER") and current_user.user_type == "OWNER":
-            current_user.transfer_ownership(user)
-            return show_user(request, user_id)
-    except User.DoesNotExist:
-        return redirect('profile')
+    if current_user.is_owner and transitions.transfer_ownership(current_user.id, user_id):
+        current_user.user_type = UserType.OFFICER
+        return show_user(request, user_id)
     return redirect('profile')
 
 """
@@ -239,13 +305,8 @@ If the conditions aren't met, redirect to the officer's profile.
 @login_required
 def accept_application(request, user_id):
     current_user = request.user
-    try:
-        applicant = User.objects.get(id=user_id)
-        if (applicant.user_type == "APPLICANT" ) and current_user.user_type == "OFFICER":
-            current_user.accept_application(applicant)
-            return show_user(request, user_id)
-    except User.DoesNotExist:
-        return redirect('profile')
+    if current_user.is_officer and transitions.accept_application(user_id):
+        return show_user(request, user_id)
     return redirect('profile')
 
 """
@@ -256,15 +317,41 @@ If the conditions aren't met, redirect to the officer's profile.
 @login_required
 def reject_application(request, user_id):
     current_user = request.user
-    try:
-        applicant = User.objects.get(id=user_id)
-        if (applicant.user_type == "APPLICANT" ) and current_user.user_type == "OFFICER":
-            current_user.reject_application(applicant)
-            return show_user(request, user_id)
-    except User.DoesNotExist:
-        return redirect('profile')
+    if current_user.is_officer and transitions.reject_application(user_id):
+        return show_user(request, user_id)
     return redirect('profile')
 
+"""
+Allow an officer to accept or reject many applicants in a single POST.
+The applicants are updated in one batched transaction and the officer is
+shown what happened to each selected user.
+"""
+@login_required
+def review_applications(request):
+    current_user = request.user
+    if not current_user.is_officer:
+        return redirect('profile')
+    if request.method == 'POST':
+        form = ReviewApplicationsForm(request.POST)
+        if form.is_valid():
+            accept = form.cleaned_data.get('action') == 'accept'
+            outcomes = transitions.review_applications(form.cleaned_data.get('user_ids'), accept)
+            return render(request, 'review_applications.html', {'outcomes': outcomes})
+        messages.add_message(request, messages.ERROR, "Select at least one applicant to review")
+    return redirect('view_applications')
+
+"""
+Serves a locally rendered identicon for the email hash of a user.
+Other hashes are not found, so they can't fill the disk with identicons.
+The image for a hash never changes, so browsers may cache it for a year.
+"""
+def avatar(request, email_hash, size):
+    if not re.fullmatch(r'[0-9a-f]{32}', email_hash) or not User.objects.filter(email_hash=email_hash).exists():
+        raise Http404
+    response = FileResponse(open(avatars.identicon_path(email_hash, size), 'rb'), content_type='image/png')
+    patch_cache_control(response, public=True, max_age=31536000, immutable=True)
+    return response
+
 """
 Logs out and redirects to home page
 """
@@ -0,0 +1,19 @@
+'''
+Process pool workers for management commands.
+Pools may start their workers with spawn, the default on macOS and
+Windows, where a worker imports afresh the module of every function sent
+to it before Django is set up. Commands therefore start their pools with
+init_worker from here, which imports nothing from the app, sets Django up
+and only then imports the command modules whose functions it will run.
+'''
+import importlib
+import multiprocessing
+import django
+
+START_METHODS = multiprocessing.get_all_start_methods()
+
+"""Set Django up in a new worker, then import the given modules"""
+def init_worker(*modules):
+    django.setup()
+    for module in modules:
+        importlib.import_module(module)
@@ -48,6 +48,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'clubs.metrics.ServerTimingMiddleware',
+    'clubs.instrumentation.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -55,13 +57,15 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'clubs.profiling.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'system.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        #Django templates, timed for the Server-Timing header and latency metrics
+        'BACKEND': 'clubs.metrics.TimedDjangoTemplates',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -70,6 +74,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'clubs.context_processors.fragment_versions',
             ],
         },
     },
@@ -88,6 +93,21 @@ DATABASES = {
     }
 }
 
+#Pragmas set by clubs.sqlite on every new SQLite connection. SQLite's
+#defaults are kept unless a profile below tunes them
+SQLITE_PRAGMAS = {}
+#For several workers sharing one database file: readers no longer block the
+#writer with WAL journaling, commits only sync at checkpoints, each
+#connection caches 16MiB of pages and maps 256MiB of the file, and a writer
+#waits up to 5 seconds for the lock before "database is locked"
+TUNED_SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'cache_size': -16384,
+    'mmap_size': 268435456,
+    'busy_timeout': 5000,
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -139,6 +159,24 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 #User models
 AUTH_USER_MODEL = 'clubs.user'
 
+# Loads the logged in user from the cache instead of the database.
+# Users are invalidated through the default cache, which the processes of one
+# host share in production. Hosts that do not share it, such as several Heroku
+# dynos, see a change to a user once their cached copy expires, after
+# clubs.caching.USER_TIMEOUT seconds. Sessions name the backend that logged
+# them in, so ModelBackend stays listed for sessions from before the cache
+AUTHENTICATION_BACKENDS = [
+    'clubs.backends.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
+#Template fragments have a cache of their own, so that rendering many pages
+#never evicts sessions and users
+CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'fragments': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'fragments'},
+}
+
 #Login URL for redirecting unauthenticated users
 LOGIN_URL = 'log_in'
 #URL for redirect when logged in
@@ -151,8 +189,100 @@ MESSAGE_TAGS = {
 }
 
 USERS_PER_PAGE = 10
+#Where avatars come from: 'gravatar' or 'local' identicons served by the avatar view
+AVATAR_PROVIDER = 'gravatar'
+AVATAR_CACHE_DIR = BASE_DIR / 'avatar_cache'
+
+#Either 'offset' (numbered pages) or 'keyset' (cursor pages, no COUNT query)
+USER_LIST_PAGINATION = 'offset'
+
+#Names the release being served and is part of every ETag, so pages rendered by
+#an earlier deploy's templates are never validated. Heroku sets HEROKU_SLUG_COMMIT
+#when dyno metadata is enabled
+DEPLOY_VERSION = os.environ.get('DEPLOY_VERSION') or os.environ.get('HEROKU_SLUG_COMMIT', '')
+
+#Most queries a request may run, by url name and whatever its method, before it is logged as a
+#warning by clubs.instrumentation.QueryBudgetMiddleware. Views not listed
+#get DEFAULT_QUERY_BUDGET
+DEFAULT_QUERY_BUDGET = 10
+QUERY_BUDGETS = {
+    'home': 2,
+    'log_in': 9,
+    'sign_up': 14,
+    'profile': 4,
+    'edit_profile': 8,
+    'password': 13,
+    'show_user': 3,
+    'view_applications': 5,
+    'view_members': 5,
+    'view_officers': 5,
+    'search_users': 3,
+    'accept_application': 7,
+    'reject_application': 7,
+    'promote_member': 7,
+    'demote_officer': 7,
+    'transfer_ownership': 7,
+}
+#Seconds of database time a request may take, and how often one statement
+#may be repeated with different values before it is reported as an N+1
+QUERY_TIME_BUDGET = 0.5
+QUERY_REPEAT_LIMIT = 3
+
+#Directory where every worker writes its request latency histograms, to be
+#merged by the metrics view. Without one only this process is reported
+METRICS_DIR = None
+
+#When enabled the owner can add ?profile to any url to have the request
+#profiled, with the .prof and collapsed stack files written to PROFILING_DIR
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED') == '1'
+PROFILING_DIR = BASE_DIR / 'profiles'
+
+#Deployment profile: 'development' or 'production', chosen with the SYSTEM_PROFILE
+#environment variable. Heroku dynos default to production
+SYSTEM_PROFILE = os.environ.get(
+    'SYSTEM_PROFILE',
+    'production' if '/app' in os.path.expanduser('~') else 'development',
+)
+
+if SYSTEM_PROFILE == 'production':
+    DEBUG = False
+    ALLOWED_HOSTS = os.environ.get('ALLOWED_HOSTS', 'localhost,127.0.0.1').split(',')
+    #Caches shared by every worker on the host. The default one holds a session,
+    #a version token and a cached copy of every active user, and is written to
+    #rarely, so it is sized for a few thousand of them. Every set() lists the
+    #whole cache directory to decide whether to cull, which takes about 13ms at
+    #5000 entries; fragments are written far more often and get a smaller cache
+    CACHE_DIR = os.environ.get('CACHE_DIR', str(BASE_DIR / 'cache'))
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.path.join(CACHE_DIR, 'default'),
+            'TIMEOUT': 60 * 60 * 24,
+            'OPTIONS': {'MAX_ENTRIES': 5000},
+        },
+        'fragments': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.path.join(CACHE_DIR, 'fragments'),
+            'TIMEOUT': 600,
+            'OPTIONS': {'MAX_ENTRIES': 1000},
+        },
+    }
+    #Sessions are read from the cache and written through to the database,
+    #which is only read again when an entry has been evicted
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+    #Static files are served by gunicorn itself. collectstatic gives them
+    #content hashed names and writes gzip and brotli copies next to them,
+    #and hashed files are sent with a ten year, immutable max-age
+    MIDDLEWARE.insert(MIDDLEWARE.index('django.middleware.security.SecurityMiddleware') + 1,
+                      'whitenoise.middleware.WhiteNoiseMiddleware')
+    STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+    SQLITE_PRAGMAS = TUNED_SQLITE_PRAGMAS
+    #Keep each worker's connection, and the pages it has cached, between requests
+    DATABASES['default']['CONN_MAX_AGE'] = 60
+    METRICS_DIR = os.environ.get('METRICS_DIR', str(BASE_DIR / 'metrics'))
 
 # activate heroku
 if '/app' in os.path.expanduser('~'):
     import django_heroku
-    django_heroku.settings(locals())
+    # Static files are already set up by the production profile
+    django_heroku.settings(locals(), staticfiles=False)
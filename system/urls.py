@@ -29,10 +29,16 @@ urlpatterns = [
     path('view_applications/', views.view_applications, name='view_applications'),
     path('view_members/', views.view_members, name='view_members'),
     path('view_officers/', views.view_officers, name='view_officers'),
+    path('search/', views.search_users, name='search_users'),
+    path('autocomplete/', views.autocomplete_users, name='autocomplete_users'),
+    path('export/', views.export_users, name='export_users'),
+    path('metrics/', views.metrics_view, name='metrics'),
     path('demote_officer/<int:user_id>', views.demote_officer, name='demote_officer'),
     path('promote_member/<int:user_id>', views.promote_member, name='promote_member'),
     path('transfer_ownership/<int:user_id>', views.transfer_ownership, name='transfer_ownership'),
     path('password/', views.password, name='password'),
     path('accept_application/<int:user_id>',views.accept_application,name='accept_application'),
     path('reject_application/<int:user_id>',views.reject_application,name='reject_application'),
+    path('review_applications/', views.review_applications, name='review_applications'),
+    path('avatar/<str:email_hash>/<int:size>.png', views.avatar, name='avatar'),
 ]